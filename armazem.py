@@ -0,0 +1,207 @@
+"""
+Armazém local de barras OHLCV, um arquivo colunar por (interval, janela) com
+o universo inteiro (ver colunar.py), lido por memory-map sem cópia.
+
+A cada execução só as barras depois do último timestamp gravado são baixadas
+(mais uma cauda curta, para pegar barras corrigidas e a última barra que
+ainda estava em formação). O diretório é pensado para ser persistido entre
+execuções com `actions/cache` no GitHub Actions.
+
+Armazéns antigos (um Parquet por símbolo) são lidos uma vez, como
+migração: o símbolo entra no arquivo colunar na primeira gravação e o
+Parquet é apagado.
+"""
+from __future__ import annotations
+
+import fcntl
+import os
+
+from colunar import BarrasColunares, gravar
+from dados import recortar
+from metricas import METRICAS
+from provedores import buscar_historico
+from tardio import tardio
+
+np = tardio("numpy")
+pd = tardio("pandas")
+
+# Diretório do armazém — o mesmo caminho usado no actions/cache dos workflows
+DIRETORIO_PADRAO = os.environ.get("RADAR_CACHE_DIR", ".cache/radar")
+
+# Só as colunas que os radares usam são gravadas
+COLUNAS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Nome do arquivo colunar dentro de {diretório}/{interval}/{janela}/
+ARQUIVO_COLUNAR = "barras.col"
+
+# Quantas barras do fim do histórico gravado são baixadas de novo a cada execução
+CAUDA_REBAIXAR = {"1h": 16, "1d": 5, "1wk": 2, "1mo": 2}
+
+# Diferença relativa de Close (fora da cauda) que indica histórico reajustado
+# (dividendo/split com auto_adjust=True muda o passado inteiro)
+TOLERANCIA_AJUSTE = 1e-4
+
+# =======================
+# HELPERS
+# =======================
+
+def _mesclar(antigo: pd.DataFrame, novo: pd.DataFrame) -> pd.DataFrame:
+    """Junta o histórico gravado com o download novo; em conflito, vale o novo."""
+    # No tipo do gravado (float32): o concat não promove o histórico inteiro a float64
+    novo = novo.astype({c: antigo[c].dtype for c in antigo.columns if c in novo.columns})
+    k = antigo.index.searchsorted(novo.index[0])
+    if (novo.index.is_monotonic_increasing and novo.index.is_unique
+            and antigo.index[k:].isin(novo.index).all()):
+        # Caso comum: o download cobre a cauda inteira do gravado — só emenda
+        return pd.concat([antigo.iloc[:k], novo])
+    df = pd.concat([antigo, novo])
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index()
+
+def _foi_reajustado(antigo: pd.DataFrame, novo: pd.DataFrame) -> bool:
+    """
+    True se as barras que já estavam fechadas no armazém mudaram no download
+    novo. A última barra gravada fica de fora (podia estar em formação).
+    """
+    comum = antigo.index[:-1].intersection(novo.index)
+    if comum.empty:
+        return False
+    a = antigo.loc[comum, "Close"].to_numpy(dtype=float)
+    b = novo.loc[comum, "Close"].to_numpy(dtype=float)
+    return not np.allclose(a, b, rtol=TOLERANCIA_AJUSTE, equal_nan=True)
+
+# =======================
+# ARMAZÉM
+# =======================
+
+class ArmazemBarras:
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO, memoria: bool = False,
+                 estados_em_disco: bool = True):
+        self.diretorio = diretorio
+        # Modo residente (daemon do H1): barras e estados de indicadores também
+        # ficam em memória entre varreduras. O disco continua sendo gravado
+        # para que um reinício volte já aquecido.
+        self.memoria = {} if memoria else None
+        # False (fluxo do H1): os estados dos indicadores são lidos do disco,
+        # mas só atualizados em memória — os gravados são das execuções de
+        # hora em hora, e as barras montadas de negócios não vão para eles
+        self.estados_em_disco = estados_em_disco
+        # (interval, period) → BarrasColunares aberto (ou None se não existe)
+        self._abertos = {}
+
+    def caminho(self, sym: str, interval: str, period: str) -> str:
+        # A janela faz parte do caminho: o mesmo interval com janelas diferentes
+        # (ex.: D1 de 7y no diário e de 20y no S1) não recorta o arquivo do outro.
+        # Parquet por símbolo do formato antigo; o estado dos indicadores usa
+        # o mesmo nome com outra extensão.
+        return os.path.join(self.diretorio, interval, period, f"{sym}.parquet")
+
+    def arquivo(self, interval: str, period: str) -> str:
+        return os.path.join(self.diretorio, interval, period, ARQUIVO_COLUNAR)
+
+    def colunar(self, interval: str, period: str) -> BarrasColunares | None:
+        chave = (interval, period)
+        if chave not in self._abertos:
+            self._abertos[chave] = BarrasColunares.abrir(self.arquivo(interval, period))
+        return self._abertos[chave]
+
+    def carregar(self, sym: str, interval: str, period: str) -> pd.DataFrame | None:
+        if self.memoria is not None and (sym, interval, period) in self.memoria:
+            return self.memoria[(sym, interval, period)]
+        barras = self.colunar(interval, period)
+        if barras is not None and sym in barras:
+            return barras.dataframe(sym)
+        caminho = self.caminho(sym, interval, period)
+        if not os.path.exists(caminho):
+            return None
+        try:
+            df = pd.read_parquet(caminho)
+        except Exception as e:
+            print(f"  ⚠️  armazém {sym} ({interval}) ilegível, baixando de novo: {e}")
+            return None
+        return df if not df.empty else None
+
+    def salvar_lote(self, interval: str, period: str,
+                    historicos: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+        """
+        Regrava o arquivo colunar com `historicos` no lugar das versões
+        gravadas; os demais símbolos são copiados do arquivo atual. Devolve
+        os DataFrames relidos do arquivo novo (vistas float32 sem cópia).
+        """
+        caminho = self.arquivo(interval, period)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        historicos = {sym: df[[c for c in COLUNAS if c in df.columns]]
+                      for sym, df in historicos.items() if df is not None and len(df)}
+        # Trava: fatias rodando na mesma máquina gravam o mesmo arquivo, e cada
+        # uma precisa partir da versão que a outra acabou de gravar
+        with open(caminho + ".trava", "w") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            atual = BarrasColunares.abrir(caminho)
+            todos = {}
+            if atual is not None:
+                todos = {sym: atual.dataframe(sym) for sym in atual.simbolos if sym not in historicos}
+            todos.update(historicos)
+            fuso = next((str(df.index.tz) for df in todos.values() if df.index.tz is not None), None)
+            gravar(caminho, todos, COLUNAS, fuso)
+        barras = self._abertos[(interval, period)] = BarrasColunares(caminho)
+
+        salvos = {}
+        for sym in historicos:
+            df = salvos[sym] = barras.dataframe(sym)
+            if self.memoria is not None:
+                self.memoria[(sym, interval, period)] = df
+            legado = self.caminho(sym, interval, period)
+            if os.path.exists(legado):
+                os.remove(legado)
+        METRICAS.contar(f"armazem.{interval}.bytes", os.path.getsize(caminho))
+        return salvos
+
+    def recente(self, tickers: list[str], period: str, interval: str) -> dict[str, pd.DataFrame]:
+        """Janela curta das etapas baratas: direto do provedor, sem passar pelo arquivo."""
+        return buscar_historico(tickers, period=period, interval=interval)
+
+    def atualizar(self, tickers: list[str], period: str, interval: str) -> dict[str, pd.DataFrame]:
+        """
+        Devolve {símbolo: DataFrame} com a janela `period`, como buscar_historico,
+        mas baixando só o que falta em relação ao armazém.
+        """
+        gravados = {sym: self.carregar(sym, interval, period) for sym in tickers}
+        cauda = CAUDA_REBAIXAR.get(interval, 2)
+
+        # Símbolos sem histórico gravado: download completo
+        completos = [sym for sym, df in gravados.items() if df is None]
+
+        # Símbolos com histórico: agrupa pela data de início da cauda para
+        # baixar cada grupo numa única chamada em lote
+        por_inicio = {}
+        for sym, df in gravados.items():
+            if df is None:
+                continue
+            inicio = df.index[-min(cauda, len(df))].strftime("%Y-%m-%d")
+            por_inicio.setdefault(inicio, []).append(sym)
+
+        resultado = {}
+        for inicio, grupo in sorted(por_inicio.items()):
+            novos = buscar_historico(grupo, period=None, interval=interval, start=inicio)
+            for sym in grupo:
+                antigo, novo = gravados[sym], novos.get(sym)
+                if novo is None:
+                    # Sem dado novo (feriado, falha pontual): segue com o gravado
+                    resultado[sym] = antigo
+                elif _foi_reajustado(antigo, novo):
+                    completos.append(sym)
+                else:
+                    resultado[sym] = _mesclar(antigo, novo)
+
+        if completos:
+            resultado.update(buscar_historico(completos, period=period, interval=interval))
+
+        resultado = self.salvar_lote(
+            interval, period, {sym: recortar(df, period) for sym, df in resultado.items()})
+
+        METRICAS.cache(f"armazem.{interval}", len(tickers) - len(completos), len(completos))
+        print(
+            f"  💾 armazém {interval}: {len(tickers) - len(completos)} incremental(is), "
+            f"{len(completos)} completo(s)"
+        )
+        return resultado
@@ -0,0 +1,537 @@
+"""
+Backtest vetorizado das regras dos radares sobre o histórico inteiro.
+
+    python backtest.py d1 [--period 10y] [--horizontes 5,10,20] [--saida sinais.csv]
+    python backtest.py h1 --conferir
+    python backtest.py d1 --padrao 0111 --preco-min 30
+    python backtest.py s1 --padroes-compra 100111,001111
+
+A regra de cada radar é avaliada em TODAS as barras de todos os tickers de
+uma vez, sobre painéis (barra × símbolo) alinhados pela última barra como
+em triagem.py: o padrão das últimas barras vira comparação entre linhas
+deslocadas e as médias são calculadas uma vez por coluna — nada de repetir
+o loop diário do radar para cada data. O viés (W1 no D1, D1 no H1, MN no
+S1) é o do período em formação naquela barra: a média do período anterior,
+já fechado, avançada com o Close da barra — o que o radar veria se rodasse
+naquele momento.
+
+Para cada horizonte (em barras do timeframe do sinal) o relatório traz o
+retorno médio/mediano depois do sinal e a taxa de acerto (retorno > 0 na
+compra, < 0 na venda), ao lado da base de todas as barras elegíveis. Com
+--conferir, a última barra de cada ticker também passa pelo caminho de
+produção do próprio radar (avaliar_universo / avaliar_diario) e os sinais
+têm de bater: as mesmas janelas que ele recorta do histórico baixado e as
+médias pelo estado incremental, montado antes das últimas barras e
+avançado com elas, como numa execução que encontra o estado da anterior.
+
+Os parâmetros da regra (padrão de barras, preço mínimo, padrões do S1) são
+lidos do módulo do radar; as opções de linha de comando os sobrescrevem no
+próprio módulo, então a conferência usa os mesmos valores.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import sys
+import tempfile
+import time
+
+from armazem import ArmazemBarras
+from dados import FUSO_BOLSA, recortar
+from reamostragem import _datas_locais, derivar, para_diario, para_mensal, para_semanal
+from tardio import tardio
+from triagem import EMA_FAST, EMA_MID, MINIMO_BARRAS, SMA_LONG, ema_painel, medias, montar_painel, sma_painel
+
+np = tardio("numpy")
+pd = tardio("pandas")
+
+# Radar → módulo com TICKERS e parâmetros da regra
+RADARES = {"d1": "radar", "h1": "radar_h1", "s1": "radar_s1"}
+
+# Janela de histórico carregada por padrão (o S1 precisa de 200 meses antes do 1º sinal)
+PERIODOS = {"d1": "10y", "h1": "730d", "s1": "20y"}
+
+# Horizontes padrão dos retornos futuros, em barras do timeframe do sinal
+# (H1: 1 hora, 1 pregão e 1 semana; S1: 1 semana, 1 mês e 1 trimestre)
+HORIZONTES = {"d1": [5, 10, 20], "h1": [1, 7, 35], "s1": [1, 4, 13]}
+
+# Barras do timeframe baixado que a conferência deixa para o estado
+# incremental das médias incorporar (D1: uma semana, H1: uma semana, S1: um mês)
+BARRAS_NOVAS = {"d1": 5, "h1": 35, "s1": 21}
+
+# =======================
+# HELPERS
+# =======================
+
+def importar_radar(radar: str):
+    return importlib.import_module(RADARES[radar])
+
+def _ler_padrao(texto: str) -> list[bool]:
+    """"0111" → [bear, bull, bull, bull]."""
+    if not texto or set(texto) - {"0", "1"}:
+        raise argparse.ArgumentTypeError(f"padrão deve ser só 0 (bear) e 1 (bull): {texto!r}")
+    return [c == "1" for c in texto]
+
+def _dias(datas: pd.DatetimeIndex) -> np.ndarray:
+    """Datas sem fuso como nº de dias desde 1970 — cabe exato no painel float."""
+    return datas.values.astype("datetime64[D]").astype(np.int64).astype(float)
+
+def _marcas(df: pd.DataFrame, rotulos: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    Colunas auxiliares do painel de sinal: "Rotulo" (dia que rotula o período
+    de viés da barra) e "Ts" (horário da barra em segundos desde 1970).
+    """
+    return pd.DataFrame({"Rotulo": _dias(rotulos), "Ts": df.index.as_unit("s").asi8.astype(float)},
+                        index=df.index)
+
+def _deslocar(a: np.ndarray, s: int, preencher) -> np.ndarray:
+    """Linha r recebe a linha r - s (as s primeiras recebem `preencher`)."""
+    if s == 0:
+        return a
+    out = np.full(a.shape, preencher, dtype=a.dtype)
+    out[s:] = a[:-s]
+    return out
+
+def _acima(close: np.ndarray, ind: dict[str, np.ndarray]) -> np.ndarray:
+    return (close > ind["ema21"]) & (close > ind["ema120"]) & (close > ind["sma200"])
+
+def _abaixo(close: np.ndarray, ind: dict[str, np.ndarray]) -> np.ndarray:
+    return (close < ind["ema21"]) & (close < ind["ema120"]) & (close < ind["sma200"])
+
+def _contagem(painel: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Primeira linha válida de cada coluna e nº de barras até cada linha (T×N)."""
+    T = painel["Close"].shape[0]
+    primeira = T - np.minimum(painel["barras"], T)
+    linhas = np.arange(T)[:, None]
+    return primeira, np.where(linhas >= primeira, linhas - primeira + 1, 0)
+
+# =======================
+# MÉDIAS
+# =======================
+
+def ema_ajustada_painel(x: np.ndarray, span: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Numerador e denominador de `ewm(span, adjust=True)` coluna a coluna —
+    a média é num/den. Guardar os dois permite avançar a média com um valor
+    novo sem recalcular a série (viés em formação do S1).
+    """
+    beta = 1.0 - 2.0 / (span + 1.0)
+    num = np.zeros_like(x)
+    den = np.zeros_like(x)
+    n_ant = np.zeros(x.shape[1:])
+    d_ant = np.zeros(x.shape[1:])
+    for t in range(x.shape[0]):
+        valido = ~np.isnan(x[t])
+        n_ant = np.where(valido, np.nan_to_num(x[t]) + beta * n_ant, n_ant)
+        d_ant = np.where(valido, 1.0 + beta * d_ant, d_ant)
+        num[t], den[t] = n_ant, d_ant
+    return num, den
+
+def medias_ajustadas(painel: dict) -> dict[str, np.ndarray]:
+    """EMA21/EMA120 com adjust=True (como o S1) e SMA200 sobre o Close."""
+    close = painel["Close"]
+    ind = {}
+    for nome, span in (("ema21", EMA_FAST), ("ema120", EMA_MID)):
+        num, den = ema_ajustada_painel(close, span)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ind[nome] = np.where(den > 0, num / den, np.nan)
+    ind["sma200"] = sma_painel(close, SMA_LONG)
+    return ind
+
+def indice_vies(rot_sinal: np.ndarray, rot_vies: np.ndarray, barras_vies: np.ndarray) -> np.ndarray:
+    """Linha do painel de viés do período que contém cada barra de sinal (-1 se nenhum)."""
+    Tv = rot_vies.shape[0]
+    idx = np.full(rot_sinal.shape, -1, dtype=np.int64)
+    for j in range(rot_sinal.shape[1]):
+        inicio = Tv - min(int(barras_vies[j]), Tv)
+        v = rot_vies[inicio:, j]
+        validos = ~np.isnan(rot_sinal[:, j])
+        s = rot_sinal[validos, j]
+        pos = np.minimum(np.searchsorted(v, s), max(len(v) - 1, 0))
+        achou = (v[pos] == s) if len(v) else np.zeros(len(s), dtype=bool)
+        idx[validos, j] = np.where(achou, inicio + pos, -1)
+    return idx
+
+def vies_em_formacao(close: np.ndarray, vies: dict, idx: np.ndarray,
+                     ajustada: bool = False) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """
+    Médias do timeframe de viés no período em formação em cada barra de
+    sinal: as médias até o período anterior (fechado) avançadas com o Close
+    da barra, com as mesmas operações de ema_painel/sma_painel na última
+    linha. Devolve as médias (T×N) e quantos períodos de viés o radar veria.
+    """
+    fechado = vies["Close"]
+    primeira, _ = _contagem(vies)
+    anterior = idx - 1
+    tem_anterior = (idx >= 0) & (anterior >= primeira)
+    linha = np.clip(anterior, 0, None)
+
+    ind = {}
+    for nome, span in (("ema21", EMA_FAST), ("ema120", EMA_MID)):
+        if ajustada:
+            num, den = ema_ajustada_painel(fechado, span)
+            beta = 1.0 - 2.0 / (span + 1.0)
+            n = np.where(tem_anterior, np.take_along_axis(num, linha, axis=0), 0.0)
+            d = np.where(tem_anterior, np.take_along_axis(den, linha, axis=0), 0.0)
+            ind[nome] = (close + beta * n) / (1.0 + beta * d)
+        else:
+            alpha = 2.0 / (span + 1.0)
+            prev = np.where(tem_anterior, np.take_along_axis(ema_painel(fechado, span), linha, axis=0), np.nan)
+            ind[nome] = np.where(np.isnan(prev), close, prev + alpha * (close - prev))
+
+    # Soma acumulada como em sma_painel: soma[k] = soma das linhas < k
+    validos = ~np.isnan(fechado)
+    soma = np.concatenate([np.zeros((1, fechado.shape[1])),
+                           np.cumsum(np.where(validos, fechado, 0.0), axis=0)])
+    k = SMA_LONG - 1
+    cheia = (idx >= 0) & (idx - primeira >= k)
+    atual = np.take_along_axis(soma, np.clip(idx, 0, None), axis=0) + close
+    inicio = np.take_along_axis(soma, np.clip(idx - k, 0, None), axis=0)
+    ind["sma200"] = np.where(cheia, (atual - inicio) / SMA_LONG, np.nan)
+
+    barras = np.where(idx >= 0, idx - primeira + 1, 0)
+    return ind, barras
+
+# =======================
+# REGRAS
+# =======================
+
+def regra_3ws(sinal: dict, vies: dict, padrao: list[bool], preco_min: float,
+              minimo_barras: int = MINIMO_BARRAS) -> dict:
+    """
+    3WS em todas as barras: preço mínimo, padrão de direção + closes
+    crescentes nas últimas len(padrao) barras, histórico suficiente e Close
+    acima das 3 médias no sinal e no viés em formação. Devolve o funil de
+    máscaras T×N e "compra" (máscara final).
+    """
+    O, C = sinal["Open"], sinal["Close"]
+    _, barras_s = _contagem(sinal)
+    idx = indice_vies(sinal["Rotulo"], vies["Rotulo"], vies["barras"])
+    ind_v, barras_v = vies_em_formacao(C, vies, idx)
+    ind_s = medias(sinal)
+
+    k = len(padrao)
+    bull = C > O
+    definida = ~np.isnan(C) & ~np.isnan(O)
+    direcao = np.ones(C.shape, dtype=bool)
+    for i, p in enumerate(padrao):
+        direcao &= _deslocar((bull == p) & definida, k - 1 - i, False)
+    crescente = np.ones(C.shape, dtype=bool)
+    for s in range(k - 2):
+        crescente &= _deslocar(C, s, np.nan) > _deslocar(C, s + 1, np.nan)
+
+    historico = (barras_s >= minimo_barras) & (barras_v >= minimo_barras)
+    preco = C >= preco_min
+    padrao_ok = direcao & crescente
+    medias_ok = _acima(C, ind_s) & _acima(C, ind_v)
+    return {
+        "funil": [("histórico", historico), ("preço", preco), ("padrão", padrao_ok), ("médias", medias_ok)],
+        "elegivel": historico,
+        "sinais": {"compra": historico & preco & padrao_ok & medias_ok},
+    }
+
+def regra_s1(sinal: dict, vies: dict, compra: list[list[bool]], venda: list[list[bool]],
+             sma_longa: int = SMA_LONG) -> dict:
+    """
+    S1 em todas as barras semanais: bitmask das últimas 6 velas com
+    gap-check (a 1ª vela da janela só compara com a própria abertura),
+    padrão de compra/venda e Close acima/abaixo das 3 médias semanais e das
+    3 mensais do mês em formação (EMAs com adjust=True).
+    """
+    O, C = sinal["Open"], sinal["Close"]
+    _, barras_s = _contagem(sinal)
+    idx = indice_vies(sinal["Rotulo"], vies["Rotulo"], vies["barras"])
+    ind_v, barras_v = vies_em_formacao(C, vies, idx, ajustada=True)
+    ind_s = medias_ajustadas(sinal)
+
+    n = len(compra[0])
+    bull = C > O
+    bull_gap = bull & (C > _deslocar(C, 1, np.nan))
+    mascara = _deslocar(bull, n - 1, False).astype(np.int64)
+    for i in range(1, n):
+        mascara |= _deslocar(bull_gap, n - 1 - i, False).astype(np.int64) << i
+
+    bits = lambda padroes: [sum(1 << i for i, b in enumerate(p) if b) for p in padroes]
+    historico = (barras_s >= n) & (barras_v >= sma_longa)
+    e_compra = np.isin(mascara, bits(compra))
+    e_venda = np.isin(mascara, bits(venda))
+    acima = _acima(C, ind_s) & _acima(C, ind_v)
+    abaixo = _abaixo(C, ind_s) & _abaixo(C, ind_v)
+    return {
+        "funil": [("histórico", historico), ("padrão", e_compra | e_venda),
+                  ("médias", (e_compra & acima) | (e_venda & abaixo))],
+        "elegivel": historico,
+        "sinais": {"compra": historico & e_compra & acima, "venda": historico & e_venda & abaixo},
+    }
+
+# =======================
+# DADOS
+# =======================
+
+def carregar(radar: str, modulo, simbolos: list[str], period: str) -> tuple[dict, dict, dict, dict]:
+    """
+    Históricos do sinal e do viés ({sym: DataFrame}, os mesmos que o radar
+    usaria), as marcas (Rotulo/Ts) das barras de sinal e o histórico do
+    timeframe baixado (H1 ou D1) de onde eles saem. Pelo armazém: só o que
+    falta é baixado.
+    """
+    armazem = ArmazemBarras()
+    if radar == "h1":
+        bruto = armazem.atualizar(simbolos, period=period, interval="1h")
+        sinal = {sym: modulo.descartar_barra_aberta(df) for sym, df in bruto.items()}
+        sinal = {sym: df for sym, df in sinal.items() if df is not None and len(df)}
+        vies = derivar(sinal, para_diario)
+        marcas = {sym: _marcas(df, _datas_locais(df)) for sym, df in sinal.items()}
+        return sinal, vies, marcas, bruto
+
+    diario = armazem.atualizar(simbolos, period=period, interval="1d")
+    if radar == "d1":
+        vies = derivar(diario, para_semanal)
+        marcas = {}
+        for sym, df in diario.items():
+            datas = _datas_locais(df)
+            marcas[sym] = _marcas(df, datas - pd.to_timedelta(datas.dayofweek, unit="D"))
+        return diario, vies, marcas, diario
+
+    # S1: semanas como sinal, rotuladas pelo mês do último pregão da semana
+    sinal = derivar(diario, para_semanal)
+    vies = derivar(diario, para_mensal)
+    marcas = {}
+    for sym, df in diario.items():
+        datas = _datas_locais(df)
+        segunda = datas - pd.to_timedelta(datas.dayofweek, unit="D")
+        mes = datas - pd.to_timedelta(datas.day - 1, unit="D")
+        mes_da_semana = pd.Series(mes, index=segunda).groupby(level=0).last()
+        semanas = sinal[sym]
+        marcas[sym] = _marcas(semanas, pd.DatetimeIndex(mes_da_semana.reindex(_datas_locais(semanas)).to_numpy()))
+    return sinal, vies, marcas, diario
+
+def paineis(simbolos: list[str], sinal: dict, vies: dict, marcas: dict) -> tuple[dict, dict]:
+    p_sinal = montar_painel(sinal, simbolos)
+    p_sinal.update({c: m for c, m in montar_painel(marcas, simbolos, colunas=("Rotulo", "Ts")).items()
+                    if c in ("Rotulo", "Ts")})
+    rot_vies = {sym: pd.DataFrame({"Rotulo": _dias(_datas_locais(df))}, index=df.index) for sym, df in vies.items()}
+    p_vies = montar_painel(vies, simbolos, colunas=("Close",))
+    p_vies["Rotulo"] = montar_painel(rot_vies, simbolos, colunas=("Rotulo",))["Rotulo"]
+    return p_sinal, p_vies
+
+# =======================
+# RELATÓRIO
+# =======================
+
+def retornos_futuros(close: np.ndarray, h: int) -> np.ndarray:
+    """Close[r + h] / Close[r] - 1 (NaN sem h barras à frente)."""
+    out = np.full(close.shape, np.nan)
+    if h < close.shape[0]:
+        out[:-h] = close[h:] / close[:-h] - 1
+    return out
+
+def estatisticas(sinais: np.ndarray, elegivel: np.ndarray, close: np.ndarray,
+                 horizontes: list[int], sentido: int = 1) -> list[dict]:
+    """
+    Por horizonte: sinais com retorno futuro conhecido, retorno médio e
+    mediano e acerto (sentido × retorno > 0), e o mesmo para a base de todas
+    as barras elegíveis.
+    """
+    linhas = []
+    for h in horizontes:
+        r = retornos_futuros(close, h)
+        conhecido = ~np.isnan(r)
+        amostra = r[sinais & conhecido]
+        base = r[elegivel & conhecido]
+        linhas.append({
+            "horizonte": h,
+            "sinais": int(amostra.size),
+            "retorno_medio": float(amostra.mean()) if amostra.size else None,
+            "retorno_mediano": float(np.median(amostra)) if amostra.size else None,
+            "acerto": float((sentido * amostra > 0).mean()) if amostra.size else None,
+            "base_retorno_medio": float(base.mean()) if base.size else None,
+            "base_acerto": float((sentido * base > 0).mean()) if base.size else None,
+        })
+    return linhas
+
+def lista_sinais(simbolos: list[str], p_sinal: dict, res: dict, horizontes: list[int]) -> pd.DataFrame:
+    """Um sinal por linha: símbolo, horário da barra, tipo, Close e retornos futuros."""
+    partes = []
+    retornos = {h: retornos_futuros(p_sinal["Close"], h) for h in horizontes}
+    for tipo, mascara in res["sinais"].items():
+        linhas, colunas = np.nonzero(mascara)
+        partes.append(pd.DataFrame({
+            "simbolo": np.array(simbolos, dtype=object)[colunas],
+            "barra": pd.to_datetime(p_sinal["Ts"][linhas, colunas], unit="s", utc=True).tz_convert(FUSO_BOLSA),
+            "sinal": tipo,
+            "close": p_sinal["Close"][linhas, colunas],
+            **{f"ret_{h}": retornos[h][linhas, colunas] for h in horizontes},
+        }))
+    return pd.concat(partes, ignore_index=True).sort_values(["barra", "simbolo"], ignore_index=True)
+
+def _pct(x) -> str:
+    return "     —" if x is None else f"{x * 100:+6.2f}%"
+
+def imprimir(resumo: dict):
+    barras = f"{resumo['barras']:,}".replace(",", ".")
+    print(f"Backtest {resumo['radar'].upper()} — {resumo['tickers']} ticker(s), {barras} barra(s) em {resumo['period']}")
+    print(f"  dados {resumo['segundos_dados']:.1f}s, regra {resumo['segundos_regra']:.2f}s")
+    print("  Funil: " + ", ".join(f"{nome}={n:,}".replace(",", ".") for nome, n in resumo["funil"]))
+    for tipo, s in resumo["sinais"].items():
+        ultima = ", ".join(s["ultima_barra"]) or "nenhum"
+        print(f"\n  {tipo.capitalize()}: {s['total']} sinal(is) em {s['tickers']} ticker(s); na última barra: {ultima}")
+        print("    horizonte  sinais  ret.médio  mediana  acerto | base: ret.médio  acerto")
+        for e in s["horizontes"]:
+            acerto = "    —" if e["acerto"] is None else f"{e['acerto'] * 100:5.1f}%"
+            base = "    —" if e["base_acerto"] is None else f"{e['base_acerto'] * 100:5.1f}%"
+            print(f"    {e['horizonte']:>9}  {e['sinais']:>6}  {_pct(e['retorno_medio'])}  "
+                  f"{_pct(e['retorno_mediano'])}  {acerto} |       {_pct(e['base_retorno_medio'])}  {base}")
+    if "conferencia" in resumo:
+        c = resumo["conferencia"]
+        status = "OK" if not c["divergentes"] else f"{len(c['divergentes'])} divergente(s): {c['divergentes']}"
+        print(f"\n  🔎 última barra vs funções do radar ({c['segundos']:.1f}s): {status}")
+
+# =======================
+# CONFERÊNCIA
+# =======================
+
+class ArmazemConferencia(ArmazemBarras):
+    """
+    Armazém temporário da conferência: serve o histórico já carregado, no
+    lugar do provedor, recortado à janela que o radar pede; os estados das
+    médias são gravados no diretório temporário, como no armazém de verdade.
+    """
+
+    def __init__(self, diretorio: str, base: dict[str, pd.DataFrame]):
+        super().__init__(diretorio)
+        self.base = base
+
+    def atualizar(self, tickers, period, interval):
+        return {sym: recortar(self.base[sym], period) for sym in tickers if sym in self.base}
+
+    def recente(self, tickers, period, interval):
+        return self.atualizar(tickers, period, interval)
+
+def _ao_vivo(radar: str, modulo, simbolos: list[str], armazem: ArmazemConferencia) -> dict[str, set]:
+    if radar == "s1":
+        compras, vendas, _ = modulo.avaliar_diario(simbolos, armazem.atualizar(simbolos, "20y", "1d"), armazem)
+        return {"compra": set(compras), "venda": set(vendas)}
+    hits, _ = modulo.avaliar_universo(simbolos, armazem=armazem)
+    return {"compra": set(hits)}
+
+def conferir(radar: str, modulo, simbolos: list[str], base: dict, res: dict) -> dict:
+    """Sinais da última barra de cada ticker pelo backtest x pelo caminho de produção do radar."""
+    inicio = time.perf_counter()
+    backtest = {tipo: {sym for j, sym in enumerate(simbolos) if m[-1, j]} for tipo, m in res["sinais"].items()}
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Execução anterior: monta os estados das médias sem as últimas barras
+        anterior = {sym: df.iloc[:-BARRAS_NOVAS[radar]] for sym, df in base.items()
+                    if len(df) > BARRAS_NOVAS[radar]}
+        armazem = ArmazemConferencia(diretorio, anterior)
+        _ao_vivo(radar, modulo, simbolos, armazem)
+        # Execução atual: os estados avançam com as barras novas
+        armazem.base = base
+        ao_vivo = _ao_vivo(radar, modulo, simbolos, armazem)
+
+    divergentes = {}
+    for tipo in backtest:
+        so_backtest, so_radar = backtest[tipo] - ao_vivo[tipo], ao_vivo[tipo] - backtest[tipo]
+        if so_backtest or so_radar:
+            divergentes[tipo] = {"so_backtest": sorted(so_backtest), "so_radar": sorted(so_radar)}
+    return {"segundos": time.perf_counter() - inicio, "divergentes": divergentes}
+
+# =======================
+# EXECUÇÃO DIRETA
+# =======================
+
+def executar(radar: str, period: str | None = None, horizontes: list[int] | None = None,
+             verificar: bool = False, saida: str | None = None) -> dict:
+    modulo = importar_radar(radar)
+    period = period or PERIODOS[radar]
+    horizontes = horizontes or HORIZONTES[radar]
+
+    inicio = time.perf_counter()
+    sinal, vies, marcas, base = carregar(radar, modulo, modulo.TICKERS, period)
+    simbolos = [sym for sym in modulo.TICKERS if sym in sinal]
+    segundos_dados = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    p_sinal, p_vies = paineis(simbolos, sinal, vies, marcas)
+    if radar == "s1":
+        res = regra_s1(p_sinal, p_vies, modulo.BUY_PATTERNS, modulo.SELL_PATTERNS)
+    else:
+        res = regra_3ws(p_sinal, p_vies, modulo.PADRAO_BARRAS, modulo.PRECO_MIN_USD)
+    sentidos = {"compra": 1, "venda": -1}
+    resumo_sinais = {
+        tipo: {
+            "total": int(m.sum()),
+            "tickers": int(m.any(axis=0).sum()),
+            "ultima_barra": [sym for j, sym in enumerate(simbolos) if m[-1, j]],
+            "horizontes": estatisticas(m, res["elegivel"], p_sinal["Close"], horizontes, sentidos[tipo]),
+        }
+        for tipo, m in res["sinais"].items()
+    }
+    # Funil acumulado: barras que sobrevivem a cada condição, na ordem do radar
+    vivos = np.ones(p_sinal["Close"].shape, dtype=bool)
+    funil = []
+    for nome, m in res["funil"]:
+        vivos &= m
+        funil.append((nome, int(vivos.sum())))
+    segundos_regra = time.perf_counter() - inicio
+
+    resumo = {
+        "radar": radar,
+        "period": period,
+        "tickers": len(simbolos),
+        "barras": int((~np.isnan(p_sinal["Close"])).sum()),
+        "segundos_dados": segundos_dados,
+        "segundos_regra": segundos_regra,
+        "funil": funil,
+        "sinais": resumo_sinais,
+    }
+    if verificar:
+        resumo["conferencia"] = conferir(radar, modulo, simbolos, {sym: base[sym] for sym in simbolos}, res)
+    if saida:
+        lista_sinais(simbolos, p_sinal, res, horizontes).to_csv(saida, index=False)
+        resumo["saida"] = saida
+    return resumo
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest vetorizado das regras dos radares")
+    parser.add_argument("radar", choices=list(RADARES))
+    parser.add_argument("--period", help="janela de histórico (padrão: " +
+                        ", ".join(f"{r}={p}" for r, p in PERIODOS.items()) + ")")
+    parser.add_argument("--horizontes", type=lambda t: [int(h) for h in t.split(",")],
+                        help="barras à frente para os retornos, ex.: 5,10,20")
+    parser.add_argument("--padrao", type=_ler_padrao,
+                        help="D1/H1: padrão das últimas barras, 0=bear 1=bull (ex.: 0111)")
+    parser.add_argument("--preco-min", type=float, help="D1/H1: preço mínimo em USD")
+    parser.add_argument("--padroes-compra", type=lambda t: [_ler_padrao(p) for p in t.split(",")],
+                        help="S1: padrões de compra de 6 velas separados por vírgula (venda = invertidos)")
+    parser.add_argument("--conferir", action="store_true",
+                        help="confere a última barra com as funções do próprio radar")
+    parser.add_argument("--saida", help="CSV com um sinal por linha")
+    parser.add_argument("--json", action="store_true", help="imprime o resumo em JSON")
+    args = parser.parse_args()
+
+    modulo = importar_radar(args.radar)
+    if args.padrao is not None:
+        modulo.PADRAO_BARRAS = args.padrao
+    if args.preco_min is not None:
+        modulo.PRECO_MIN_USD = args.preco_min
+    if args.padroes_compra is not None:
+        modulo.BUY_PATTERNS = args.padroes_compra
+        modulo.SELL_PATTERNS = [[not b for b in p] for p in args.padroes_compra]
+        modulo.SINAIS_S1 = {
+            **{modulo._bits(p): "compra" for p in modulo.BUY_PATTERNS},
+            **{modulo._bits(p): "venda"  for p in modulo.SELL_PATTERNS},
+        }
+
+    resumo = executar(args.radar, args.period, args.horizontes, args.conferir, args.saida)
+    if args.json:
+        print(json.dumps(resumo, ensure_ascii=False))
+    else:
+        imprimir(resumo)
+    if resumo.get("conferencia", {}).get("divergentes"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
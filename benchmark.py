@@ -0,0 +1,555 @@
+"""
+Benchmark dos radares sem rede, sobre o provedor de fixture.
+
+    python benchmark.py fixture DIR [--semente N]
+        Gera OHLCV sintético para o universo dos três radares em DIR.
+
+    python benchmark.py rodar DIR [--saida ARQ]
+        Roda o main() de cada radar contra a fixture, cada um num processo
+        novo, com armazém vazio ("frio") e depois reaproveitado ("quente").
+        Mede tempo total, tempo por etapa e pico de memória, e grava um JSON
+        (padrão: bench/<commit>.json) para comparar entre commits.
+
+    python benchmark.py comparar A.json B.json
+        Diferença de tempo e memória entre duas execuções.
+
+    python benchmark.py fatias DIR [-k K] [--radar d1]
+        Roda K workers (--fatia i/K) em paralelo contra a fixture, junta os
+        resultados (--juntar K) e confere que a mensagem é a mesma da
+        execução num processo só.
+
+    python benchmark.py backtest DIR [--radar d1]
+        Roda o backtest vetorizado de cada radar sobre a fixture (armazém
+        frio), com conferência da última barra, e mostra o tempo de carga
+        dos dados, o tempo da regra e barras avaliadas por segundo.
+
+    python benchmark.py partida [--orcamento-ms 150]
+        Partida a frio: com `python -X importtime`, confere que importar
+        cada radar fica dentro do orçamento e não carrega pandas, numpy,
+        yfinance nem requests; e que uma execução do H1 sem barra nova sai
+        sem importá-los, em fração do tempo de um import completo.
+
+    python benchmark.py processos [-n 3000] [-w 1 2 4]
+        Avaliação do S1 (reamostragem, médias e regra) sobre um universo
+        sintético de N símbolos com 20 anos de D1, com 1, 2, 4... processos
+        (paralelo.py). Mostra o tempo e o ganho sobre 1 processo e confere
+        que compras e vendas são as mesmas.
+
+    python benchmark.py fluxo DIR [--dias 2] [--negocios 20]
+        Modo de fluxo do H1: corta o H1 da fixture DIAS pregões antes do
+        fim, gera negócios que remontam as barras cortadas e passa o
+        replay pelo radar (fluxo.py). Confere, a cada fechamento de barra,
+        que os sinais são os da regra rodada sobre a fixture até aquela
+        barra, e mostra o tempo entre a barra fechar e o sinal sair.
+
+O Telegram nunca é chamado: send_telegram é trocado por uma captura.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Radares medidos: nome → módulo
+RADARES = {"d1": "radar", "h1": "radar_h1", "s1": "radar_s1"}
+
+# Funções de cada módulo cronometradas individualmente (além das etapas)
+FUNCOES_MEDIDAS = {
+    "radar":    ["carregar_curto", "carregar_completo", "estados_atualizados"],
+    "radar_h1": ["carregar_curto", "carregar_completo", "estados_atualizados"],
+    "radar_s1": ["derivar", "estados_atualizados", "avaliar_s1"],
+}
+
+# Secrets fictícios para os radares rodados inteiros (main): o envio ao
+# Telegram falha e só é logado
+ENV_FICTICIO = {
+    "TELEGRAM_TOKEN": "benchmark",
+    "TELEGRAM_CHAT_ID": "0",
+    "TELEGRAM_CHAT_ID_H1": "0",
+    "TELEGRAM_CHAT_ID_S1": "0",
+}
+
+DIRETORIO_SAIDA = "bench"
+
+# Importar um radar (sem rodar) não pode passar disto nem trazer estes módulos
+ORCAMENTO_IMPORT_MS = 150
+MODULOS_PESADOS = ["pandas", "numpy", "yfinance", "requests", "pyarrow"]
+
+# H1 avulso logo depois de uma varredura da última barra fechada: nada a fazer
+CODIGO_H1_SEM_BARRA_NOVA = (
+    "import datetime, radar_h1, calendario\n"
+    "agora = datetime.datetime.now(datetime.timezone.utc) - radar_h1.GRACA_DAEMON\n"
+    "radar_h1._gravar_varredura(calendario.ultimo_fechamento(agora))\n"
+    "radar_h1.main()"
+)
+
+# =======================
+# FIXTURE
+# =======================
+
+def universo() -> list[str]:
+    """União dos TICKERS dos três radares."""
+    import importlib
+    simbolos = set()
+    for modulo in RADARES.values():
+        simbolos.update(importlib.import_module(modulo).TICKERS)
+    return sorted(simbolos)
+
+def cmd_fixture(args):
+    from provedores import gerar_fixture
+    simbolos = universo()
+    inicio = time.perf_counter()
+    gerar_fixture(args.diretorio, simbolos, semente=args.semente)
+    print(f"Fixture com {len(simbolos)} símbolo(s) em {args.diretorio} ({time.perf_counter() - inicio:.1f}s)")
+
+# =======================
+# MEDIÇÃO (um radar, processo isolado)
+# =======================
+
+def _cronometrar(tempos: dict, nome: str, funcao):
+    def medida(*a, **kw):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*a, **kw)
+        finally:
+            t = tempos.setdefault(nome, {"chamadas": 0, "segundos": 0.0})
+            t["chamadas"] += 1
+            t["segundos"] += time.perf_counter() - inicio
+    return medida
+
+def medir(modulo_nome: str, juntar_total: int | None = None) -> dict:
+    """Importa o radar, troca Telegram/medidores e roda main() uma vez."""
+    import importlib
+
+    import armazem
+
+    inicio_import = time.perf_counter()
+    modulo = importlib.import_module(modulo_nome)
+    segundos_import = time.perf_counter() - inicio_import
+    # Pico até aqui = custo fixo dos imports; o resto do pico é dos dados
+    rss_import_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    mensagens = []
+    modulo.send_telegram = mensagens.append
+
+    funcoes = {}
+    for nome in FUNCOES_MEDIDAS[modulo_nome]:
+        setattr(modulo, nome, _cronometrar(funcoes, nome, getattr(modulo, nome)))
+    armazem.ArmazemBarras.atualizar = _cronometrar(funcoes, "armazem.atualizar",
+                                                   armazem.ArmazemBarras.atualizar)
+
+    etapas = []
+    if hasattr(modulo, "executar_etapas"):
+        original = modulo.executar_etapas
+        def executar_etapas(*a, **kw):
+            vivos, relatorio = original(*a, **kw)
+            etapas.extend(relatorio)
+            return vivos, relatorio
+        modulo.executar_etapas = executar_etapas
+
+    # O log dos radares é longo (DEBUG) — fica fora da saída do benchmark
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if juntar_total:
+            modulo.main(juntar_total=juntar_total)
+        else:
+            modulo.main()
+    segundos = time.perf_counter() - inicio
+
+    return {
+        "segundos": segundos,
+        "segundos_import": segundos_import,
+        "etapas": etapas,
+        "funcoes": funcoes,
+        # ru_maxrss vem em KiB no Linux
+        "pico_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rss_import_mb": rss_import_mb,
+        "mensagens": mensagens,
+    }
+
+def cmd_um(args):
+    print(json.dumps(medir(args.modulo, args.juntar)))
+
+# =======================
+# SUÍTE
+# =======================
+
+def _ambiente(fixture: str, cache: str, **extra) -> dict:
+    env = dict(os.environ, **ENV_FICTICIO, **extra)
+    env["RADAR_PROVEDOR"] = f"fixture:{os.path.abspath(fixture)}"
+    env["RADAR_CACHE_DIR"] = cache
+    env.pop("GITHUB_EVENT_NAME", None)
+    # O armazém quente é reaproveitado: o H1 não pode pular por "nenhuma barra nova"
+    env.setdefault("RADAR_H1_SEMPRE_VARRER", "1")
+    return env
+
+def _rodar_processo(modulo: str, fixture: str, cache: str, *args: str, **extra) -> dict:
+    saida = subprocess.run([sys.executable, os.path.abspath(__file__), "_um", modulo, *args],
+                           env=_ambiente(fixture, cache, **extra), capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "desconhecido"
+
+def cmd_rodar(args):
+    commit = _commit()
+    resultado = {
+        "commit": commit,
+        "data": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "fixture": os.path.abspath(args.diretorio),
+        "radares": {},
+    }
+    for nome, modulo in RADARES.items():
+        if args.radar and nome not in args.radar:
+            continue
+        with tempfile.TemporaryDirectory() as cache:
+            frio = _rodar_processo(modulo, args.diretorio, cache)
+            quente = _rodar_processo(modulo, args.diretorio, cache)
+        resultado["radares"][nome] = {"frio": frio, "quente": quente}
+        print(f"{nome}: frio={frio['segundos']:.2f}s quente={quente['segundos']:.2f}s "
+              f"pico={max(frio['pico_rss_mb'], quente['pico_rss_mb']):.0f}MB "
+              f"(imports {quente['rss_import_mb']:.0f}MB)")
+        for e in quente["etapas"]:
+            print(f"    {e['etapa']}: {e['segundos']:.2f}s ({e['reprovados']}/{e['avaliados']} reprovados)")
+
+    saida = args.saida or os.path.join(DIRETORIO_SAIDA, f"{commit}.json")
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultado em {saida}")
+
+def cmd_comparar(args):
+    with open(args.a) as f:
+        a = json.load(f)
+    with open(args.b) as f:
+        b = json.load(f)
+    print(f"{a['commit']} → {b['commit']}")
+    for nome in a["radares"]:
+        if nome not in b["radares"]:
+            continue
+        for modo in ("frio", "quente"):
+            ra, rb = a["radares"][nome][modo], b["radares"][nome][modo]
+            for chave, unidade in (("segundos", "s"), ("pico_rss_mb", "MB"), ("rss_import_mb", "MB")):
+                if chave not in ra or chave not in rb:
+                    # Resultados gravados antes da métrica existir
+                    continue
+                va, vb = ra[chave], rb[chave]
+                delta = (vb / va - 1) * 100 if va else 0.0
+                print(f"  {nome:<3} {modo:<6} {chave:<13} {va:9.2f}{unidade} → {vb:9.2f}{unidade} ({delta:+.1f}%)")
+
+def _corpo(mensagens: list[str]) -> str:
+    # Sem a primeira linha (título com data/hora)
+    return "\n".join("\n".join(m.splitlines()[1:]) for m in mensagens)
+
+def cmd_fatias(args):
+    k = args.k
+    falhas = 0
+    for nome, modulo in RADARES.items():
+        if args.radar and nome not in args.radar:
+            continue
+        with tempfile.TemporaryDirectory() as tmp:
+            # Tempo de parede dos dois lados (inclui subir o processo e importar)
+            inicio = time.perf_counter()
+            unico = _rodar_processo(modulo, args.diretorio, os.path.join(tmp, "unico"))
+            serial = time.perf_counter() - inicio
+
+            # K workers em paralelo, cada um com seu armazém (como runners separados)
+            saida_fatias = os.path.join(tmp, "fatias")
+            inicio = time.perf_counter()
+            workers = [
+                subprocess.Popen([sys.executable, f"{modulo}.py", "--fatia", f"{i}/{k}"],
+                                 env=_ambiente(args.diretorio, os.path.join(tmp, f"cache{i}"),
+                                               RADAR_FATIAS_DIR=saida_fatias,
+                                               RADAR_METRICAS_DIR=os.path.join(tmp, "metricas")),
+                                 cwd=os.path.dirname(os.path.abspath(__file__)),
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+                for i in range(k)
+            ]
+            for i, w in enumerate(workers):
+                _, erro = w.communicate()
+                if w.returncode:
+                    print(f"{nome}: fatia {i}/{k} falhou:\n{erro}")
+            paralelo = time.perf_counter() - inicio
+
+            junta = _rodar_processo(modulo, args.diretorio, os.path.join(tmp, "junta"),
+                                    "--juntar", str(k), RADAR_FATIAS_DIR=saida_fatias)
+
+        igual = _corpo(junta["mensagens"]) == _corpo(unico["mensagens"])
+        falhas += not igual
+        print(f"{nome}: 1 processo={serial:.2f}s  {k} fatias={paralelo:.2f}s "
+              f"+ junção={junta['segundos']:.2f}s  mensagem {'igual' if igual else 'DIFERENTE'}")
+        if not igual:
+            print(f"    1 processo: {_corpo(unico['mensagens'])!r}")
+            print(f"    fatias:     {_corpo(junta['mensagens'])!r}")
+    sys.exit(1 if falhas else 0)
+
+def cmd_backtest(args):
+    falhas = 0
+    resultado = {"commit": _commit(), "fixture": os.path.abspath(args.diretorio), "radares": {}}
+    for nome in RADARES:
+        if args.radar and nome not in args.radar:
+            continue
+        with tempfile.TemporaryDirectory() as cache:
+            inicio = time.perf_counter()
+            saida = subprocess.run([sys.executable, "backtest.py", nome, "--conferir", "--json"],
+                                   env=_ambiente(args.diretorio, cache), capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+            total = time.perf_counter() - inicio
+        r = json.loads(saida.stdout.strip().splitlines()[-1])
+        r["segundos_processo"] = total
+        resultado["radares"][nome] = r
+        divergentes = r["conferencia"]["divergentes"]
+        falhas += bool(divergentes)
+        print(f"{nome}: {r['tickers']} tickers × {r['period']} = {r['barras']:,} barras | "
+              f"dados={r['segundos_dados']:.1f}s regra={r['segundos_regra']:.2f}s "
+              f"({r['barras'] / r['segundos_regra'] / 1e6:.1f}M barras/s) processo={total:.1f}s | "
+              f"última barra {'OK' if not divergentes else f'DIVERGENTE {divergentes}'}")
+
+    saida = args.saida or os.path.join(DIRETORIO_SAIDA, f"backtest-{resultado['commit']}.json")
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultado em {saida}")
+    sys.exit(1 if falhas else 0)
+
+def _importtime(codigo: str, env: dict) -> tuple[dict[str, int], float, str]:
+    """
+    Roda `codigo` com -X importtime. Devolve {módulo de topo: µs cumulativos},
+    o tempo de parede do processo (s) e a saída padrão.
+    """
+    inicio = time.perf_counter()
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], env=env,
+                           capture_output=True, text=True, check=True,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+    parede = time.perf_counter() - inicio
+    modulos = {}
+    for linha in saida.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha.split("|")
+        modulos[nome.strip()] = int(cumulativo)
+    return modulos, parede, saida.stdout
+
+def cmd_partida(args):
+    falhas = 0
+    with tempfile.TemporaryDirectory() as cache:
+        env = dict(os.environ, **ENV_FICTICIO, RADAR_CACHE_DIR=cache)
+        env.pop("RADAR_H1_SEMPRE_VARRER", None)
+
+        # Referência: o que um radar importava antes de decidir qualquer coisa
+        _, parede_completo, _ = _importtime("import pandas, numpy, yfinance, requests", env)
+        print(f"import completo (pandas, numpy, yfinance, requests): processo {parede_completo * 1000:.0f}ms")
+
+        for nome, modulo in RADARES.items():
+            modulos, parede, _ = _importtime(f"import {modulo}", env)
+            ms = modulos[modulo] / 1000
+            pesados = [m for m in MODULOS_PESADOS if m in modulos]
+            ok = ms <= args.orcamento_ms and not pesados
+            falhas += not ok
+            print(f"{nome}: import {ms:.0f}ms (orçamento {args.orcamento_ms:.0f}ms), processo {parede * 1000:.0f}ms"
+                  + (f", carregou {', '.join(pesados)}" if pesados else "") + f"  {'OK' if ok else 'FALHOU'}")
+
+        modulos, parede, saida = _importtime(CODIGO_H1_SEM_BARRA_NOVA, env)
+        pesados = [m for m in MODULOS_PESADOS if m in modulos]
+        ok = "nada a fazer" in saida and not pesados and parede < parede_completo
+        falhas += not ok
+        print(f"h1 sem barra nova: processo {parede * 1000:.0f}ms "
+              f"({parede / parede_completo:.0%} do import completo)"
+              + (f", carregou {', '.join(pesados)}" if pesados else "") + f"  {'OK' if ok else 'FALHOU'}")
+    sys.exit(1 if falhas else 0)
+
+# =======================
+# PROCESSOS (avaliação do S1 em pool)
+# =======================
+
+def _universo_sintetico(diretorio: str, n: int, semente: int = 0) -> list[str]:
+    """N símbolos com 20y de D1 sintético direto no arquivo colunar do armazém."""
+    import numpy as np
+    import pandas as pd
+    from armazem import ArmazemBarras
+    from provedores import _indices_sinteticos, _serie_sintetica
+    indice = _indices_sinteticos(pd.Timestamp.now().normalize())["1d"]
+    rng = np.random.default_rng(semente)
+    simbolos = [f"S{i:05d}" for i in range(n)]
+    armazem = ArmazemBarras(diretorio)
+    # Em lotes: o universo inteiro em float64 não precisa caber na memória de uma vez
+    for i in range(0, n, 500):
+        armazem.salvar_lote("1d", "20y", {sym: _serie_sintetica(rng, indice, rng.uniform(0.01, 0.03))
+                                         for sym in simbolos[i:i + 500]})
+    return simbolos
+
+def cmd_processos(args):
+    import shutil
+    import paralelo
+    import radar_s1
+    falhas = 0
+    with tempfile.TemporaryDirectory() as cache:
+        inicio = time.perf_counter()
+        simbolos = _universo_sintetico(cache, args.n)
+        print(f"Universo sintético: {len(simbolos)} símbolo(s) × 20y D1 ({time.perf_counter() - inicio:.1f}s)")
+        print(f"CPUs: {os.cpu_count()}, pedaço de {paralelo.TAMANHO_PEDACO} símbolo(s)")
+
+        referencia = base = None
+        for processos in args.workers:
+            # Armazém frio dos estados W1/MN: toda rodada recalcula as médias do zero
+            for interval in ("1wk", "1mo"):
+                shutil.rmtree(os.path.join(cache, interval), ignore_errors=True)
+            inicio = time.perf_counter()
+            partes = paralelo.mapear(radar_s1._avaliar_pedaco, simbolos, cache, processos=processos)
+            total = time.perf_counter() - inicio
+            paralelo.encerrar()
+            sinais = ([s for c, _, _ in partes for s in c], [s for _, v, _ in partes for s in v])
+            erros = sum(len(e) for _, _, e in partes)
+            if referencia is None:
+                referencia, base = sinais, total
+            igual = sinais == referencia and not erros
+            falhas += not igual
+            print(f"{processos} processo(s): {total:.1f}s ({len(simbolos) / total:.0f} símbolos/s), "
+                  f"ganho {base / total:.2f}× | {len(sinais[0])} compra(s), {len(sinais[1])} venda(s)"
+                  f"{f', {erros} erro(s)' if erros else ''}  {'igual' if igual else 'DIFERENTE'}")
+    sys.exit(1 if falhas else 0)
+
+# =======================
+# FLUXO (H1 montado de negócios)
+# =======================
+
+def cmd_fluxo(args):
+    import pandas as pd
+    import calendario
+    import radar_h1
+    from armazem import ArmazemBarras
+    from dados import recortar
+    from fluxo import FeedReplay, gerar_replay
+    from provedores import ProvedorFixture, definir_provedor
+    from reamostragem import para_diario
+
+    simbolos = [sym for sym in radar_h1.TICKERS
+                if os.path.exists(os.path.join(args.diretorio, "1h", f"{sym}.parquet"))]
+    completo = {sym: pd.read_parquet(os.path.join(args.diretorio, "1h", f"{sym}.parquet")) for sym in simbolos}
+    datas = sorted({d for df in completo.values() for d in df.index.normalize()})
+    corte = datas[-args.dias]
+    # Barras depois do corte que o calendário reconhece — as mesmas que o replay remonta
+    cortadas = {}
+    for sym, df in completo.items():
+        df = df[df.index >= corte]
+        cortadas[sym] = df[[calendario.abertura_barra(a) == a for a in df.index]]
+
+    falhas = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, "fixture")
+        os.makedirs(os.path.join(fixture, "1h"))
+        for sym, df in completo.items():
+            df[df.index < corte].to_parquet(os.path.join(fixture, "1h", f"{sym}.parquet"))
+        definir_provedor(ProvedorFixture(fixture))
+
+        arquivo = os.path.join(tmp, "negocios.parquet")
+        inicio = time.perf_counter()
+        n = gerar_replay(args.diretorio, simbolos, corte, arquivo, negocios=args.negocios)
+        print(f"Replay: {n:,} negócio(s), {len(simbolos)} símbolo(s), {args.dias} pregão(ões) "
+              f"desde {corte:%d/%m/%Y} ({time.perf_counter() - inicio:.1f}s)")
+
+        inicio = time.perf_counter()
+        fechamentos = list(radar_h1.fechamentos_do_fluxo(
+            FeedReplay(arquivo), simbolos, ArmazemBarras(os.path.join(tmp, "fluxo"), memoria=True)))
+        total = time.perf_counter() - inicio
+
+        # Referência: a regra sobre o histórico da fixture até cada fechamento
+        armazem = ArmazemBarras(os.path.join(tmp, "referencia"), memoria=True)
+        semente = {sym: radar_h1.descartar_barra_aberta(df)
+                   for sym, df in armazem.atualizar(simbolos, period="730d", interval="1h").items()}
+        inicio_d1 = {sym: recortar(para_diario(df), "600d").index[0] for sym, df in semente.items()}
+        for fechamento, avaliados, hits, segundos in fechamentos:
+            horario, diario, esperados = {}, {}, []
+            for sym, df in semente.items():
+                novas = cortadas[sym][cortadas[sym].index < fechamento]
+                horario[sym] = pd.concat([df, novas.astype(df.dtypes.to_dict())])
+                d1 = para_diario(horario[sym])
+                diario[sym] = d1[d1.index >= inicio_d1[sym]]
+                if len(novas) and calendario.fechamento_barra(novas.index[-1]) == fechamento:
+                    esperados.append(sym)
+            esperados = [sym for sym in simbolos if sym in set(esperados)]
+            referencia, _ = radar_h1.avaliar_universo(esperados, historicos={"1h": horario, "1d": diario},
+                                                      armazem=armazem)
+            igual = avaliados == esperados and hits == referencia
+            falhas += not igual
+            print(f"barra até {fechamento:%d/%m %H:%M} UTC: {len(avaliados)} avaliado(s), "
+                  f"sinais {', '.join(hits) or '—'} em {segundos * 1000:.0f}ms  "
+                  f"{'igual' if igual else f'DIFERENTE (regra: {referencia}, {len(esperados)} avaliado(s))'}")
+
+    latencias = [f[3] for f in fechamentos]
+    if latencias:
+        print(f"{len(fechamentos)} fechamento(s) em {total:.1f}s ({n / total:,.0f} negócios/s); "
+              f"barra fechada → sinal: média {sum(latencias) / len(latencias) * 1000:.0f}ms, "
+              f"máx {max(latencias) * 1000:.0f}ms")
+    sys.exit(1 if falhas or not fechamentos else 0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline dos radares")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("fixture", help="gera fixture sintética do universo")
+    p.add_argument("diretorio")
+    p.add_argument("--semente", type=int, default=0)
+    p.set_defaults(func=cmd_fixture)
+
+    p = sub.add_parser("rodar", help="mede main() de cada radar contra a fixture")
+    p.add_argument("diretorio")
+    p.add_argument("--saida")
+    p.add_argument("--radar", action="append", choices=list(RADARES))
+    p.set_defaults(func=cmd_rodar)
+
+    p = sub.add_parser("comparar", help="compara dois resultados")
+    p.add_argument("a")
+    p.add_argument("b")
+    p.set_defaults(func=cmd_comparar)
+
+    p = sub.add_parser("fatias", help="K workers em paralelo + junção contra 1 processo")
+    p.add_argument("diretorio")
+    p.add_argument("-k", type=int, default=4)
+    p.add_argument("--radar", action="append", choices=list(RADARES))
+    p.set_defaults(func=cmd_fatias)
+
+    p = sub.add_parser("backtest", help="tempo do backtest vetorizado sobre a fixture")
+    p.add_argument("diretorio")
+    p.add_argument("--saida")
+    p.add_argument("--radar", action="append", choices=list(RADARES))
+    p.set_defaults(func=cmd_backtest)
+
+    p = sub.add_parser("partida", help="orçamento de import e execução sem nada a fazer")
+    p.add_argument("--orcamento-ms", type=float, default=ORCAMENTO_IMPORT_MS)
+    p.set_defaults(func=cmd_partida)
+
+    p = sub.add_parser("processos", help="avaliação do S1 com 1, 2, 4... processos num universo sintético")
+    p.add_argument("-n", type=int, default=3000)
+    p.add_argument("-w", "--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.set_defaults(func=cmd_processos)
+
+    p = sub.add_parser("fluxo", help="H1 montado de negócios (replay) contra a regra na fixture")
+    p.add_argument("diretorio")
+    p.add_argument("--dias", type=int, default=2)
+    p.add_argument("--negocios", type=int, default=20)
+    p.set_defaults(func=cmd_fluxo)
+
+    p = sub.add_parser("_um")
+    p.add_argument("modulo", choices=list(RADARES.values()))
+    p.add_argument("--juntar", type=int)
+    p.set_defaults(func=cmd_um)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
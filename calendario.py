@@ -0,0 +1,256 @@
+"""
+Calendário de pregões da NYSE: dias de pregão, abertura/fechamento de cada
+sessão (UTC, com horário de verão e meios-pregões) e fechamento das barras
+H1 do Yahoo, que começam na abertura e andam de hora em hora — a última
+barra do dia fecha junto com a sessão (16:00 ET, ou 13:00 ET num
+meio-pregão), não necessariamente uma hora depois de abrir.
+
+As sessões vêm de uma tabela pré-calculada (sessoes_nyse.bin, gerada com
+`python calendario.py gerar`): um par de int16 por dia corrido com os
+minutos UTC de abertura e fechamento, indexado pelo ordinal da data —
+consulta O(1) sem importar o pandas_market_calendars. Só datas fora da
+tabela caem no pandas_market_calendars.
+
+Formato: cabeçalho "<4sHii" (b"NYSE", versão, ordinal do 1º dia, nº de
+dias) + nº de dias × (abertura, fechamento) em int16 little-endian; -1 nos
+dois campos = sem pregão.
+
+Horários saem como datetime UTC com fuso (comparáveis com pd.Timestamp):
+as consultas do calendário não importam o pandas, para que os radares
+decidam "não há nada a fazer" sem pagar o import (ver tardio.py).
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import os
+import struct
+import sys
+import zoneinfo
+from array import array
+
+from tardio import tardio
+
+pd = tardio("pandas")
+
+FUSO_BOLSA = "America/New_York"
+_FUSO = zoneinfo.ZoneInfo(FUSO_BOLSA)
+UTC = datetime.timezone.utc
+
+ARQUIVO_TABELA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessoes_nyse.bin")
+CABECALHO = struct.Struct("<4sHii")
+MAGICO = b"NYSE"
+VERSAO = 1
+
+# Anos cobertos pela tabela gerada por padrão
+ANO_INICIAL = 2015
+ANO_FINAL = 2035
+
+# Duração nominal de cada barra H1
+HORA = datetime.timedelta(hours=1)
+
+# Quantos dias procurar o pregão anterior/seguinte
+MARGEM_DIAS = 15
+
+# =======================
+# TABELA
+# =======================
+
+_TABELA = None
+
+def _carregar_tabela() -> tuple[int, array]:
+    global _TABELA
+    if _TABELA is None:
+        with open(ARQUIVO_TABELA, "rb") as f:
+            magico, versao, base, n = CABECALHO.unpack(f.read(CABECALHO.size))
+            if magico != MAGICO or versao != VERSAO:
+                raise ValueError(f"{ARQUIVO_TABELA}: tabela de sessões inválida")
+            minutos = array("h")
+            minutos.frombytes(f.read(4 * n))
+        if sys.byteorder == "big":
+            minutos.byteswap()
+        _TABELA = (base, minutos)
+    return _TABELA
+
+def _sessao_mcal(dia: datetime.date) -> tuple[int, int] | None:
+    """Fallback para datas fora da tabela (lento: importa o pandas_market_calendars)."""
+    import pandas_market_calendars as mcal
+    agenda = mcal.get_calendar("NYSE").schedule(start_date=dia, end_date=dia)
+    if agenda.empty:
+        return None
+    meia_noite = pd.Timestamp(dia, tz="UTC")
+    abertura, fechamento = agenda.iloc[0]["market_open"], agenda.iloc[0]["market_close"]
+    return (int((abertura - meia_noite).total_seconds() // 60),
+            int((fechamento - meia_noite).total_seconds() // 60))
+
+def _minutos(dia: datetime.date) -> tuple[int, int] | None:
+    """(abertura, fechamento) em minutos UTC depois da meia-noite de `dia`, ou None."""
+    base, minutos = _carregar_tabela()
+    i = dia.toordinal() - base
+    if 0 <= 2 * i < len(minutos):
+        abertura, fechamento = minutos[2 * i], minutos[2 * i + 1]
+        return None if abertura < 0 else (abertura, fechamento)
+    return _sessao_mcal(dia)
+
+def gerar_tabela(ano_inicial: int = ANO_INICIAL, ano_final: int = ANO_FINAL,
+                 arquivo: str = ARQUIVO_TABELA):
+    """Monta a tabela com o pandas_market_calendars (só na geração)."""
+    import pandas_market_calendars as mcal
+    inicio = datetime.date(ano_inicial, 1, 1)
+    fim = datetime.date(ano_final, 12, 31)
+    agenda = mcal.get_calendar("NYSE").schedule(start_date=inicio, end_date=fim)
+
+    n = fim.toordinal() - inicio.toordinal() + 1
+    minutos = array("h", [-1] * (2 * n))
+    for dia, linha in agenda.iterrows():
+        i = dia.date().toordinal() - inicio.toordinal()
+        meia_noite = pd.Timestamp(dia.date(), tz="UTC")
+        minutos[2 * i] = int((linha["market_open"] - meia_noite).total_seconds() // 60)
+        minutos[2 * i + 1] = int((linha["market_close"] - meia_noite).total_seconds() // 60)
+    if sys.byteorder == "big":
+        minutos.byteswap()
+
+    tmp = arquivo + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(CABECALHO.pack(MAGICO, VERSAO, inicio.toordinal(), n))
+        f.write(minutos.tobytes())
+    os.replace(tmp, arquivo)
+    print(f"{arquivo}: {len(agenda)} pregões de {inicio} a {fim} ({os.path.getsize(arquivo)} bytes)")
+
+# =======================
+# SESSÕES
+# =======================
+
+def _agora() -> datetime.datetime:
+    return datetime.datetime.now(UTC)
+
+def _datetime(ts) -> datetime.datetime:
+    # datetime e pd.Timestamp passam direto; o resto (str, datetime64) passa pelo pandas
+    if isinstance(ts, datetime.datetime):
+        return ts
+    return pd.Timestamp(ts).to_pydatetime()
+
+def _dia_bolsa(ts) -> datetime.date:
+    """
+    Data do pregão a que `ts` pertence no fuso da bolsa.
+    Datas sem fuso já são tomadas como datas da bolsa.
+    """
+    if isinstance(ts, datetime.date) and not isinstance(ts, datetime.datetime):
+        return ts
+    ts = _datetime(ts)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(_FUSO)
+    return ts.date()
+
+def _sessao_do_dia(dia: datetime.date) -> tuple[datetime.datetime, datetime.datetime] | None:
+    m = _minutos(dia)
+    if m is None:
+        return None
+    meia_noite = datetime.datetime.combine(dia, datetime.time(), tzinfo=UTC)
+    return meia_noite + datetime.timedelta(minutes=m[0]), meia_noite + datetime.timedelta(minutes=m[1])
+
+def sessao(data) -> tuple[datetime.datetime, datetime.datetime] | None:
+    """(abertura, fechamento) em UTC do pregão do dia, ou None se não houver pregão."""
+    return _sessao_do_dia(_dia_bolsa(data))
+
+def dia_de_pregao(data) -> bool:
+    return _minutos(_dia_bolsa(data)) is not None
+
+def fechamento_sessao(data) -> datetime.datetime | None:
+    """Fechamento (UTC) do pregão do dia — 21:00/20:00 UTC, ou mais cedo num meio-pregão."""
+    s = sessao(data)
+    return None if s is None else s[1]
+
+def mercado_fechado(agora: datetime.datetime | None = None) -> bool:
+    """True se não há pregão hoje ou se o pregão de hoje já encerrou."""
+    agora = _agora() if agora is None else agora
+    fechamento = fechamento_sessao(agora)
+    return fechamento is None or agora >= fechamento
+
+def proximo_fechamento_sessao(agora: datetime.datetime | None = None) -> datetime.datetime:
+    """Fechamento (UTC) do próximo pregão a encerrar estritamente depois de `agora`."""
+    agora = _agora() if agora is None else agora
+    dia = _dia_bolsa(agora)
+    for _ in range(MARGEM_DIAS):
+        s = _sessao_do_dia(dia)
+        if s is not None and s[1] > agora:
+            return s[1]
+        dia += datetime.timedelta(days=1)
+    raise RuntimeError(f"nenhum pregão nos {MARGEM_DIAS} dias seguintes a {agora}")
+
+# =======================
+# BARRAS H1
+# =======================
+
+def fechamento_barra(inicio_barra) -> datetime.datetime:
+    """Horário (UTC) em que a barra H1 iniciada em `inicio_barra` fecha."""
+    inicio = _datetime(inicio_barra)
+    inicio = inicio.replace(tzinfo=UTC) if inicio.tzinfo is None else inicio.astimezone(UTC)
+    fechamento = fechamento_sessao(inicio)
+    if fechamento is None:
+        return inicio + HORA
+    return min(inicio + HORA, fechamento)
+
+def abertura_barra(ts) -> datetime.datetime | None:
+    """Início (UTC) da barra H1 do pregão regular que contém `ts`, ou None fora do pregão."""
+    ts = _datetime(ts)
+    ts = ts.replace(tzinfo=UTC) if ts.tzinfo is None else ts.astimezone(UTC)
+    s = sessao(ts)
+    if s is None or not s[0] <= ts < s[1]:
+        return None
+    return s[0] + HORA * ((ts - s[0]) // HORA)
+
+def barra_fechada(inicio_barra, agora: datetime.datetime | None = None) -> bool:
+    agora = _agora() if agora is None else agora
+    return fechamento_barra(inicio_barra) <= agora
+
+def fechamentos_do_dia(data) -> list[datetime.datetime]:
+    """Fechamentos (UTC) de todas as barras H1 do pregão do dia."""
+    s = sessao(data)
+    if s is None:
+        return []
+    abertura, fechamento = s
+    fechamentos = []
+    t = abertura
+    while t < fechamento:
+        fechamentos.append(min(t + HORA, fechamento))
+        t += HORA
+    return fechamentos
+
+def proximo_fechamento(agora: datetime.datetime | None = None) -> datetime.datetime:
+    """Próximo fechamento de barra H1 estritamente depois de `agora`."""
+    agora = _agora() if agora is None else agora
+    dia = _dia_bolsa(agora)
+    for _ in range(MARGEM_DIAS):
+        for f in fechamentos_do_dia(dia):
+            if f > agora:
+                return f
+        dia += datetime.timedelta(days=1)
+    raise RuntimeError(f"nenhum pregão nos {MARGEM_DIAS} dias seguintes a {agora}")
+
+def ultimo_fechamento(agora: datetime.datetime | None = None) -> datetime.datetime | None:
+    """Fechamento de barra H1 mais recente até `agora` (inclusive)."""
+    agora = _agora() if agora is None else agora
+    dia = _dia_bolsa(agora)
+    for _ in range(MARGEM_DIAS):
+        passados = [f for f in fechamentos_do_dia(dia) if f <= agora]
+        if passados:
+            return passados[-1]
+        dia -= datetime.timedelta(days=1)
+    return None
+
+# =======================
+# EXECUÇÃO DIRETA
+# =======================
+
+def main():
+    parser = argparse.ArgumentParser(description="Tabela de sessões da NYSE")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("gerar", help="regera sessoes_nyse.bin com o pandas_market_calendars")
+    p.add_argument("--inicio", type=int, default=ANO_INICIAL)
+    p.add_argument("--fim", type=int, default=ANO_FINAL)
+    args = parser.parse_args()
+    gerar_tabela(args.inicio, args.fim)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Formato colunar compacto das barras do armazém, lido por memory-map.
+
+Um arquivo por (interval, janela) com o universo inteiro: só as colunas
+que os radares usam (OHLCV) em float32 contíguo, os horários em int64 e um
+índice com o trecho de cada símbolo. A leitura é um np.memmap somente
+leitura: o DataFrame de um símbolo é uma vista sobre o arquivo (nenhuma
+cópia), e a triagem, que lê as últimas barras, só toca as páginas do fim
+de cada trecho. O sistema operacional compartilha as páginas entre
+processos e as descarta sob pressão de memória.
+
+float32 guarda ~7 dígitos significativos: sobra para preço (a conferência
+de reajuste do armazém usa 1e-4) e para volume.
+
+Formato: cabeçalho "<4sHIQ" (b"RBAR", versão, tamanho do JSON, nº total de
+linhas) + JSON {"colunas", "fuso", "simbolos": {sym: [início, n]}} +
+horários int64 (ns UTC) + uma coluna float32 por vez; cada bloco começa
+num múltiplo de 64 bytes. O arquivo é sempre regravado inteiro num
+temporário e trocado com os.replace — quem já tem o mapa aberto continua
+lendo a versão anterior.
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+
+from tardio import tardio
+
+np = tardio("numpy")
+pd = tardio("pandas")
+
+CABECALHO = struct.Struct("<4sHIQ")
+MAGICO = b"RBAR"
+VERSAO = 1
+ALINHAMENTO = 64
+
+def _alinhar(n: int) -> int:
+    return -(-n // ALINHAMENTO) * ALINHAMENTO
+
+class BarrasColunares:
+    """Vista somente leitura de um arquivo colunar."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        with open(caminho, "rb") as f:
+            magico, versao, tamanho_json, n = CABECALHO.unpack(f.read(CABECALHO.size))
+            if magico != MAGICO or versao != VERSAO:
+                raise ValueError(f"{caminho}: arquivo colunar inválido")
+            meta = json.loads(f.read(tamanho_json))
+        self.colunas = meta["colunas"]
+        self.fuso = meta["fuso"]
+        self.simbolos = {sym: tuple(t) for sym, t in meta["simbolos"].items()}
+        self.linhas = n
+
+        mapa = np.memmap(caminho, dtype=np.uint8, mode="r")
+        pos = _alinhar(CABECALHO.size + tamanho_json)
+        self.ts = mapa[pos:pos + 8 * n].view("<i8")
+        pos = _alinhar(pos + 8 * n)
+        self.dados = {}
+        for col in self.colunas:
+            self.dados[col] = mapa[pos:pos + 4 * n].view("<f4")
+            pos = _alinhar(pos + 4 * n)
+
+    @classmethod
+    def abrir(cls, caminho: str) -> "BarrasColunares | None":
+        """O arquivo mapeado, ou None se não existir ou estiver ilegível."""
+        if not os.path.exists(caminho):
+            return None
+        try:
+            return cls(caminho)
+        except Exception as e:
+            print(f"  ⚠️  {caminho} ilegível, ignorando: {e}")
+            return None
+
+    def __contains__(self, sym: str) -> bool:
+        return sym in self.simbolos
+
+    def barras(self, sym: str) -> int:
+        return self.simbolos[sym][1] if sym in self.simbolos else 0
+
+    def colunas_de(self, sym: str) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Horários (ns UTC) e {coluna: float32} do símbolo — vistas sobre o mapa."""
+        inicio, n = self.simbolos[sym]
+        fim = inicio + n
+        return self.ts[inicio:fim], {col: v[inicio:fim] for col, v in self.dados.items()}
+
+    def dataframe(self, sym: str) -> pd.DataFrame | None:
+        """DataFrame do símbolo sem cópia (colunas float32 somente leitura)."""
+        if sym not in self.simbolos:
+            return None
+        ts, colunas = self.colunas_de(sym)
+        indice = pd.DatetimeIndex(ts.view("M8[ns]"))
+        if self.fuso is not None:
+            indice = indice.tz_localize("UTC").tz_convert(self.fuso)
+        return pd.DataFrame(colunas, index=indice, copy=False)
+
+def _horarios(indice: pd.DatetimeIndex) -> np.ndarray:
+    if indice.tz is not None:
+        indice = indice.tz_convert("UTC")
+    return indice.as_unit("ns").asi8
+
+def gravar(caminho: str, historicos: dict[str, pd.DataFrame], colunas: list[str], fuso: str | None):
+    """
+    Grava `historicos` ({sym: DataFrame}) num arquivo colunar novo. Com
+    `fuso`, os índices são guardados em UTC e devolvidos nesse fuso; com
+    None, ficam sem fuso. Colunas ausentes num símbolo viram NaN;
+    DataFrames vazios ou None são ignorados.
+    """
+    historicos = {sym: df for sym, df in historicos.items() if df is not None and len(df)}
+    simbolos, inicio = {}, 0
+    for sym, df in historicos.items():
+        simbolos[sym] = [inicio, len(df)]
+        inicio += len(df)
+    n = inicio
+
+    meta = json.dumps({"colunas": colunas, "fuso": fuso, "simbolos": simbolos}).encode()
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = caminho + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(CABECALHO.pack(MAGICO, VERSAO, len(meta), n))
+        f.write(meta)
+
+        def bloco(partes, dtype):
+            f.write(b"\0" * (_alinhar(f.tell()) - f.tell()))
+            for p in partes:
+                f.write(np.ascontiguousarray(p, dtype=dtype).tobytes())
+
+        bloco([_horarios(df.index) for df in historicos.values()], "<i8")
+        for col in colunas:
+            bloco([df[col].to_numpy(dtype=np.float32) if col in df.columns
+                   else np.full(len(df), np.nan, dtype=np.float32) for df in historicos.values()], "<f4")
+    os.replace(tmp, caminho)
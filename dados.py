@@ -0,0 +1,251 @@
+"""
+Camada de download de histórico compartilhada pelos radares.
+
+Em vez de uma chamada `yf.Ticker(sym).history` por símbolo, cada timeframe
+do universo inteiro é baixado em poucos lotes via `yf.download` e devolvido
+como um dicionário {símbolo: DataFrame}. Só os símbolos que falharem no
+lote são baixados de novo individualmente. Lotes e fallbacks passam pelo
+executor de buscas (concorrência limitada, limite de taxa e retry).
+
+Todas as chamadas usam uma sessão HTTP só do processo (conexões TLS e
+cookie/crumb do Yahoo reaproveitados entre lotes e símbolos), e cada
+resposta fica no cache em disco de respostas.py até expirar — lotes já
+no cache nem entram no executor (não gastam ficha do limite de taxa).
+"""
+from __future__ import annotations
+
+import threading
+
+from executor import TIMEOUT_REQUISICAO, detalhe_buscas, executar_buscas, resumo_buscas
+from metricas import METRICAS
+from respostas import RESPOSTAS, chave
+from saude import SAUDE
+from tardio import tardio
+
+pd = tardio("pandas")
+yf = tardio("yfinance")
+curl = tardio("curl_cffi.requests")
+
+# Quantos símbolos vão em cada chamada agrupada do yf.download
+TAMANHO_LOTE = 100
+
+# Lotes simultâneos — cada yf.download já abre suas próprias threads por símbolo
+WORKERS_LOTE = 2
+
+# Fuso da bolsa — mesmo fuso que o Ticker.history devolve no índice
+FUSO_BOLSA = "America/New_York"
+
+# =======================
+# SESSÃO
+# =======================
+
+_SESSAO = None
+_TRAVA_SESSAO = threading.Lock()
+
+def sessao():
+    """
+    Sessão HTTP do processo para o Yahoo, com pool de conexões. É a mesma
+    sessão curl_cffi (com impersonação de navegador) que o yfinance criaria,
+    mas uma só para lotes e fallbacks, criada no primeiro uso.
+    """
+    global _SESSAO
+    with _TRAVA_SESSAO:
+        if _SESSAO is None:
+            _SESSAO = curl.Session(impersonate="chrome")
+        return _SESSAO
+
+# =======================
+# HELPERS
+# =======================
+
+def inicio_period(period: str, fim: pd.Timestamp) -> pd.Timestamp:
+    """Converte um `period` do Yahoo ("730d", "7y", "6mo") no timestamp inicial."""
+    if period.endswith("mo"):
+        return fim - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith("y"):
+        return fim - pd.DateOffset(years=int(period[:-1]))
+    if period.endswith("d"):
+        return fim - pd.Timedelta(days=int(period[:-1]))
+    raise ValueError(f"period não suportado: {period}")
+
+def recortar(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Mantém só a janela `period`, contada para trás a partir da última barra (sem cópia)."""
+    return df.iloc[df.index.searchsorted(inicio_period(period, df.index[-1])):]
+
+def _normalizar(df: pd.DataFrame) -> pd.DataFrame | None:
+    """Remove linhas vazias e coloca o índice no fuso da bolsa."""
+    if df is None:
+        return None
+    df = df.dropna(how="all")
+    if df.empty:
+        return None
+    if df.index.tz is not None:
+        df.index = df.index.tz_convert(FUSO_BOLSA)
+    return df
+
+def _separar_lote(df: pd.DataFrame, lote: list[str]) -> dict[str, pd.DataFrame]:
+    """Quebra o DataFrame multi-ticker do yf.download em um DataFrame por símbolo."""
+    resultado = {}
+    if df is None or df.empty:
+        return resultado
+
+    multi = isinstance(df.columns, pd.MultiIndex)
+    for sym in lote:
+        if multi:
+            if sym not in df.columns.get_level_values(0):
+                continue
+            parte = df[sym].copy()
+        elif len(lote) == 1:
+            parte = df.copy()
+        else:
+            continue
+        parte = _normalizar(parte)
+        if parte is not None:
+            resultado[sym] = parte
+    return resultado
+
+def _janela(period: str | None, start: str | None) -> dict:
+    """Argumentos de janela do Yahoo: `start` (download incremental) ou `period`."""
+    return {"start": start} if start is not None else {"period": period}
+
+def _chave_lote(lote, period: str | None, interval: str, start: str | None) -> str:
+    return chave("download", lote, interval, auto_adjust=True, **_janela(period, start))
+
+def _chave_simbolo(sym: str, period: str | None, interval: str, start: str | None) -> str:
+    return chave("history", [sym], interval, auto_adjust=True, **_janela(period, start))
+
+def baixar_lote(lote: list[str], period: str | None, interval: str,
+                start: str | None = None) -> dict[str, pd.DataFrame]:
+    """
+    Baixa um lote de símbolos em uma única requisição agrupada. Um lote que
+    volta inteiro vazio levanta exceção para o executor tentar de novo
+    (costuma ser limite de taxa do Yahoo, não símbolos inválidos).
+    """
+    df = yf.download(
+        tickers=lote,
+        interval=interval,
+        **_janela(period, start),
+        auto_adjust=True,
+        group_by="ticker",
+        ignore_tz=False,
+        threads=True,
+        progress=False,
+        timeout=TIMEOUT_REQUISICAO,
+        session=sessao(),
+    )
+    resultado = _separar_lote(df, lote)
+    if not resultado:
+        raise RuntimeError(f"lote {interval} voltou vazio")
+    RESPOSTAS.gravar(_chave_lote(lote, period, interval, start), interval, df)
+    return resultado
+
+def _baixar_simbolo(sym: str, period: str | None, interval: str,
+                    start: str | None = None) -> pd.DataFrame | None:
+    """`Ticker.history` de um símbolo; exceções sobem para o executor repetir."""
+    df = yf.Ticker(sym, session=sessao()).history(interval=interval, auto_adjust=True,
+                                                  timeout=TIMEOUT_REQUISICAO, **_janela(period, start))
+    RESPOSTAS.gravar(_chave_simbolo(sym, period, interval, start), interval, df)
+    return _normalizar(df)
+
+def baixar_individual(sym: str, period: str | None, interval: str,
+                      start: str | None = None) -> pd.DataFrame | None:
+    """Fallback por símbolo — o mesmo `Ticker.history` usado antes do download em lote."""
+    try:
+        return _baixar_simbolo(sym, period, interval, start)
+    except Exception as e:
+        print(f"  ⚠️  {sym} ({interval}): {e}")
+        return None
+
+def _contar_buscas(resultados):
+    """Requisições ao Yahoo (cada tentativa conta), falhas, barras e bytes recebidos."""
+    METRICAS.contar("yahoo.requisicoes", sum(r.tentativas for r in resultados))
+    METRICAS.contar("yahoo.falhas", sum(not r.ok for r in resultados))
+    for r in resultados:
+        if not r.ok or r.valor is None:
+            continue
+        frames = r.valor.values() if isinstance(r.valor, dict) else [r.valor]
+        for df in frames:
+            METRICAS.contar("yahoo.barras", len(df))
+            # O yfinance não expõe o tamanho da resposta HTTP; conta o volume já decodificado
+            METRICAS.contar("yahoo.bytes", int(df.memory_usage(index=True).sum()))
+
+# =======================
+# API
+# =======================
+
+def baixar_historico(tickers: list[str], period: str | None, interval: str,
+                     tamanho_lote: int = TAMANHO_LOTE,
+                     start: str | None = None) -> dict[str, pd.DataFrame]:
+    """
+    Baixa `period`/`interval` para todo o universo em lotes de `tamanho_lote`.
+    Com `start`, baixa só a partir dessa data (usado pelo armazém incremental).
+    Símbolos que vierem vazios (ou cujo lote inteiro falhar) são baixados
+    individualmente. Símbolos que falharem nos dois caminhos ficam de fora
+    do dicionário retornado.
+    """
+    historicos = {}
+    lotes = [tuple(tickers[i:i + tamanho_lote]) for i in range(0, len(tickers), tamanho_lote)]
+
+    # Lotes com resposta válida no cache não vão ao Yahoo
+    guardados = 0
+    a_baixar = []
+    for lote in lotes:
+        df = RESPOSTAS.ler(_chave_lote(lote, period, interval, start))
+        if df is None:
+            a_baixar.append(lote)
+        else:
+            historicos.update(_separar_lote(df, list(lote)))
+            guardados += 1
+    METRICAS.cache(f"respostas.{interval}", guardados, len(a_baixar))
+    if guardados:
+        print(f"  📦 {interval}: {guardados} de {len(lotes)} lote(s) do cache de respostas")
+
+    resultados = executar_buscas(
+        a_baixar, lambda lote: baixar_lote(list(lote), period, interval, start=start), workers=WORKERS_LOTE
+    )
+    _contar_buscas(resultados)
+    for r in resultados:
+        if r.ok:
+            historicos.update(r.valor)
+        else:
+            print(f"  ⚠️  lote {interval} {r.item[0]}..{r.item[-1]}: {r.erro}")
+
+    faltando = [sym for sym in tickers if sym not in historicos]
+    guardados = 0
+    for sym in faltando:
+        df = _normalizar(RESPOSTAS.ler(_chave_simbolo(sym, period, interval, start)))
+        if df is not None:
+            historicos[sym] = df
+            guardados += 1
+    if faltando:
+        METRICAS.cache(f"respostas.{interval}", guardados, len(faltando) - guardados)
+    faltando = [sym for sym in faltando if sym not in historicos]
+    if faltando:
+        print(f"  ↻ {interval}: {len(faltando)} símbolo(s) fora do lote, baixando individualmente")
+        resultados = executar_buscas(faltando, lambda sym: _baixar_simbolo(sym, period, interval, start))
+        _contar_buscas(resultados)
+        for r in resultados:
+            METRICAS.registrar_tempo(f"busca.{interval}.simbolo", r.latencia, sym=r.item)
+            if r.ok and r.valor is not None:
+                historicos[r.item] = r.valor
+            elif not r.ok:
+                SAUDE.anotar_erro(r.item, r.erro)
+        print(resumo_buscas(resultados, f"fallback {interval}"))
+        for linha in detalhe_buscas(resultados):
+            print(linha)
+    return historicos
+
+def historico_simbolo(sym: str, period: str, interval: str,
+                      historicos: dict | None = None) -> pd.DataFrame | None:
+    """
+    Visão por símbolo usada pelos check_symbol.
+    Se `historicos` ({interval: {sym: df}}) já tiver o timeframe baixado em
+    lote, devolve uma cópia do DataFrame do símbolo (os checks adicionam
+    colunas de médias); senão busca só este símbolo no provedor de dados.
+    """
+    if historicos is not None and interval in historicos:
+        df = historicos[interval].get(sym)
+        return None if df is None else df.copy()
+    # Import tardio: provedores depende deste módulo
+    from provedores import buscar_historico
+    return buscar_historico([sym], period=period, interval=interval).get(sym)
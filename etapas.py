@@ -0,0 +1,71 @@
+"""
+Pipeline de avaliação em etapas, da mais barata para a mais cara.
+
+Cada etapa declara de quais dados precisa (chaves de `fontes`, ex.: "curto"
+para as últimas barras, "completo" para o histórico longo). Os dados de uma
+fonte só são carregados quando a primeira etapa que precisa deles roda, e
+só para os símbolos que sobreviveram às etapas anteriores — um ticker
+reprovado no padrão das últimas barras nunca dispara o download longo.
+"""
+import time
+
+from metricas import METRICAS
+
+class Etapa:
+    def __init__(self, nome: str, requer: list[str], avaliar):
+        """
+        `avaliar(simbolos, dados)` recebe os símbolos ainda vivos e o
+        dicionário {fonte: dados carregados} e devolve um booleano por símbolo.
+        """
+        self.nome = nome
+        self.requer = requer
+        self.avaliar = avaliar
+
+def executar_etapas(simbolos: list[str], etapas: list[Etapa], fontes: dict,
+                    dados: dict | None = None) -> tuple[list[str], list[dict]]:
+    """
+    Roda as etapas em ordem. `fontes` mapeia cada chave de dado para uma
+    função `carregar(simbolos)`. Devolve os aprovados (na ordem recebida) e
+    um relatório com quantos símbolos cada etapa avaliou e reprovou e quanto
+    tempo levou (carga dos dados + avaliação).
+    `dados` recebe as fontes já carregadas (e é preenchido com as novas) —
+    permite encadear duas chamadas sem baixar de novo, desde que os símbolos
+    da segunda estejam entre os da primeira.
+    """
+    vivos = list(simbolos)
+    dados = {} if dados is None else dados
+    relatorio = []
+    for etapa in etapas:
+        inicio = time.perf_counter()
+        if vivos:
+            for fonte in etapa.requer:
+                if fonte not in dados:
+                    dados[fonte] = fontes[fonte](vivos)
+            aprovados = etapa.avaliar(vivos, dados)
+            novos = [sym for sym, ok in zip(vivos, aprovados) if ok]
+        else:
+            novos = []
+        METRICAS.registrar_tempo(f"etapa.{etapa.nome}", time.perf_counter() - inicio)
+        relatorio.append({
+            "etapa": etapa.nome,
+            "avaliados": len(vivos),
+            "reprovados": len(vivos) - len(novos),
+            "segundos": time.perf_counter() - inicio,
+        })
+        vivos = novos
+    return vivos, relatorio
+
+def resumo_etapas(relatorio: list[dict]) -> str:
+    """Uma linha para o log: reprovados em cada etapa."""
+    partes = [f"{r['etapa']}={r['reprovados']}/{r['avaliados']} ({r['segundos']:.1f}s)" for r in relatorio]
+    return "Reprovados por etapa: " + ", ".join(partes)
+
+def somar_relatorios(relatorios: list[list[dict]]) -> list[dict]:
+    """Junta os relatórios de várias execuções (ex.: blocos), somando por etapa."""
+    total = {}
+    for relatorio in relatorios:
+        for r in relatorio:
+            t = total.setdefault(r["etapa"], {"etapa": r["etapa"], "avaliados": 0, "reprovados": 0, "segundos": 0.0})
+            for chave in ("avaliados", "reprovados", "segundos"):
+                t[chave] += r[chave]
+    return list(total.values())
@@ -0,0 +1,129 @@
+"""
+Executor de buscas concorrentes com limite de taxa, retry e backoff.
+
+As chamadas de rede (lotes do yf.download, fallback por símbolo, cotações)
+passam por um pool de threads de tamanho fixo. Um token bucket compartilhado
+limita quantas requisições por segundo saem para o Yahoo, e cada busca que
+levanta exceção é repetida com backoff exponencial + jitter (enquanto houver
+prazo, ver prazo.py). Os resultados
+voltam na mesma ordem dos itens recebidos, com latência e número de
+tentativas de cada um.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import prazo
+
+# Buscas simultâneas
+WORKERS = int(os.environ.get("RADAR_WORKERS", "8"))
+
+# Token bucket: requisições por segundo e rajada máxima
+TAXA_POR_SEGUNDO = float(os.environ.get("RADAR_TAXA", "5"))
+RAJADA = 10
+
+# Timeout (s) repassado a cada requisição do yfinance
+TIMEOUT_REQUISICAO = 20
+
+# Tentativas por busca e base do backoff exponencial (s)
+TENTATIVAS   = 3
+BACKOFF_BASE = 1.0
+
+# =======================
+# LIMITE DE TAXA
+# =======================
+
+class LimitadorTaxa:
+    """Token bucket thread-safe: `adquirir()` bloqueia até haver uma ficha."""
+
+    def __init__(self, taxa: float, capacidade: int):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.fichas = float(capacidade)
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def adquirir(self):
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.fichas = min(self.capacidade, self.fichas + (agora - self.ultimo) * self.taxa)
+                self.ultimo = agora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                espera = (1 - self.fichas) / self.taxa
+            time.sleep(espera)
+
+# Um limitador só para o processo inteiro — todas as buscas dividem a mesma taxa
+LIMITADOR = LimitadorTaxa(TAXA_POR_SEGUNDO, RAJADA)
+
+# =======================
+# EXECUÇÃO
+# =======================
+
+class Resultado:
+    def __init__(self, item, valor, erro, latencia: float, tentativas: int):
+        self.item = item
+        self.valor = valor
+        self.erro = erro
+        self.latencia = latencia
+        self.tentativas = tentativas
+
+    @property
+    def ok(self) -> bool:
+        return self.erro is None
+
+def _com_retry(funcao, item, limitador: LimitadorTaxa, tentativas: int, backoff: float) -> Resultado:
+    inicio = time.monotonic()
+    erro = None
+    for n in range(1, tentativas + 1):
+        limitador.adquirir()
+        try:
+            valor = funcao(item)
+            return Resultado(item, valor, None, time.monotonic() - inicio, n)
+        except Exception as e:
+            erro = e
+            # Com o prazo da execução esgotado, não agenda mais retries
+            if n == tentativas or prazo.esgotado():
+                break
+            time.sleep(backoff * 2 ** (n - 1) + random.uniform(0, backoff))
+    return Resultado(item, None, erro, time.monotonic() - inicio, n)
+
+def executar_buscas(itens: list, funcao, workers: int = WORKERS,
+                    limitador: LimitadorTaxa = LIMITADOR,
+                    tentativas: int = TENTATIVAS, backoff: float = BACKOFF_BASE) -> list[Resultado]:
+    """
+    Aplica `funcao(item)` a cada item no pool, respeitando o limite de taxa.
+    Exceções disparam retry; depois da última tentativa o Resultado sai com
+    `erro` preenchido. A lista devolvida segue a ordem de `itens`.
+    """
+    if not itens:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(itens)))) as pool:
+        futuros = [pool.submit(_com_retry, funcao, item, limitador, tentativas, backoff) for item in itens]
+        return [f.result() for f in futuros]
+
+def resumo_buscas(resultados: list[Resultado], rotulo: str) -> str:
+    """Uma linha para o log: latência (p50/p95/máx), retries e falhas."""
+    if not resultados:
+        return f"  ⏱  {rotulo}: nenhuma busca"
+    lat = sorted(r.latencia for r in resultados)
+    p50 = lat[len(lat) // 2]
+    p95 = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+    retries = sum(r.tentativas - 1 for r in resultados)
+    falhas = sum(not r.ok for r in resultados)
+    return (
+        f"  ⏱  {rotulo}: {len(resultados)} busca(s), p50={p50:.2f}s p95={p95:.2f}s "
+        f"máx={lat[-1]:.2f}s, {retries} retry(s), {falhas} falha(s)"
+    )
+
+def detalhe_buscas(resultados: list[Resultado]) -> list[str]:
+    """Linhas por item que precisou de retry ou falhou, para o log de debug."""
+    return [
+        f"    [{r.item}] {r.latencia:.2f}s, {r.tentativas} tentativa(s)"
+        + (f" — {type(r.erro).__name__}: {r.erro}" if r.erro else "")
+        for r in resultados if r.tentativas > 1 or not r.ok
+    ]
@@ -0,0 +1,212 @@
+"""
+Divisão horizontal do universo em K fatias, avaliadas em paralelo por
+processos (ou runners) independentes, e junção dos resultados num envio só.
+
+    python radar.py --fatia 0/4     # worker: avalia só a fatia 0 de 4 e grava
+    python radar.py --fatia 1/4     #   fatias/d1-1de4.json (sem Telegram)
+    ...
+    python radar.py --juntar 4      # junta as 4 fatias e envia uma mensagem
+
+Cada símbolo cai sempre na mesma fatia (crc32 do ticker módulo K): a
+divisão não depende da ordem de TICKERS, e incluir ou remover um ticker não
+embaralha os demais. Num workflow, os workers são um `strategy.matrix` que
+sobe fatias/ como artefato e o passo de junção é um job com `needs:` que
+baixa os artefatos para RADAR_FATIAS_DIR.
+
+Fatia sem arquivo na junção (worker caiu ou estourou o timeout) não trava
+o envio: a mensagem sai com o que chegou e lista os tickers sem resultado.
+
+Cada resultado leva o id da execução (GITHUB_RUN_ID, o mesmo nos workers e
+na junção de um workflow, ou RADAR_EXECUCAO_ID). Na junção, arquivo de
+outra execução — sobra de uma rodada anterior em fatias/ — conta como fatia
+sem resultado. Sem id (rodando à mão), vale o horário: arquivo gerado mais
+de IDADE_MAXIMA antes do mais novo do conjunto também fica de fora.
+"""
+import argparse
+import datetime
+import json
+import os
+import time
+import zlib
+
+from etapas import somar_relatorios
+from metricas import METRICAS
+
+# Onde os workers gravam e a junção lê os resultados das fatias
+DIRETORIO_FATIAS = os.environ.get("RADAR_FATIAS_DIR", "fatias")
+
+# Diferença máxima entre o resultado mais novo e os demais na junção sem id de execução
+IDADE_MAXIMA = datetime.timedelta(minutes=float(os.environ.get("RADAR_FATIAS_IDADE_MINUTOS", "60")))
+
+# Status de um ticker sem sinal, sem avaliação e pulado (saude.py) no resultado da fatia
+SEM_SINAL = "sem_sinal"
+PENDENTE = "pendente"
+QUARENTENA = "quarentena"
+
+# =======================
+# DIVISÃO
+# =======================
+
+class Fatia:
+    def __init__(self, indice: int, total: int):
+        if total < 1 or not 0 <= indice < total:
+            raise ValueError(f"fatia inválida: {indice}/{total}")
+        self.indice = indice
+        self.total = total
+
+    @classmethod
+    def ler(cls, texto: str) -> "Fatia":
+        """"i/K" (índice a partir de 0) — formato de --fatia."""
+        try:
+            indice, total = (int(p) for p in texto.split("/"))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"fatia deve ser i/K, ex.: 0/4 (recebido {texto!r})")
+        try:
+            return cls(indice, total)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+
+    @property
+    def nome(self) -> str:
+        return f"{self.indice}de{self.total}"
+
+    def __repr__(self):
+        return f"{self.indice}/{self.total}"
+
+def fatia_do_simbolo(sym: str, total: int) -> int:
+    # crc32 e não hash(): hash de str muda a cada processo (PYTHONHASHSEED)
+    return zlib.crc32(sym.encode()) % total
+
+def dividir(simbolos: list[str], fatia: Fatia) -> list[str]:
+    """Símbolos da fatia, na ordem recebida."""
+    return [sym for sym in simbolos if fatia_do_simbolo(sym, fatia.total) == fatia.indice]
+
+def argumentos(descricao: str) -> argparse.ArgumentParser:
+    """Parser com --fatia/--juntar, comum aos três radares."""
+    parser = argparse.ArgumentParser(description=descricao)
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument("--fatia", type=Fatia.ler, metavar="I/K",
+                      help="avalia só a fatia I de K e grava o resultado, sem enviar ao Telegram")
+    modo.add_argument("--juntar", type=int, metavar="K",
+                      help="junta os resultados das K fatias e envia uma mensagem só")
+    return parser
+
+# =======================
+# RESULTADOS
+# =======================
+
+def _caminho(radar: str, fatia: Fatia, diretorio: str) -> str:
+    return os.path.join(diretorio, f"{radar}-{fatia.nome}.json")
+
+def id_execucao() -> str | None:
+    """Id da execução que os workers gravam e a junção confere (None fora do Actions)."""
+    return os.environ.get("RADAR_EXECUCAO_ID") or os.environ.get("GITHUB_RUN_ID") or None
+
+def gravar_resultado(radar: str, fatia: Fatia, simbolos: list[str], sinais: dict[str, list[str]],
+                     pendentes: list[str], etapas: list[dict] | None = None,
+                     diretorio: str = DIRETORIO_FATIAS, quarentena: list[str] = (), **extra) -> str:
+    """
+    Grava o resultado compacto da fatia: sinais por categoria (ex.:
+    {"sinais": [...]} ou {"compras": [...], "vendas": [...]}), status de cada
+    ticker, relatório por etapa e tempos (total e por símbolo, em segundos).
+    """
+    status = {sym: SEM_SINAL for sym in simbolos}
+    for sym in quarentena:
+        status[sym] = QUARENTENA
+    for sym in pendentes:
+        status[sym] = PENDENTE
+    for categoria, lista in sinais.items():
+        for sym in lista:
+            status[sym] = categoria
+    resultado = {
+        "radar": radar,
+        "fatia": fatia.indice,
+        "total": fatia.total,
+        "execucao": id_execucao(),
+        "gerado_em": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "segundos": round(time.time() - METRICAS.inicio, 3),
+        "sinais": sinais,
+        "status": status,
+        "etapas": etapas or [],
+        "tempos": {sym: round(sum(t.values()), 4) for sym, t in METRICAS.por_simbolo.items() if sym in status},
+        **extra,
+    }
+    caminho = _caminho(radar, fatia, diretorio)
+    os.makedirs(diretorio, exist_ok=True)
+    tmp = caminho + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(resultado, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, caminho)
+    print(f"  🧩 fatia {fatia} ({len(simbolos)} tickers) em {caminho}")
+    return caminho
+
+def juntar(radar: str, total: int, universo: list[str], diretorio: str = DIRETORIO_FATIAS) -> dict:
+    """
+    Lê os K resultados e devolve {"sinais": {categoria: [...]}, "pendentes",
+    "quarentena", "faltando", "etapas", "fatias"} — listas na ordem de `universo`.
+    Tickers de fatias sem arquivo, ou com arquivo de outra execução, vão
+    para "faltando".
+    """
+    lidos = {}
+    for indice in range(total):
+        fatia = Fatia(indice, total)
+        try:
+            with open(_caminho(radar, fatia, diretorio)) as f:
+                r = json.load(f)
+            if r["radar"] != radar or r["total"] != total or r["fatia"] != indice:
+                raise ValueError(f"arquivo é da fatia {r['fatia']}/{r['total']} do {r['radar']}")
+            r["_gerado_em"] = datetime.datetime.fromisoformat(r["gerado_em"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"  ⚠️  fatia {fatia} sem resultado: {e}")
+            continue
+        lidos[indice] = r
+
+    execucao = id_execucao()
+    mais_novo = max((r["_gerado_em"] for r in lidos.values()), default=None)
+    for indice, r in list(lidos.items()):
+        if execucao is not None:
+            if r.get("execucao") != execucao:
+                motivo = f"é da execução {r.get('execucao')}, não da {execucao}"
+            else:
+                continue
+        elif mais_novo - r["_gerado_em"] > IDADE_MAXIMA:
+            motivo = f"gerado em {r['gerado_em']}, muito antes do resto ({mais_novo.isoformat()})"
+        else:
+            continue
+        print(f"  ⚠️  fatia {Fatia(indice, total)} descartada: {motivo}")
+        del lidos[indice]
+
+    sinais, pendentes, quarentena, faltando = {}, set(), set(), set()
+    relatorios, resumo = [], []
+    for indice in range(total):
+        fatia = Fatia(indice, total)
+        r = lidos.get(indice)
+        if r is None:
+            faltando.update(dividir(universo, fatia))
+            continue
+        for categoria, lista in r["sinais"].items():
+            sinais.setdefault(categoria, set()).update(lista)
+        pendentes.update(sym for sym, s in r["status"].items() if s == PENDENTE)
+        quarentena.update(sym for sym, s in r["status"].items() if s == QUARENTENA)
+        relatorios.append(r["etapas"])
+        resumo.append({"fatia": indice, "execucao": r.get("execucao"), "gerado_em": r["gerado_em"],
+                       "segundos": r["segundos"], "tickers": len(r["status"])})
+        print(f"  🧩 fatia {fatia}: {len(r['status'])} tickers em {r['segundos']:.1f}s ({r['gerado_em']})")
+
+    return {
+        "sinais": {c: [sym for sym in universo if sym in s] for c, s in sinais.items()},
+        "pendentes": [sym for sym in universo if sym in pendentes],
+        "quarentena": [sym for sym in universo if sym in quarentena],
+        "faltando": [sym for sym in universo if sym in faltando],
+        "etapas": somar_relatorios(relatorios),
+        "fatias": resumo,
+    }
+
+def nota_faltando(faltando: list[str]) -> str:
+    """Trecho da mensagem do Telegram com os tickers de fatias que não chegaram."""
+    if not faltando:
+        return ""
+    return (
+        f"\n\n⚠️ {len(faltando)} ticker(s) sem resultado (fatia não concluída): "
+        f"{', '.join(faltando)}"
+    )
@@ -0,0 +1,229 @@
+"""
+Negócios em tempo real para o modo de fluxo do H1 (radar_h1.py --fluxo).
+
+Em vez de rebaixar o H1 a cada hora e descartar a barra em formação, o
+radar consome negócios (símbolo, horário, preço, volume) de um feed e
+monta as barras H1 em memória. Uma barra fecha quando a marca d'água do
+feed — o horário até o qual todos os negócios já chegaram — passa do seu
+fechamento no calendário da bolsa; a regra roda na hora, só para os
+símbolos que negociaram nela.
+
+Feeds:
+
+- FeedReplay — negócios gravados em Parquet (colunas simbolo, ts, preco,
+  volume); a marca d'água é o horário do último negócio lido, e o fim do
+  arquivo fecha as barras que sobraram. `gerar_replay` monta um a partir
+  das barras H1 de uma fixture, para reproduzir pregões sem rede.
+
+No --fluxo o feed é dado como "replay:<arquivo>". Um feed com `ao_vivo`
+False (o replay) reproduz o passado: o radar monta o histórico só até o
+primeiro negócio dele (`inicio`) e não envia nem grava nada que as
+execuções de hora em hora leiam.
+"""
+from __future__ import annotations
+
+import datetime
+import os
+from abc import ABC, abstractmethod
+
+import calendario
+from tardio import tardio
+
+np = tardio("numpy")
+pd = tardio("pandas")
+
+UTC = datetime.timezone.utc
+
+# Negócios por barra em gerar_replay (abertura, máxima, mínima, fechamento + o meio)
+NEGOCIOS_POR_BARRA = 20
+
+COLUNAS_REPLAY = ["simbolo", "ts", "preco", "volume"]
+
+# Marca d'água de um feed que terminou: todo negócio já chegou
+_FIM = datetime.datetime.max.replace(tzinfo=UTC)
+
+# =======================
+# FEEDS
+# =======================
+
+class FeedNegocios(ABC):
+    """
+    Interface: iterar devolve negócios (símbolo, ts, preço, volume) — ou
+    None quando não há nada novo, para as barras fecharem pelo relógio — e
+    `marca()` é o horário até o qual todos os negócios já foram entregues.
+    `inicio()` é o horário do primeiro negócio, quando o feed sabe de
+    antemão (replay); None num feed ao vivo.
+    """
+
+    nome = "base"
+    # Negócios de agora: os sinais vão ao Telegram e a barra avaliada fica gravada
+    ao_vivo = True
+
+    @abstractmethod
+    def __iter__(self):
+        ...
+
+    @abstractmethod
+    def marca(self) -> datetime.datetime | None:
+        ...
+
+    def inicio(self) -> datetime.datetime | None:
+        return None
+
+class FeedReplay(FeedNegocios):
+    nome = "replay"
+    ao_vivo = False
+
+    def __init__(self, arquivo: str):
+        self.arquivo = arquivo
+        self._marca = None
+
+    def __iter__(self):
+        df = pd.read_parquet(self.arquivo, columns=COLUNAS_REPLAY).sort_values("ts", kind="stable")
+        horarios = pd.DatetimeIndex(df["ts"]).tz_convert(UTC).to_pydatetime()
+        for negocio in zip(df["simbolo"].tolist(), horarios, df["preco"].tolist(), df["volume"].tolist()):
+            self._marca = negocio[1]
+            yield negocio
+        self._marca = _FIM
+
+    def marca(self):
+        return self._marca
+
+    def inicio(self):
+        ts = pd.read_parquet(self.arquivo, columns=["ts"])["ts"]
+        return None if ts.empty else pd.Timestamp(ts.min()).tz_convert(UTC).to_pydatetime()
+
+def feed_padrao(especificacao: str) -> FeedNegocios:
+    if especificacao.startswith("replay:"):
+        return FeedReplay(especificacao.split(":", 1)[1])
+    raise ValueError(f"feed desconhecido: {especificacao!r} (use replay:<arquivo>)")
+
+# =======================
+# AGREGADOR
+# =======================
+
+class AgregadorBarras:
+    """
+    Barras H1 em formação, montadas negócio a negócio. `fechar(marca)`
+    devolve as que já fecharam, agrupadas por horário de fechamento.
+    """
+
+    def __init__(self):
+        # (símbolo, abertura UTC) → [fechamento, open, high, low, close, volume]
+        self.abertas = {}
+        # Menor fechamento entre as abertas: antes dele não há o que fechar
+        self._proximo = None
+        # Até onde as barras já foram fechadas — negócio de barra anterior a isso chegou tarde
+        self._fechado_ate = None
+        # Negócios fora do pregão regular ou de barra já fechada
+        self.ignorados = 0
+
+    def _abrir(self, sym: str, abertura: datetime.datetime, ohlcv: list[float]):
+        fechamento = calendario.fechamento_barra(abertura)
+        self.abertas[(sym, abertura)] = [fechamento, *ohlcv]
+        if self._proximo is None or fechamento < self._proximo:
+            self._proximo = fechamento
+
+    def semear(self, sym: str, abertura: datetime.datetime, o: float, h: float, l: float, c: float, v: float):
+        """Barra em formação vinda do histórico (partida no meio da barra)."""
+        self._abrir(sym, abertura.astimezone(UTC), [o, h, l, c, v])
+
+    def adicionar(self, sym: str, ts: datetime.datetime, preco: float, volume: float):
+        abertura = calendario.abertura_barra(ts)
+        if abertura is None:
+            self.ignorados += 1
+            return
+        barra = self.abertas.get((sym, abertura))
+        if barra is not None:
+            if preco > barra[2]:
+                barra[2] = preco
+            if preco < barra[3]:
+                barra[3] = preco
+            barra[4] = preco
+            barra[5] += volume
+        elif self._fechado_ate is not None and calendario.fechamento_barra(abertura) <= self._fechado_ate:
+            self.ignorados += 1
+        else:
+            self._abrir(sym, abertura, [preco, preco, preco, preco, volume])
+
+    def fechar(self, marca: datetime.datetime | None) -> list[tuple[datetime.datetime, dict]]:
+        """[(fechamento, {símbolo: (abertura, open, high, low, close, volume)})] em ordem."""
+        if marca is None or self._proximo is None or marca < self._proximo:
+            return []
+        por_fechamento = {}
+        for chave in [k for k, b in self.abertas.items() if b[0] <= marca]:
+            fechamento, *ohlcv = self.abertas.pop(chave)
+            por_fechamento.setdefault(fechamento, {})[chave[0]] = (chave[1], *ohlcv)
+        self._proximo = min((b[0] for b in self.abertas.values()), default=None)
+        self._fechado_ate = marca if self._fechado_ate is None else max(self._fechado_ate, marca)
+        return sorted(por_fechamento.items())
+
+    def consumir(self, feed: FeedNegocios):
+        """Gera (fechamento, barras) a cada fechamento de barra, enquanto o feed durar."""
+        for negocio in feed:
+            if negocio is not None:
+                self.adicionar(*negocio)
+            yield from self.fechar(feed.marca())
+        yield from self.fechar(feed.marca())
+
+# =======================
+# REPLAY A PARTIR DE FIXTURE
+# =======================
+
+def gerar_replay(fixture: str, tickers: list[str], inicio, arquivo: str,
+                 negocios: int = NEGOCIOS_POR_BARRA, semente: int = 0) -> int:
+    """
+    Negócios sintéticos que remontam as barras H1 da fixture a partir de
+    `inicio`: a abertura no primeiro negócio, o fechamento no último, a
+    máxima e a mínima em posições sorteadas no meio e o volume dividido
+    entre eles. Só barras do pregão regular no calendário entram. Grava em
+    `arquivo` e devolve quantos negócios foram gerados.
+    """
+    if negocios < 4:
+        raise ValueError("gerar_replay precisa de pelo menos 4 negócios por barra")
+    rng = np.random.default_rng(semente)
+    inicio = pd.Timestamp(inicio)
+    partes = []
+    for sym in tickers:
+        caminho = os.path.join(fixture, "1h", f"{sym}.parquet")
+        if not os.path.exists(caminho):
+            continue
+        df = pd.read_parquet(caminho)
+        df = df[df.index >= inicio]
+        aberturas = df.index.tz_convert(UTC)
+        validas = np.array([calendario.abertura_barra(a) == a for a in aberturas], dtype=bool)
+        df, aberturas = df[validas], aberturas[validas]
+        n = len(df)
+        if n == 0:
+            continue
+
+        # Horários em ns (o índice lido do Parquet pode vir em outra resolução)
+        inicio_ns = aberturas.as_unit("ns").asi8
+        fim_ns = pd.DatetimeIndex([calendario.fechamento_barra(a) for a in aberturas]).as_unit("ns").asi8
+        passo = np.arange(1, 2 * negocios, 2) / (2 * negocios)
+        horarios = inicio_ns[:, None] + ((fim_ns - inicio_ns)[:, None] * passo).astype("int64")
+
+        o, h, l, c, v = (df[col].to_numpy(dtype=float) for col in ("Open", "High", "Low", "Close", "Volume"))
+        precos = rng.uniform(l[:, None], h[:, None], (n, negocios))
+        # Duas posições distintas do meio para a máxima e a mínima
+        meio = rng.permuted(np.tile(np.arange(1, negocios - 1), (n, 1)), axis=1)
+        linhas = np.arange(n)
+        precos[linhas, meio[:, 0]] = h
+        precos[linhas, meio[:, 1]] = l
+        precos[:, 0] = o
+        precos[:, -1] = c
+        volumes = np.repeat((v / negocios)[:, None], negocios, axis=1)
+        volumes[:, -1] = v - volumes[:, :-1].sum(axis=1)
+
+        partes.append(pd.DataFrame({
+            "simbolo": sym,
+            "ts": pd.to_datetime(horarios.ravel(), unit="ns", utc=True),
+            "preco": precos.ravel(),
+            "volume": volumes.ravel(),
+        }))
+
+    replay = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_REPLAY)
+    replay = replay.sort_values("ts", kind="stable")
+    os.makedirs(os.path.dirname(arquivo) or ".", exist_ok=True)
+    replay.to_parquet(arquivo, index=False)
+    return len(replay)
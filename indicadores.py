@@ -0,0 +1,279 @@
+"""
+Estado incremental das médias por (símbolo, timeframe).
+
+Em vez de recalcular `ewm()`/`rolling()` sobre milhares de barras a cada
+execução só para ler o último valor, cada série guarda as últimas EMAs e um
+buffer circular com os últimos SMA_LONG closes. Barras novas atualizam o
+estado em O(1). O estado é gravado em JSON ao lado das barras do armazém.
+
+A última barra da série nunca entra no estado: ela é só "espiada" (o valor
+é calculado sem ser gravado), porque pode ser uma barra ainda em formação
+(ex.: o D1 do dia corrente) — na próxima execução ela é incorporada.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from collections import deque
+
+from metricas import METRICAS
+from tardio import tardio
+from triagem import EMA_FAST, EMA_MID, SMA_LONG
+
+np = tardio("numpy")
+pd = tardio("pandas")
+
+# Liga a conferência do estado incremental contra o recálculo completo do pandas
+VERIFICAR = os.environ.get("RADAR_VERIFICAR_INDICADORES") == "1"
+
+# Tolerância relativa da conferência contra o recálculo do pandas
+TOLERANCIA = 1e-3
+
+# O estado começa a EMA na primeira barra que viu e nunca a esquece, enquanto
+# o recálculo começa no início da janela atual. Na EMA ajustada essa
+# diferença cresce a cada barra que sai da janela; quando a fração do peso
+# que vem de barras já fora da janela passa disto, o estado é reconstruído
+# sobre a janela. O desvio fica abaixo de peso × variação relativa do preço,
+# ou seja, abaixo da TOLERANCIA mesmo com o preço 10× diferente. No S1
+# mensal (EMA120, ~240 barras) isso é uma reconstrução por mês.
+PESO_FORA_MAXIMO = 1e-4
+
+# Diferença relativa do último close gravado que indica histórico reajustado
+TOLERANCIA_CLOSE = 1e-6
+
+# =======================
+# ESTADO
+# =======================
+
+class EstadoIndicadores:
+    def __init__(self, spans=(EMA_FAST, EMA_MID), janela: int = SMA_LONG, adjust: bool = False):
+        self.spans = list(spans)
+        self.janela = janela
+        # adjust=False: num é a própria EMA; adjust=True: EMA = num / den
+        self.adjust = adjust
+        self.num = [None] * len(self.spans)
+        self.den = [0.0] * len(self.spans)
+        self.buffer = deque(maxlen=janela)
+        self.soma = 0.0
+        self.ultimo_ts = None
+        self.ultimo_close = None
+        self.barras = 0
+
+    def _proximas_emas(self, close: float):
+        novos_num, novos_den = [], []
+        for span, num, den in zip(self.spans, self.num, self.den):
+            alpha = 2.0 / (span + 1.0)
+            if self.adjust:
+                novos_num.append(close + (1 - alpha) * (num or 0.0))
+                novos_den.append(1.0 + (1 - alpha) * den)
+            else:
+                novos_num.append(close if num is None else num + alpha * (close - num))
+                novos_den.append(1.0)
+        return novos_num, novos_den
+
+    def atualizar(self, close: float, ts: pd.Timestamp):
+        """Incorpora uma barra fechada — O(1)."""
+        self.num, self.den = self._proximas_emas(close)
+        if len(self.buffer) == self.janela:
+            self.soma -= self.buffer[0]
+        self.buffer.append(close)
+        self.soma += close
+        self.ultimo_ts = ts
+        self.ultimo_close = close
+        self.barras += 1
+
+    def peso_fora(self, na_janela: int) -> float:
+        """
+        Maior fração (entre as EMAs) do peso que vem das barras incorporadas
+        que não estão entre as `na_janela` últimas — as que já saíram da
+        janela do histórico. Só a EMA ajustada acumula esse peso: na não
+        ajustada a diferença para a EMA da janela é d^n × (EMA − close) no
+        início da janela, que não cresce com o deslize.
+        """
+        if not self.adjust or self.barras <= na_janela:
+            return 0.0
+        peso = 0.0
+        for span in self.spans:
+            decaimento = 1 - 2.0 / (span + 1.0)
+            # Pesos 1, d, d², ...: fração dos que ficaram de fora no denominador
+            peso = max(peso, 1 - (1 - decaimento ** na_janela) / (1 - decaimento ** self.barras))
+        return peso
+
+    def valores(self, close: float | None = None) -> dict[str, float]:
+        """
+        EMAs e SMA atuais. Com `close`, devolve os valores como se essa barra
+        tivesse sido incorporada, sem alterar o estado.
+        """
+        if close is None:
+            num, den = self.num, self.den
+            soma, cheio = self.soma, len(self.buffer) == self.janela
+        else:
+            num, den = self._proximas_emas(close)
+            if len(self.buffer) == self.janela:
+                soma, cheio = self.soma - self.buffer[0] + close, True
+            else:
+                soma, cheio = self.soma + close, len(self.buffer) + 1 == self.janela
+
+        out = {}
+        for span, n, d in zip(self.spans, num, den):
+            out[f"ema{span}"] = np.nan if n is None else (n / d if self.adjust else n)
+        out[f"sma{self.janela}"] = soma / self.janela if cheio else np.nan
+        return out
+
+    def sincronizar(self, df: pd.DataFrame) -> bool:
+        """
+        Incorpora as barras de `df` posteriores ao estado (exceto a última).
+        Retorna False se o estado não casa com `df` (barra gravada sumiu da
+        janela ou o close mudou) — aí o chamador reconstrói do zero.
+        """
+        closes = df["Close"]
+        inicio = 0
+        if self.ultimo_ts is not None:
+            pos = df.index.searchsorted(self.ultimo_ts)
+            if pos >= len(df) or df.index[pos] != self.ultimo_ts:
+                return False
+            if not math.isclose(closes.iloc[pos], self.ultimo_close, rel_tol=TOLERANCIA_CLOSE):
+                return False
+            inicio = pos + 1
+
+        for ts, close in closes.iloc[inicio:-1].items():
+            self.atualizar(float(close), ts)
+        return True
+
+    # ---- serialização ----
+
+    def to_dict(self) -> dict:
+        return {
+            "spans": self.spans,
+            "janela": self.janela,
+            "adjust": self.adjust,
+            "num": self.num,
+            "den": self.den,
+            "buffer": list(self.buffer),
+            "ultimo_ts": None if self.ultimo_ts is None else self.ultimo_ts.isoformat(),
+            "ultimo_close": self.ultimo_close,
+            "barras": self.barras,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "EstadoIndicadores":
+        estado = cls(d["spans"], d["janela"], d["adjust"])
+        estado.num = d["num"]
+        estado.den = d["den"]
+        estado.buffer = deque(d["buffer"], maxlen=estado.janela)
+        # Recalcula a soma do buffer ao carregar — não acumula erro de arredondamento entre execuções
+        estado.soma = math.fsum(estado.buffer)
+        estado.ultimo_ts = None if d["ultimo_ts"] is None else pd.Timestamp(d["ultimo_ts"])
+        estado.ultimo_close = d["ultimo_close"]
+        estado.barras = d["barras"]
+        return estado
+
+# =======================
+# CONFERÊNCIA
+# =======================
+
+def verificar(estado: EstadoIndicadores, df: pd.DataFrame, rtol: float = TOLERANCIA) -> float:
+    """
+    Recalcula as médias do zero com o pandas sobre as barras já incorporadas
+    e devolve o maior desvio relativo (NaN nos dois lados conta como igual).
+    """
+    closes = df["Close"][df.index <= estado.ultimo_ts]
+    esperado = {f"ema{span}": closes.ewm(span=span, adjust=estado.adjust).mean().iloc[-1]
+                for span in estado.spans}
+    esperado[f"sma{estado.janela}"] = closes.rolling(window=estado.janela).mean().iloc[-1]
+
+    desvio = 0.0
+    for chave, valor in estado.valores().items():
+        ref = esperado[chave]
+        if np.isnan(valor) and np.isnan(ref):
+            continue
+        desvio = max(desvio, abs(valor / ref - 1) if ref else abs(valor))
+    return desvio
+
+# =======================
+# API
+# =======================
+
+def _caminho_estado(armazem, sym: str, interval: str, period: str, fonte: str | None = None) -> str:
+    sufixo = ".estado.json" if fonte is None else f".{fonte}.estado.json"
+    return armazem.caminho(sym, interval, period).replace(".parquet", sufixo)
+
+def estados_atualizados(armazem, historicos: dict[str, pd.DataFrame], interval: str,
+                        period: str, adjust: bool = False,
+                        fonte: str | None = None) -> dict[str, EstadoIndicadores]:
+    """
+    Carrega o estado de cada símbolo, incorpora as barras novas de
+    `historicos` e grava de volta (só se mudou). Estados que não casam com
+    o histórico (reajuste, lacuna) são reconstruídos do zero. `fonte`
+    separa o estado de um timeframe derivado de outro (ex.: D1 montado do
+    H1) do estado do mesmo timeframe baixado direto.
+    """
+    estados = {}
+    reaproveitados = 0
+    for sym, df in historicos.items():
+        if df is None or df.empty:
+            continue
+        inicio = time.perf_counter()
+        caminho = _caminho_estado(armazem, sym, interval, period, fonte)
+        chave = ("estado", sym, interval, period, fonte)
+        estado = None
+        if armazem.memoria is not None and chave in armazem.memoria:
+            estado = armazem.memoria[chave]
+        elif os.path.exists(caminho):
+            try:
+                with open(caminho) as f:
+                    estado = EstadoIndicadores.from_dict(json.load(f))
+            except Exception as e:
+                print(f"  ⚠️  estado {sym} ({interval}) ilegível, recalculando: {e}")
+        barras_antes = None if estado is None else estado.barras
+        if estado is None or estado.adjust != adjust or not estado.sincronizar(df):
+            estado = EstadoIndicadores(adjust=adjust)
+            estado.sincronizar(df)
+            barras_antes = None
+        elif (estado.ultimo_ts is not None
+              and estado.peso_fora(int(df.index.searchsorted(estado.ultimo_ts, side="right"))) > PESO_FORA_MAXIMO):
+            # A janela andou o bastante para a EMA acumulada se afastar da recalculada
+            estado = EstadoIndicadores(adjust=adjust)
+            estado.sincronizar(df)
+            barras_antes = None
+        else:
+            reaproveitados += 1
+
+        if VERIFICAR and estado.ultimo_ts is not None:
+            desvio = verificar(estado, df)
+            if desvio > TOLERANCIA:
+                print(f"  ⚠️  estado {sym} ({interval}) divergiu {desvio:.2e}, recalculando")
+                estado = EstadoIndicadores(adjust=adjust)
+                estado.sincronizar(df)
+                barras_antes = None
+
+        # Sem barra nova (ex.: a mesma série lida de novo na execução) o arquivo já está em dia
+        if estado.barras != barras_antes and armazem.estados_em_disco:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            with open(caminho, "w") as f:
+                json.dump(estado.to_dict(), f)
+        if armazem.memoria is not None:
+            armazem.memoria[chave] = estado
+        estados[sym] = estado
+        METRICAS.registrar_tempo(f"indicadores.{interval}", time.perf_counter() - inicio, sym=sym)
+    METRICAS.cache(f"estados.{interval}", reaproveitados, len(estados) - reaproveitados)
+    return estados
+
+def ultimos_valores(estados: dict[str, EstadoIndicadores], historicos: dict[str, pd.DataFrame],
+                    simbolos: list[str]) -> dict[str, np.ndarray]:
+    """
+    Médias da última barra de cada símbolo (estado + barra espiada), no
+    formato das médias do motor de triagem: {"ema21": array 1×N, ...}.
+    """
+    chaves = [f"ema{EMA_FAST}", f"ema{EMA_MID}", f"sma{SMA_LONG}"]
+    out = {k: np.full((1, len(simbolos)), np.nan) for k in chaves}
+    for j, sym in enumerate(simbolos):
+        estado, df = estados.get(sym), historicos.get(sym)
+        if estado is None or df is None or df.empty:
+            continue
+        valores = estado.valores(float(df["Close"].iloc[-1]))
+        for k in chaves:
+            out[k][0, j] = valores[k]
+    return out
@@ -0,0 +1,122 @@
+"""
+Instrumentação dos radares: cronômetros por etapa e por símbolo, contadores
+(requisições, bytes, acertos de cache) e registros de debug preguiçosos.
+
+Os registros de debug aceitam uma função no lugar da string e só são
+formatados com RADAR_DEBUG=1 — sem debug, nenhuma f-string por ticker é
+montada. No fim da execução, `exportar()` grava tudo num JSON em
+RADAR_METRICAS_DIR, que o workflow sobe como artefato para acompanhar
+tendências entre execuções.
+"""
+import datetime
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# Log detalhado por ticker (só aparece no log do Actions, nunca no Telegram)
+DEBUG = os.environ.get("RADAR_DEBUG") == "1"
+
+# Onde `exportar` grava o JSON de métricas de cada radar
+DIRETORIO_METRICAS = os.environ.get("RADAR_METRICAS_DIR", "metricas")
+
+# =======================
+# DEBUG
+# =======================
+
+def debug(sym: str, msg):
+    """Linha de diagnóstico do símbolo. `msg` pode ser str ou função sem argumentos."""
+    if DEBUG:
+        print(f"    [{sym}] {msg() if callable(msg) else msg}")
+
+# =======================
+# MÉTRICAS
+# =======================
+
+class Metricas:
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Zera tudo — usado pelo daemon do H1 a cada varredura."""
+        self.inicio = time.time()
+        # nome → {"chamadas": int, "segundos": float}
+        self.tempos = {}
+        # símbolo → {nome: segundos}
+        self.por_simbolo = {}
+        # nome → int (requisições, bytes, acertos/faltas de cache...)
+        self.contadores = {}
+
+    def registrar_tempo(self, nome: str, segundos: float, sym: str | None = None):
+        t = self.tempos.setdefault(nome, {"chamadas": 0, "segundos": 0.0})
+        t["chamadas"] += 1
+        t["segundos"] += segundos
+        if sym is not None:
+            tempos_sym = self.por_simbolo.setdefault(sym, {})
+            tempos_sym[nome] = tempos_sym.get(nome, 0.0) + segundos
+
+    @contextmanager
+    def cronometro(self, nome: str, sym: str | None = None):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, time.perf_counter() - inicio, sym)
+
+    def contar(self, nome: str, n: int = 1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    def cache(self, nome: str, acertos: int, faltas: int):
+        self.contar(f"cache.{nome}.acertos", acertos)
+        self.contar(f"cache.{nome}.faltas", faltas)
+
+    def taxas_cache(self) -> dict[str, float]:
+        """Fração de acertos de cada cache contado com `cache()`."""
+        taxas = {}
+        for chave, acertos in self.contadores.items():
+            if chave.startswith("cache.") and chave.endswith(".acertos"):
+                nome = chave[len("cache."):-len(".acertos")]
+                total = acertos + self.contadores.get(f"cache.{nome}.faltas", 0)
+                taxas[nome] = acertos / total if total else 0.0
+        return taxas
+
+    def incorporar(self, outro: dict):
+        """Soma tempos e contadores de `outro` (para_dict de outro processo, ex.: worker do pool)."""
+        for nome, t in outro["tempos"].items():
+            meu = self.tempos.setdefault(nome, {"chamadas": 0, "segundos": 0.0})
+            meu["chamadas"] += t["chamadas"]
+            meu["segundos"] += t["segundos"]
+        for sym, tempos in outro["por_simbolo"].items():
+            tempos_sym = self.por_simbolo.setdefault(sym, {})
+            for nome, segundos in tempos.items():
+                tempos_sym[nome] = tempos_sym.get(nome, 0.0) + segundos
+        for nome, n in outro["contadores"].items():
+            self.contar(nome, n)
+
+    def para_dict(self, **extra) -> dict:
+        return {
+            "inicio": datetime.datetime.fromtimestamp(self.inicio, datetime.timezone.utc)
+                      .isoformat(timespec="seconds"),
+            "segundos": time.time() - self.inicio,
+            "tempos": self.tempos,
+            "contadores": self.contadores,
+            "taxas_cache": self.taxas_cache(),
+            "por_simbolo": self.por_simbolo,
+            **extra,
+        }
+
+    def exportar(self, radar: str, **extra) -> str | None:
+        """Grava {DIRETORIO_METRICAS}/{radar}.json. Falha de escrita nunca derruba o radar."""
+        caminho = os.path.join(DIRETORIO_METRICAS, f"{radar}.json")
+        try:
+            os.makedirs(DIRETORIO_METRICAS, exist_ok=True)
+            with open(caminho, "w") as f:
+                json.dump(self.para_dict(radar=radar, **extra), f, indent=2, ensure_ascii=False, default=str)
+        except Exception as e:
+            print(f"  ⚠️  métricas não gravadas: {e}")
+            return None
+        print(f"  📈 métricas em {caminho}")
+        return caminho
+
+# Uma instância por processo — cada radar roda num processo próprio
+METRICAS = Metricas()
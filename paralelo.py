@@ -0,0 +1,101 @@
+"""
+Avaliação em processos para o trabalho de CPU por símbolo em universos
+grandes (reamostragem D1 → W1/MN, médias e regra do S1).
+
+Com RADAR_PROCESSOS=K > 1, os símbolos de um bloco são divididos em
+pedaços de TAMANHO_PEDACO e cada pedaço vai a um processo do pool. As
+barras não passam pelo pickle: o worker recebe só o diretório do armazém
+e a lista de símbolos, e lê o arquivo colunar por memory-map (colunar.py)
+— as mesmas páginas que o processo principal acabou de gravar,
+compartilhadas pelo sistema operacional. Os resultados voltam na ordem dos
+pedaços, não na ordem em que os workers terminam, então a mensagem é a
+mesma da execução num processo só.
+
+Os workers saem de um forkserver que já importou o módulo da função
+(pandas incluso): nada de fork de um processo com threads de rede vivas,
+e cada worker sobe sem pagar o import de novo. O pool é criado no primeiro
+uso e reaproveitado entre blocos. Nos workers o cache de respostas
+(respostas.py) é só de leitura: o índice dele é do processo principal.
+
+METRICAS e SAUDE são por processo: cada tarefa do pool zera os do worker
+e devolve, junto com o resultado, os tempos/contadores e as ocorrências
+do pedaço, que o processo principal soma aos seus — o JSON de métricas e
+a quarentena ficam iguais aos da execução num processo só.
+
+O ganho do pool ainda não foi medido em máquina com vários núcleos: a
+única medição (`benchmark.py processos`) foi feita com 1 CPU, onde o pool
+só acrescenta custo. Antes de ligar RADAR_PROCESSOS > 1 no workflow,
+rodar `python benchmark.py processos -w 1 2 4` no runner de verdade.
+"""
+import os
+
+from metricas import METRICAS
+from saude import SAUDE
+
+# Processos do pool (1 = tudo no próprio processo, como antes)
+PROCESSOS = int(os.environ.get("RADAR_PROCESSOS", "1"))
+
+# Símbolos por tarefa — pequeno o bastante para equilibrar a carga entre
+# os workers, grande o bastante para diluir o custo de cada tarefa
+TAMANHO_PEDACO = int(os.environ.get("RADAR_PEDACO", "64"))
+
+_POOL = None
+# (processos, módulo pré-carregado) do pool aberto
+_CONFIG = None
+
+def pedacos(simbolos: list[str], tamanho: int = TAMANHO_PEDACO) -> list[list[str]]:
+    return [simbolos[i:i + tamanho] for i in range(0, len(simbolos), tamanho)]
+
+def _iniciar_worker():
+    from respostas import RESPOSTAS
+    RESPOSTAS.somente_leitura = True
+
+def _pool(processos: int, modulo: str):
+    global _POOL, _CONFIG
+    if _POOL is None or _CONFIG != (processos, modulo):
+        # Import tardio: com RADAR_PROCESSOS=1 a partida não paga o multiprocessing
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        encerrar()
+        contexto = multiprocessing.get_context("forkserver")
+        if modulo != "__main__":
+            # O script rodado direto é reimportado pelo próprio multiprocessing
+            contexto.set_forkserver_preload([modulo])
+        _POOL = ProcessPoolExecutor(max_workers=processos, mp_context=contexto, initializer=_iniciar_worker)
+        _CONFIG = (processos, modulo)
+    return _POOL
+
+def encerrar():
+    """Fecha o pool (o próximo `mapear` abre outro)."""
+    global _POOL, _CONFIG
+    if _POOL is not None:
+        _POOL.shutdown()
+    _POOL = _CONFIG = None
+
+def _com_ocorrencias(funcao, parte: list[str], *args) -> tuple:
+    """Tarefa do pool: `funcao(parte, *args)` e as métricas e ocorrências de saúde do pedaço."""
+    METRICAS.reiniciar()
+    SAUDE.reiniciar()
+    resultado = funcao(parte, *args)
+    return resultado, METRICAS.para_dict(), SAUDE.para_dict()
+
+def mapear(funcao, simbolos: list[str], *args, processos: int = PROCESSOS,
+           tamanho: int = TAMANHO_PEDACO) -> list:
+    """
+    [funcao(pedaço, *args) para cada pedaço de `simbolos`], na ordem dos
+    pedaços. Com `processos` <= 1 ou um pedaço só, roda no próprio
+    processo. `funcao` precisa ser uma função de módulo (vai por pickle).
+    As métricas e a saúde registradas nos workers entram no METRICAS e no
+    SAUDE deste processo.
+    """
+    partes = pedacos(simbolos, tamanho)
+    if processos <= 1 or len(partes) <= 1:
+        return [funcao(parte, *args) for parte in partes]
+    pool = _pool(processos, funcao.__module__)
+    resultados = []
+    for resultado, metricas, saude in pool.map(_com_ocorrencias, [funcao] * len(partes), partes,
+                                               *[[a] * len(partes) for a in args]):
+        METRICAS.incorporar(metricas)
+        SAUDE.incorporar(saude)
+        resultados.append(resultado)
+    return resultados
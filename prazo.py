@@ -0,0 +1,80 @@
+"""
+Prazo (orçamento de tempo) de uma execução dos radares.
+
+Os workflows têm timeout (o H1 morre em 8 minutos) e, se o Yahoo estiver
+lento, o job era encerrado antes do envio ao Telegram — e os sinais da hora
+se perdiam. Com RADAR_PRAZO_SEGUNDOS, o universo é avaliado em blocos, em
+ordem de prioridade; quando o prazo (menos a reserva para o envio) acaba,
+nenhum bloco novo é iniciado e o radar envia o que já tem, listando os
+tickers que ficaram sem avaliação. Eles vão para o começo da fila da
+próxima execução (ver prioridade.py).
+"""
+import math
+import os
+import time
+
+# Orçamento de tempo da execução em segundos (0 = sem prazo)
+PRAZO_SEGUNDOS = float(os.environ.get("RADAR_PRAZO_SEGUNDOS", "0"))
+
+# Tempo guardado no fim do prazo para montar e enviar a mensagem
+RESERVA_ENVIO = float(os.environ.get("RADAR_PRAZO_RESERVA", "30"))
+
+# Símbolos por bloco quando há prazo — cada bloco é uma avaliação completa
+TAMANHO_BLOCO = 50
+
+class Prazo:
+    def __init__(self, segundos: float = 0, reserva: float = RESERVA_ENVIO):
+        self.inicio = time.monotonic()
+        self.fim = self.inicio + max(0.0, segundos - reserva) if segundos else None
+
+    def restante(self) -> float:
+        return math.inf if self.fim is None else self.fim - time.monotonic()
+
+    def esgotado(self) -> bool:
+        return self.restante() <= 0
+
+# Prazo da execução atual — consultado pelo executor para não agendar retries
+_ATIVO = Prazo()
+
+def iniciar_prazo(segundos: float = PRAZO_SEGUNDOS) -> Prazo:
+    global _ATIVO
+    _ATIVO = Prazo(segundos)
+    return _ATIVO
+
+def esgotado() -> bool:
+    return _ATIVO.esgotado()
+
+def em_blocos(simbolos: list[str], avaliar, prazo: Prazo,
+              tamanho: int = TAMANHO_BLOCO) -> tuple[list, list[str]]:
+    """
+    Chama `avaliar(bloco)` sobre `simbolos` em ordem, um bloco por vez, até
+    acabar ou o prazo esgotar. Sem prazo, um bloco só com tudo. Devolve o
+    resultado de cada bloco concluído e os símbolos que ficaram sem
+    avaliação — os que sobraram no fim do prazo e os de um bloco que
+    levantou exceção, que não leva junto os blocos já concluídos.
+    """
+    simbolos = list(simbolos)
+    if prazo.fim is None:
+        blocos = [simbolos]
+    else:
+        blocos = [simbolos[i:i + tamanho] for i in range(0, len(simbolos), tamanho)]
+    resultados, pendentes = [], []
+    for i, bloco in enumerate(blocos):
+        if prazo.esgotado():
+            pendentes.extend(sym for resto in blocos[i:] for sym in resto)
+            break
+        try:
+            resultados.append(avaliar(bloco))
+        except Exception as e:
+            print(f"  ⚠️  bloco de {len(bloco)} símbolo(s) falhou ({type(e).__name__}: {e}) — fica para a próxima execução")
+            pendentes.extend(bloco)
+    return resultados, pendentes
+
+def nota_pendentes(pendentes: list[str]) -> str:
+    """Trecho da mensagem do Telegram com os tickers não avaliados."""
+    if not pendentes:
+        return ""
+    return (
+        f"\n\n⏱ {len(pendentes)} ticker(s) não avaliado(s) (prazo esgotado ou falha), "
+        f"ficam para a próxima execução: {', '.join(pendentes)}"
+    )
@@ -0,0 +1,56 @@
+"""
+Ordem de avaliação dos tickers entre execuções.
+
+Primeiro vêm os que ficaram sem avaliação na execução anterior (prazo
+esgotado), depois os prioritários passados pelo radar (ex.: watchlist do
+H1), depois os que mais deram sinal recentemente; o resto mantém a ordem de
+TICKERS. O histórico de sinais é uma pontuação com decaimento por execução,
+gravada ao lado do armazém de barras.
+"""
+import json
+import os
+
+from armazem import DIRETORIO_PADRAO
+
+# Peso que a pontuação de sinais mantém a cada execução em que o ticker é avaliado
+DECAIMENTO = 0.9
+
+# Pontuações abaixo disso são esquecidas
+PONTUACAO_MINIMA = 0.01
+
+def _caminho(radar: str) -> str:
+    return os.path.join(DIRETORIO_PADRAO, f"prioridade_{radar}.json")
+
+def carregar_fila(radar: str) -> dict:
+    """{"pendentes": [...], "pontuacao": {sym: float}} da execução anterior."""
+    try:
+        with open(_caminho(radar)) as f:
+            d = json.load(f)
+        return {"pendentes": list(d["pendentes"]), "pontuacao": dict(d["pontuacao"])}
+    except (OSError, ValueError, KeyError):
+        return {"pendentes": [], "pontuacao": {}}
+
+def ordenar_fila(simbolos: list[str], info: dict, primeiro: list[str] = ()) -> list[str]:
+    universo = set(simbolos)
+    ordem, vistos = [], set()
+    for sym in list(info["pendentes"]) + list(primeiro):
+        if sym in universo and sym not in vistos:
+            ordem.append(sym)
+            vistos.add(sym)
+    pontuacao = info["pontuacao"]
+    resto = [sym for sym in simbolos if sym not in vistos]
+    # sorted é estável: empates (inclusive quem nunca deu sinal) mantêm a ordem de TICKERS
+    return ordem + sorted(resto, key=lambda sym: -pontuacao.get(sym, 0.0))
+
+def gravar_fila(radar: str, info: dict, avaliados: list[str], hits: list[str], pendentes: list[str]):
+    pontuacao = dict(info["pontuacao"])
+    sinais = set(hits)
+    for sym in avaliados:
+        p = pontuacao.get(sym, 0.0) * DECAIMENTO + (1.0 if sym in sinais else 0.0)
+        if p >= PONTUACAO_MINIMA:
+            pontuacao[sym] = p
+        else:
+            pontuacao.pop(sym, None)
+    os.makedirs(DIRETORIO_PADRAO, exist_ok=True)
+    with open(_caminho(radar), "w") as f:
+        json.dump({"pendentes": pendentes, "pontuacao": pontuacao}, f)
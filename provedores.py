@@ -0,0 +1,170 @@
+"""
+Provedores de dados de barras para os radares.
+
+Todo download de histórico passa por `buscar_historico`, que delega ao
+provedor ativo:
+
+- ProvedorYahoo — o caminho de produção (download em lote do yfinance).
+- ProvedorFixture — lê OHLCV gravado em disco ({dir}/{interval}/{sym}.parquet),
+  seja gravado do Yahoo (`gravar_fixture`) ou gerado sinteticamente
+  (`gerar_fixture`). Permite reproduzir, perfilar e medir uma execução
+  inteira sem rede.
+
+O provedor é escolhido por RADAR_PROVEDOR ("yahoo" ou "fixture:<dir>") ou
+trocado em tempo de execução com `definir_provedor`.
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from abc import ABC, abstractmethod
+
+from dados import FUSO_BOLSA, baixar_historico, inicio_period
+from metricas import METRICAS
+from saude import SAUDE
+from tardio import tardio
+
+np = tardio("numpy")
+pd = tardio("pandas")
+
+# Intervals suportados pelos radares e a janela máxima usada de cada um
+JANELAS_FIXTURE = {"1h": "730d", "1d": "20y", "1wk": "20y", "1mo": "20y"}
+
+# Horário das barras H1 do pregão regular no Yahoo (a última fecha às 16:00)
+HORAS_H1 = ["09:30", "10:30", "11:30", "12:30", "13:30", "14:30", "15:30"]
+
+# =======================
+# PROVEDORES
+# =======================
+
+class ProvedorDados(ABC):
+    """Interface: `historico` devolve {símbolo: DataFrame OHLCV} como baixar_historico."""
+
+    nome = "base"
+
+    @abstractmethod
+    def historico(self, tickers: list[str], period: str | None, interval: str,
+                  start: str | None = None) -> dict[str, pd.DataFrame]:
+        ...
+
+class ProvedorYahoo(ProvedorDados):
+    nome = "yahoo"
+
+    def historico(self, tickers, period, interval, start=None):
+        return baixar_historico(tickers, period=period, interval=interval, start=start)
+
+class ProvedorFixture(ProvedorDados):
+    nome = "fixture"
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._cache = {}
+
+    def _carregar(self, sym: str, interval: str) -> pd.DataFrame | None:
+        chave = (sym, interval)
+        if chave not in self._cache:
+            caminho = os.path.join(self.diretorio, interval, f"{sym}.parquet")
+            self._cache[chave] = pd.read_parquet(caminho) if os.path.exists(caminho) else None
+        return self._cache[chave]
+
+    def historico(self, tickers, period, interval, start=None):
+        resultado = {}
+        for sym in tickers:
+            df = self._carregar(sym, interval)
+            if df is None or df.empty:
+                continue
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start, tz=FUSO_BOLSA)]
+            elif period is not None:
+                df = df[df.index >= inicio_period(period, df.index[-1])]
+            if not df.empty:
+                resultado[sym] = df.copy()
+        return resultado
+
+def provedor_padrao() -> ProvedorDados:
+    config = os.environ.get("RADAR_PROVEDOR", "yahoo")
+    if config.startswith("fixture:"):
+        return ProvedorFixture(config.split(":", 1)[1])
+    return ProvedorYahoo()
+
+_ATUAL = None
+
+def provedor_atual() -> ProvedorDados:
+    global _ATUAL
+    if _ATUAL is None:
+        _ATUAL = provedor_padrao()
+    return _ATUAL
+
+def definir_provedor(provedor: ProvedorDados):
+    global _ATUAL
+    _ATUAL = provedor
+
+def buscar_historico(tickers: list[str], period: str | None, interval: str,
+                     start: str | None = None) -> dict[str, pd.DataFrame]:
+    """Histórico de `tickers` pelo provedor ativo. Quem não vier é anotado em SAUDE."""
+    with METRICAS.cronometro(f"busca.{interval}"):
+        resultado = provedor_atual().historico(tickers, period=period, interval=interval, start=start)
+    SAUDE.observar(tickers, resultado)
+    return resultado
+
+# =======================
+# FIXTURES
+# =======================
+
+def _salvar(diretorio: str, interval: str, sym: str, df: pd.DataFrame):
+    pasta = os.path.join(diretorio, interval)
+    os.makedirs(pasta, exist_ok=True)
+    df.to_parquet(os.path.join(pasta, f"{sym}.parquet"))
+
+def gravar_fixture(diretorio: str, tickers: list[str], janelas: dict[str, str] = JANELAS_FIXTURE):
+    """Grava o histórico atual do Yahoo em `diretorio` para replay offline."""
+    yahoo = ProvedorYahoo()
+    for interval, period in janelas.items():
+        for sym, df in yahoo.historico(tickers, period, interval).items():
+            _salvar(diretorio, interval, sym, df)
+
+def _serie_sintetica(rng: np.random.Generator, indice: pd.DatetimeIndex, vol: float) -> pd.DataFrame:
+    """Passeio aleatório log-normal com OHLCV coerente (High >= Open/Close >= Low)."""
+    n = len(indice)
+    preco_inicial = rng.uniform(10, 400)
+    tendencia = rng.normal(0, vol / 10)
+    retornos = rng.normal(tendencia, vol, n)
+    close = preco_inicial * np.exp(np.cumsum(retornos))
+    open_ = np.concatenate([[preco_inicial], close[:-1]]) * np.exp(rng.normal(0, vol / 4, n))
+    alto = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, vol / 2, n)))
+    baixo = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, vol / 2, n)))
+    volume = rng.integers(10_000, 5_000_000, n).astype(float)
+    return pd.DataFrame({"Open": open_, "High": alto, "Low": baixo, "Close": close, "Volume": volume},
+                        index=indice)
+
+def _indices_sinteticos(fim: pd.Timestamp) -> dict[str, pd.DatetimeIndex]:
+    dias_1h = pd.bdate_range(end=fim, periods=505)
+    horas = [pd.Timestamp(f"{d.date()} {h}") for d in dias_1h for h in HORAS_H1]
+    return {
+        "1h": pd.DatetimeIndex(horas).tz_localize(FUSO_BOLSA),
+        "1d": pd.bdate_range(end=fim, periods=252 * 20).tz_localize(FUSO_BOLSA),
+    }
+
+def gerar_fixture(diretorio: str, tickers: list[str], semente: int = 0,
+                  fim: pd.Timestamp | None = None):
+    """
+    Gera OHLCV sintético para `tickers` em 1h, 1d, 1wk e 1mo. Cada símbolo
+    tem sua própria semente (derivada de `semente` + nome), então a fixture
+    é reprodutível e não muda quando o universo cresce. W1/MN são agregados
+    do D1 sintético.
+    """
+    from reamostragem import para_mensal, para_semanal
+
+    if fim is None:
+        # Último pregão já encerrado — nenhuma barra da fixture fica "aberta"
+        fim = pd.Timestamp.now(tz=FUSO_BOLSA).normalize().tz_localize(None) - pd.offsets.BDay(1)
+    indices = _indices_sinteticos(fim)
+
+    for sym in tickers:
+        rng = np.random.default_rng([semente, zlib.crc32(sym.encode())])
+        h1 = _serie_sintetica(rng, indices["1h"], vol=0.006)
+        d1 = _serie_sintetica(rng, indices["1d"], vol=0.018)
+        _salvar(diretorio, "1h", sym, h1)
+        _salvar(diretorio, "1d", sym, d1)
+        _salvar(diretorio, "1wk", sym, para_semanal(d1))
+        _salvar(diretorio, "1mo", sym, para_mensal(d1))
@@ -1,37 +1,43 @@
 import os
+import sys
 import datetime
 import zoneinfo
-import yfinance as yf
-import requests
-import pandas as pd
 
-# — Secrets do GitHub Actions
-TELEGRAM_TOKEN   = os.environ["TELEGRAM_TOKEN"]
-TELEGRAM_CHAT_ID = os.environ["TELEGRAM_CHAT_ID"]
+import calendario
+from armazem import ArmazemBarras
+from dados import historico_simbolo, recortar
+from etapas import Etapa, executar_etapas, somar_relatorios
+from fatias import Fatia, argumentos
+from indicadores import estados_atualizados, ultimos_valores
+from metricas import DEBUG, debug
+from prazo import em_blocos
+from prioridade import carregar_fila, gravar_fila, ordenar_fila
+from provedores import buscar_historico
+from radares import Estrategia, Indicador, Requisito, executar
+from reamostragem import VALIDAR, derivar, para_semanal, validar_contra_yahoo
+from saude import isolar_falhas
+from telegram_cliente import destinos_do_ambiente, enviar
+from triagem import closes_crescentes, direcao_barras, montar_painel, resumo_medias, triagem_3ws
+
+# — Secrets do GitHub Actions: TELEGRAM_TOKEN e TELEGRAM_CHAT_ID são lidos no envio
+#   (send_telegram), não no import — benchmark, backtest e workers rodam sem eles
 
 # =========================
 # CONFIGURAÇÕES
 # =========================
-EMA_FAST  = 21
-EMA_MID   = 120
-SMA_LONG  = 200
+# Períodos das médias (EMA21/EMA120/SMA200) ficam em triagem.py
 
 PRECO_MIN_USD = 50.0
 
-# Modo debug: imprime diagnóstico detalhado de cada ticker no log do GitHub Actions
-# (NÃO afeta a mensagem do Telegram, só aparece nos logs da execução)
-DEBUG = True
+# Diagnóstico por ticker: RADAR_DEBUG=1 (ver metricas.py)
+
+# Janela baixada para as etapas de preço e padrão — só as últimas barras (D1)
+JANELA_CURTA = "10d"
 
 # Padrão das últimas 4 barras FECHADAS no D1
 # False = bear (close < open) | True = bull (close > open)
 PADRAO_BARRAS = [False, True, True, True]  # bear, bull, bull, bull
 
-# Horário de fechamento do mercado americano em UTC
-# NYSE/NASDAQ fecha às 21:00 UTC (16:00 ET / 20:00 UTC com horário de verão EUA)
-# Usamos 21:00 UTC como referência segura — o radar roda às 21:30 UTC (18:30 BRT)
-# então o mercado JÁ está fechado e a última barra D1 está 100% fechada
-MERCADO_FECHA_UTC = datetime.time(21, 0)
-
 TICKERS = [
     "AA","AAPL","ABBV","ABNB","ACN","ADBE","ADI","ADP","AEP","AIG","AKAM","AMAT","AMD",
     "AMGN","AMT","AMZN","ANET","APPN","APPS","ATR","AVGO","AVY","AWK","AXON",
@@ -65,204 +71,205 @@ TICKERS = [
 # =======================
 
 def send_telegram(msg: str):
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {"chat_id": TELEGRAM_CHAT_ID, "text": msg, "parse_mode": "Markdown"}
-    try:
-        requests.post(url, json=payload, timeout=20)
-    except Exception as e:
-        print(f"Erro Telegram: {e}")
-
-def safe_float(x):
-    try:
-        return float(x)
-    except Exception:
-        return None
+    # Pool de conexões, divisão em partes de até 4096 caracteres e retry de 429
+    enviar(msg, destinos_do_ambiente(), os.environ["TELEGRAM_TOKEN"])
 
 def mercado_fechado() -> bool:
     """
-    Retorna True se o mercado americano já fechou hoje (após 21:00 UTC).
-    O radar roda às 21:30 UTC (18:30 BRT), então sempre será True em produção.
-    Mantido aqui para deixar a lógica explícita caso alguém rode manualmente.
+    Retorna True se o pregão de hoje já encerrou (ou não houve pregão).
+    O fechamento vem da tabela de sessões — 20:00 ou 21:00 UTC conforme o
+    horário de verão americano, mais cedo nos meios-pregões.
     """
-    agora_utc = datetime.datetime.now(datetime.timezone.utc).time()
-    return agora_utc >= MERCADO_FECHA_UTC
-
-def get_last_price_usd(ticker: yf.Ticker):
-    try:
-        info = ticker.fast_info
-        if hasattr(info, "last_price") and info.last_price is not None:
-            return safe_float(info.last_price)
-    except Exception:
-        pass
-    try:
-        p = ticker.info.get("regularMarketPrice")
-        if p is not None:
-            return safe_float(p)
-    except Exception:
-        pass
-    try:
-        df = ticker.history(period="10d", interval="1d", auto_adjust=True)
-        if df is not None and not df.empty:
-            return safe_float(df["Close"].iloc[-1])
-    except Exception:
-        pass
-    return None
-
-def check_symbol(sym: str) -> bool:
-    ticker = yf.Ticker(sym)
-
-    def dbg(msg):
-        if DEBUG:
-            print(f"    [{sym}] {msg}")
-
-    # 0) Preço mínimo
-    last_price = get_last_price_usd(ticker)
-    if last_price is None or last_price < PRECO_MIN_USD:
-        dbg(f"REPROVADO — preço ({last_price}) abaixo de {PRECO_MIN_USD}")
-        return False
-
-    # 1) Histórico
-    df_d = ticker.history(period="600d", interval="1d",  auto_adjust=True)
-    df_w = ticker.history(period="7y",   interval="1wk", auto_adjust=True)
-
-    if df_d is None or df_w is None or df_d.empty or df_w.empty:
-        dbg("REPROVADO — histórico vazio")
-        return False
-    if len(df_d) < 205 or len(df_w) < 205:
-        dbg(f"REPROVADO — histórico insuficiente (D1={len(df_d)}, W1={len(df_w)})")
-        return False
-
-    # Médias D1
-    df_d["ema21"]  = df_d["Close"].ewm(span=EMA_FAST, adjust=False).mean()
-    df_d["ema120"] = df_d["Close"].ewm(span=EMA_MID,  adjust=False).mean()
-    df_d["sma200"] = df_d["Close"].rolling(window=SMA_LONG).mean()
-
-    # Médias W1
-    df_w["ema21"]  = df_w["Close"].ewm(span=EMA_FAST, adjust=False).mean()
-    df_w["ema120"] = df_w["Close"].ewm(span=EMA_MID,  adjust=False).mean()
-    df_w["sma200"] = df_w["Close"].rolling(window=SMA_LONG).mean()
-
-    ld = df_d.iloc[-1]
-    lw = df_w.iloc[-1]
-
-    if DEBUG:
-        dbg(f"última barra D1: {df_d.index[-1].date()}  Close={ld['Close']:.2f}")
-        dbg(f"última barra W1: {df_w.index[-1].date()}  Close={lw['Close']:.2f}")
-
-    # Preço acima das 3 médias no D1
-    cond_d_21  = ld["Close"] > ld["ema21"]
-    cond_d_120 = ld["Close"] > ld["ema120"]
-    cond_d_200 = ld["Close"] > ld["sma200"]
-    cond_d = cond_d_21 and cond_d_120 and cond_d_200
+    return calendario.mercado_fechado()
 
-    # Preço acima das 3 médias no W1
-    cond_w_21  = lw["Close"] > lw["ema21"]
-    cond_w_120 = lw["Close"] > lw["ema120"]
-    cond_w_200 = lw["Close"] > lw["sma200"]
-    cond_w = cond_w_21 and cond_w_120 and cond_w_200
-
-    if DEBUG:
-        dbg(
-            f"D1 médias -> ema21:{'OK' if cond_d_21 else 'FALHA'} "
-            f"ema120:{'OK' if cond_d_120 else 'FALHA'} "
-            f"sma200:{'OK' if cond_d_200 else 'FALHA'} "
-            f"(close={ld['Close']:.2f} ema21={ld['ema21']:.2f} "
-            f"ema120={ld['ema120']:.2f} sma200={ld['sma200']:.2f})"
-        )
-        dbg(
-            f"W1 médias -> ema21:{'OK' if cond_w_21 else 'FALHA'} "
-            f"ema120:{'OK' if cond_w_120 else 'FALHA'} "
-            f"sma200:{'OK' if cond_w_200 else 'FALHA'} "
-            f"(close={lw['Close']:.2f} ema21={lw['ema21']:.2f} "
-            f"ema120={lw['ema120']:.2f} sma200={lw['sma200']:.2f})"
-        )
-
-    if not (cond_d and cond_w):
-        dbg("REPROVADO — não está acima das 3 médias em D1 e/ou W1")
-        return False
-
-    # --- Padrão das últimas 4 barras FECHADAS no D1 ---
-    if len(df_d) < 4:
-        dbg("REPROVADO — menos de 4 barras D1 disponíveis")
-        return False
+def carregar_curto(simbolos: list[str], historicos: dict | None = None,
+                   armazem: ArmazemBarras | None = None) -> dict:
+    """
+    Janela curta de D1 — só o suficiente para as últimas barras do padrão.
+    Com `armazem`, passa por ele (numa execução com o S1, sai do D1 já carregado).
+    """
+    if historicos is not None:
+        return {sym: historico_simbolo(sym, "600d", "1d", historicos) for sym in simbolos}
+    if armazem is not None:
+        return armazem.recente(simbolos, JANELA_CURTA, "1d")
+    return buscar_historico(simbolos, period=JANELA_CURTA, interval="1d")
+
+def carregar_completo(simbolos: list[str], historicos: dict | None = None,
+                      armazem: ArmazemBarras | None = None) -> dict:
+    """
+    Histórico longo: D1 de 600d e W1 derivado de 7 anos de D1.
+    Com `armazem`, só as barras que ainda não estão gravadas são baixadas.
+    """
+    if historicos is not None:
+        return {
+            "1d":  {sym: historico_simbolo(sym, "600d", "1d",  historicos) for sym in simbolos},
+            "1wk": {sym: historico_simbolo(sym, "7y",   "1wk", historicos) for sym in simbolos},
+        }
+
+    if armazem is not None:
+        diario = armazem.atualizar(simbolos, period="7y", interval="1d")
+    else:
+        diario = buscar_historico(simbolos, period="7y", interval="1d")
+    # Só o D1 é baixado — o W1 é derivado localmente do mesmo histórico
+    completo = {
+        "1d":  {sym: recortar(df, "600d") for sym, df in diario.items()},
+        "1wk": derivar(diario, para_semanal),
+    }
+    if VALIDAR:
+        validar_contra_yahoo(completo["1wk"], period="7y", interval="1wk")
+    return completo
 
-    ultimas_4 = df_d.iloc[-4:]  # as 4 barras mais recentes, todas fechadas
+# =======================
+# ETAPAS (mais barata primeiro)
+# =======================
 
+def etapa_preco(simbolos: list[str], dados: dict) -> list[bool]:
+    """
+    0) Preço mínimo — último close da janela curta, já baixada em lote para o
+    padrão. Nenhuma requisição extra por símbolo (fast_info/info/history).
+    """
+    aprovados = []
+    for sym in simbolos:
+        df = dados["curto"].get(sym)
+        last_price = None if df is None or df.empty else float(df["Close"].iloc[-1])
+        ok = last_price is not None and last_price >= PRECO_MIN_USD
+        if not ok:
+            debug(sym, lambda: f"REPROVADO — preço ({last_price}) abaixo de {PRECO_MIN_USD}")
+        aprovados.append(ok)
+    return aprovados
+
+def etapa_padrao(simbolos: list[str], dados: dict):
+    """1) Padrão das últimas barras FECHADAS no D1 — só precisa da janela curta."""
+    painel = montar_painel(dados["curto"], simbolos, janela=len(PADRAO_BARRAS))
+    direcao = direcao_barras(painel["Open"], painel["Close"], PADRAO_BARRAS)
+    crescente = closes_crescentes(painel["Close"], len(PADRAO_BARRAS))
     if DEBUG:
-        for i, (idx, row) in enumerate(ultimas_4.iterrows()):
-            real_bull = row["Close"] > row["Open"]
-            esperado  = "bull" if PADRAO_BARRAS[i] else "bear"
-            real      = "bull" if real_bull else "bear"
-            ok_dir    = "OK" if real_bull == PADRAO_BARRAS[i] else "FALHA"
-            dbg(
-                f"barra[{i}] {idx.date()} O={row['Open']:.2f} C={row['Close']:.2f} "
-                f"-> {real} (esperado {esperado}) [{ok_dir}]"
-            )
-
-    # 1) Verificar direção de cada barra (bear/bull)
-    for i, (_, row) in enumerate(ultimas_4.iterrows()):
-        esperado_bull = PADRAO_BARRAS[i]
-        real_bull     = row["Close"] > row["Open"]
-        if real_bull != esperado_bull:
-            dbg("REPROVADO — padrão de direção das barras não corresponde")
-            return False
-
-    # 2) Verificar fechamentos crescentes APENAS entre as 3 barras bull
-    #    (close[1] < close[2] < close[3]) — ignora o close da barra bear (índice 0),
-    #    pois é comum a 1ª barra bull fechar abaixo do close da barra bear anterior
-    #    (gap down + recuperação parcial) e ainda assim configurar o padrão.
-    closes = ultimas_4["Close"].values
-    closes_bull = closes[1:]  # close[1], close[2], close[3]
+        for j, sym in enumerate(simbolos):
+            if not direcao[j]:
+                debug(sym, "REPROVADO — padrão de direção das barras não corresponde")
+            elif not crescente[j]:
+                debug(sym, "REPROVADO — closes das barras bull não são estritamente crescentes")
+    return direcao & crescente
+
+def etapa_medias(simbolos: list[str], dados: dict, armazem: ArmazemBarras | None = None):
+    """2) Close acima das 3 médias no D1 e no W1 — precisa do histórico longo."""
+    diario, semanal = dados["completo"]["1d"], dados["completo"]["1wk"]
+
+    # Médias incrementais (O(1) por barra nova) quando há armazém
+    ind_s = ind_v = janela = None
+    if armazem is not None:
+        ind_s = ultimos_valores(estados_atualizados(armazem, diario, "1d", "600d"), diario, simbolos)
+        ind_v = ultimos_valores(estados_atualizados(armazem, semanal, "1wk", "7y"), semanal, simbolos)
+        janela = len(PADRAO_BARRAS)
+
+    painel_s = montar_painel(diario, simbolos, janela=janela)
+    painel_v = montar_painel(semanal, simbolos, janela=janela)
+    res = triagem_3ws(painel_s, painel_v, PADRAO_BARRAS, ind_sinal=ind_s, ind_vies=ind_v)
+    aprovado = res["historico"] & res["medias"]
 
     if DEBUG:
-        seq = " -> ".join(f"{c:.2f}" for c in closes)
-        seq_bull = " -> ".join(f"{c:.2f}" for c in closes_bull)
-        crescente = all(closes_bull[i] > closes_bull[i-1] for i in range(1, len(closes_bull)))
-        dbg(f"closes (4 barras): {seq}")
-        dbg(f"closes bull (1-3): {seq_bull}  (crescente: {'OK' if crescente else 'FALHA'})")
-
-    for i in range(1, len(closes_bull)):
-        if closes_bull[i] <= closes_bull[i - 1]:
-            dbg("REPROVADO — closes das barras bull não são estritamente crescentes")
-            return False
+        for j, sym in enumerate(simbolos):
+            if not res["historico"][j]:
+                debug(sym, f"REPROVADO — histórico insuficiente (D1={painel_s['barras'][j]}, W1={painel_v['barras'][j]})")
+                continue
+            debug(sym, f"D1 {resumo_medias(painel_s, res['ind_sinal'], j)}")
+            debug(sym, f"W1 {resumo_medias(painel_v, res['ind_vies'], j)}")
+            if aprovado[j]:
+                debug(sym, "APROVADO — todas as condições atendidas")
+            else:
+                debug(sym, "REPROVADO — não está acima das 3 médias em D1 e/ou W1")
+    return aprovado
 
-    dbg("APROVADO — todas as condições atendidas")
-    return True
+def avaliar_universo(simbolos: list[str], historicos: dict | None = None,
+                     armazem: ArmazemBarras | None = None) -> tuple[list[str], list[dict]]:
+    """
+    Roda a regra 3WS (D1 sinal + W1 viés) em etapas — preço, padrão das
+    últimas barras (janela curta) e médias (histórico longo) — e devolve os
+    símbolos que deram sinal, na ordem recebida, e o relatório por etapa.
+    O histórico longo só é carregado para quem passou nas etapas baratas.
+    """
+    etapas = [
+        Etapa("preço",  ["curto"],    etapa_preco),
+        Etapa("padrão", ["curto"],    etapa_padrao),
+        Etapa("médias", ["completo"], lambda s, d: etapa_medias(s, d, armazem)),
+    ]
+    fontes = {
+        "curto":    lambda s: carregar_curto(s, historicos, armazem),
+        "completo": lambda s: carregar_completo(s, historicos, armazem),
+    }
+    return executar_etapas(simbolos, etapas, fontes)
+
+def check_symbol(sym: str, historicos: dict | None = None) -> bool:
+    """Regra 3WS para um único símbolo — atalho para avaliar_universo([sym])."""
+    hits, _ = avaliar_universo([sym], historicos)
+    return bool(hits)
 
 # =======================
 # EXECUÇÃO DIRETA
 # =======================
 
-def main():
-    tz_brt = zoneinfo.ZoneInfo("America/Sao_Paulo")
-    agora  = datetime.datetime.now(tz_brt)
-    hoje   = agora.strftime("%d/%m/%Y %H:%M")
-
-    print(f"[{hoje}] Iniciando radar...")
-
-    hits = []
-    for sym in TICKERS:
-        try:
-            if check_symbol(sym):
-                hits.append(sym)
-                print(f"  ✅ {sym}")
-            else:
-                print(f"  — {sym}")
-        except Exception as e:
-            print(f"  ⚠️  {sym}: {e}")
-
+def rodar(simbolos: list[str], armazem: ArmazemBarras, prazo, fila_nome: str = "d1") -> dict:
+    """
+    Avalia `simbolos` em blocos na ordem de prioridade da fila `fila_nome`
+    até o prazo acabar. Devolve os hits (na ordem de `simbolos`), o
+    relatório por etapa e os símbolos que ficaram sem avaliação, no formato
+    de radares.Estrategia.
+    """
+    fila = carregar_fila(fila_nome)
+    ordem = ordenar_fila(simbolos, fila)
+    avaliar_bloco = isolar_falhas(lambda bloco: avaliar_universo(bloco, armazem=armazem))
+    blocos, pendentes = em_blocos(ordem, avaliar_bloco, prazo)
+    blocos = [r for partes in blocos for r in partes]
+    sinais = {sym for hits_bloco, _ in blocos for sym in hits_bloco}
+    hits = [sym for sym in simbolos if sym in sinais]
+    sem_avaliacao = set(pendentes)
+    gravar_fila(fila_nome, fila, [sym for sym in ordem if sym not in sem_avaliacao], hits, pendentes)
+    return {"sinais": {"sinais": hits}, "relatorio": somar_relatorios([rel for _, rel in blocos]),
+            "pendentes": pendentes, "extra": {}}
+
+def montar_mensagem(hoje: str, hits: list[str]) -> str:
     if hits:
-        msg = (
+        return (
             f"*Radar 3WS Diário — {hoje}*\n\n"
             f"*Sinais:* {', '.join(hits)}"
         )
-    else:
-        msg = (
-            f"*Radar 3WS Diário — {hoje}*\n\n"
-            f"Nenhum sinal hoje."
-        )
-    send_telegram(msg)
-    print(f"\n[{hoje}] Finalizado. {len(hits)} sinal(is) enviado(s).")
+    return (
+        f"*Radar 3WS Diário — {hoje}*\n\n"
+        f"Nenhum sinal hoje."
+    )
+
+def mensagem(agora: datetime.datetime, sinais: dict[str, list[str]]) -> str:
+    hoje = agora.astimezone(zoneinfo.ZoneInfo("America/Sao_Paulo")).strftime("%d/%m/%Y %H:%M")
+    return montar_mensagem(hoje, sinais["sinais"])
+
+def ativa(agora: datetime.datetime) -> bool:
+    # No agendamento (dias úteis), pula feriado da bolsa sem importar nada pesado
+    return not (os.environ.get("GITHUB_EVENT_NAME") == "schedule" and not calendario.dia_de_pregao(agora))
+
+ESTRATEGIA = Estrategia(
+    nome="d1",
+    titulo="radar 3WS diário",
+    modulo=sys.modules[__name__],
+    tickers=TICKERS,
+    categorias=("sinais",),
+    # Janela curta para o universo (preço e padrão) e histórico longo só
+    # para quem passar — o W1 é derivado do mesmo D1
+    requisitos=[
+        Requisito("1d", JANELA_CURTA, universo=True),
+        Requisito("1d", "7y", armazenado=True),
+    ],
+    indicadores=[Indicador("1d", "600d"), Indicador("1wk", "7y")],
+    rodar=rodar,
+    mensagem=mensagem,
+    ativa=ativa,
+)
+
+def main(fatia: Fatia | None = None, juntar_total: int | None = None):
+    # Preço e padrão para todos, médias só para quem passar, baixando só as
+    # barras que ainda não estão no armazém local; com prazo, em blocos na
+    # ordem de prioridade até o tempo acabar (ver radares.executar)
+    executar([ESTRATEGIA], fatia, juntar_total)
 
 if __name__ == "__main__":
-    main()
+    args = argumentos("Radar 3WS diário").parse_args()
+    main(args.fatia, args.juntar)
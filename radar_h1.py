@@ -1,37 +1,79 @@
+from __future__ import annotations
+
 import os
+import sys
+import json
+import time
 import datetime
 import zoneinfo
-import yfinance as yf
-import requests
-import pandas as pd
 
-# — Secrets do GitHub Actions
-TELEGRAM_TOKEN         = os.environ["TELEGRAM_TOKEN"]
-TELEGRAM_CHAT_ID_H1    = os.environ["TELEGRAM_CHAT_ID_H1"]
-TELEGRAM_THREAD_ID_H1  = os.environ.get("TELEGRAM_THREAD_ID_H1")  # opcional — tópico do grupo
+import calendario
+from armazem import DIRETORIO_PADRAO, ArmazemBarras
+from dados import historico_simbolo, recortar
+from etapas import Etapa, executar_etapas, somar_relatorios
+from fatias import Fatia, argumentos
+from fluxo import AgregadorBarras, FeedNegocios, feed_padrao
+from indicadores import estados_atualizados, ultimos_valores
+from metricas import DEBUG, METRICAS, debug
+from prazo import Prazo, em_blocos
+from prioridade import carregar_fila, gravar_fila, ordenar_fila
+from provedores import buscar_historico
+from radares import Estrategia, Indicador, Requisito, executar
+from reamostragem import VALIDAR, acrescentar, derivar, para_diario, somar_ao_diario, validar_contra_yahoo
+from saude import SAUDE, carregar_saude, gravar_saude, isolar_falhas, resumo_quarentena, separar
+from tardio import tardio
+from telegram_cliente import destinos_do_ambiente, enviar
+from triagem import acima_das_medias, closes_crescentes, direcao_barras, montar_painel, resumo_medias, triagem_3ws
+
+pd = tardio("pandas")
+
+# — Secrets do GitHub Actions: TELEGRAM_TOKEN, TELEGRAM_CHAT_ID_H1 e o tópico
+#   opcional TELEGRAM_THREAD_ID_H1 são lidos no envio (send_telegram), não no
+#   import — benchmark, backtest e workers rodam sem eles
 
 # =========================
 # CONFIGURAÇÕES
 # =========================
-EMA_FAST  = 21
-EMA_MID   = 120
-SMA_LONG  = 200
+# Períodos das médias (EMA21/EMA120/SMA200) ficam em triagem.py
 
 PRECO_MIN_USD = 50.0
 
-# Modo debug: imprime diagnóstico detalhado de cada ticker no log do GitHub Actions
-# (NÃO afeta a mensagem do Telegram, só aparece nos logs da execução)
-DEBUG = True
+# Diagnóstico por ticker: RADAR_DEBUG=1 (ver metricas.py)
+
+# Janela baixada para as etapas de preço e padrão — só as últimas barras (H1)
+JANELA_CURTA = "5d"
 
 # Padrão das últimas 4 barras FECHADAS no H1
 # False = bear (close < open) | True = bull (close > open)
 PADRAO_BARRAS = [False, True, True, True]  # bear, bull, bull, bull
 
-# Horário de fechamento do mercado americano em UTC
-# NYSE/NASDAQ fecha às 21:00 UTC (16:00 ET / 20:00 UTC com horário de verão EUA)
-# Usamos 21:00 UTC como referência segura — o radar roda às 21:30 UTC (18:30 BRT)
-# então o mercado JÁ está fechado e a última barra H1 está 100% fechada
-MERCADO_FECHA_UTC = datetime.time(21, 0)
+# Modo daemon (python radar_h1.py --daemon): folga depois do fechamento da
+# barra antes de varrer, para o Yahoo consolidar a barra recém-fechada
+GRACA_DAEMON = datetime.timedelta(seconds=int(os.environ.get("RADAR_H1_GRACA", "90")))
+
+# Última barra varrida (daemon e execução avulsa) — evita reenviar a mesma
+# barra após reinício ({nome}: "h1", ou "h1-<i>de<K>" para um worker de fatia)
+ESTADO_DAEMON = os.path.join(DIRETORIO_PADRAO, "{nome}_daemon.json")
+
+# Execução avulsa sem barra H1 fechada desde a última varredura sai sem
+# importar pandas nem baixar nada; RADAR_H1_SEMPRE_VARRER=1 (ou --forcar) varre assim mesmo
+SEMPRE_VARRER = os.environ.get("RADAR_H1_SEMPRE_VARRER", "0") == "1"
+
+# Varredura em camadas: na primeira execução de cada pregão e depois a cada
+# VARREDURA_HORAS o universo inteiro passa pelo preço e pelas médias e gera
+# a watchlist; nas execuções intermediárias só a watchlist é reavaliada
+# (padrão das barras novas + conferência das médias de quem bater o padrão).
+# VARREDURA_HORAS=0 força a varredura completa em toda execução.
+VARREDURA_HORAS = float(os.environ.get("RADAR_H1_VARREDURA_HORAS", "3"))
+
+# Regra da watchlist: preço mínimo e Close até WATCHLIST_MARGEM abaixo das
+# 3 médias em cada timeframe de WATCHLIST_TIMEFRAMES. A folga cobre o preço
+# cruzar as médias entre uma varredura e outra — o sinal em si continua
+# exigindo Close acima das médias.
+WATCHLIST_MARGEM     = float(os.environ.get("RADAR_H1_WATCHLIST_MARGEM", "0.02"))
+WATCHLIST_TIMEFRAMES = os.environ.get("RADAR_H1_WATCHLIST_TFS", "1h,1d").split(",")
+
+ARQUIVO_WATCHLIST = os.path.join(DIRETORIO_PADRAO, "{nome}_watchlist.json")
 
 TICKERS = [
     "AA","AAPL","ABBV","ABNB","ACN","ADBE","ADI","ADP","AEP","AIG","AKAM","AMAT","AMD",
@@ -66,240 +108,524 @@ TICKERS = [
 # =======================
 
 def send_telegram(msg: str):
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {"chat_id": TELEGRAM_CHAT_ID_H1, "text": msg, "parse_mode": "Markdown"}
-    if TELEGRAM_THREAD_ID_H1:
-        payload["message_thread_id"] = TELEGRAM_THREAD_ID_H1
-    try:
-        requests.post(url, json=payload, timeout=20)
-    except Exception as e:
-        print(f"Erro Telegram: {e}")
-
-def safe_float(x):
-    try:
-        return float(x)
-    except Exception:
-        return None
+    # Pool de conexões, divisão em partes de até 4096 caracteres e retry de 429
+    enviar(msg, destinos_do_ambiente("_H1"), os.environ["TELEGRAM_TOKEN"])
 
 def mercado_fechado() -> bool:
     """
-    Retorna True se o mercado americano já fechou hoje (após 21:00 UTC).
-    Mantido aqui para diagnóstico/uso manual — a checagem real de barra
-    fechada é feita por descartar_barra_aberta(), pois agora o radar roda
-    de hora em hora durante o pregão.
+    Retorna True se o pregão de hoje já encerrou (ou não houve pregão).
+    O fechamento vem da tabela de sessões — 20:00 ou 21:00 UTC conforme o
+    horário de verão americano, mais cedo nos meios-pregões.
     """
-    agora_utc = datetime.datetime.now(datetime.timezone.utc).time()
-    return agora_utc >= MERCADO_FECHA_UTC
+    return calendario.mercado_fechado()
 
-def descartar_barra_aberta(df: pd.DataFrame) -> pd.DataFrame:
+def descartar_barra_aberta(df: pd.DataFrame, agora: pd.Timestamp | None = None) -> pd.DataFrame:
     """
     Remove a última barra do DataFrame se ela ainda não tiver fechado.
-    Uma barra H1 com horário de início `t` só fecha em `t + 1h`.
-    Compara isso com o horário atual em UTC; se a barra ainda não fechou,
-    ela é descartada para não contaminar médias/padrão com dado parcial.
+    O fechamento vem do calendário da bolsa: uma barra H1 iniciada em `t`
+    fecha em `t + 1h`, exceto a última do pregão, que fecha junto com a
+    sessão (ex.: 13:00 ET num meio-pregão). Barra ainda aberta é descartada
+    para não contaminar médias/padrão com dado parcial.
     """
     if df is None or df.empty:
         return df
-
-    agora_utc = pd.Timestamp.now(tz="UTC")
-    ultimo_idx = df.index[-1]
-
-    # Garante que o timestamp do índice tenha timezone para comparar com agora_utc
-    if ultimo_idx.tzinfo is None:
-        ultimo_idx = ultimo_idx.tz_localize("UTC")
-
-    fechamento_barra = ultimo_idx + pd.Timedelta(hours=1)
-
-    if fechamento_barra > agora_utc:
+    if not calendario.barra_fechada(df.index[-1], agora):
         df = df.iloc[:-1]
-
     return df
 
-def get_last_price_usd(ticker: yf.Ticker):
-    try:
-        info = ticker.fast_info
-        if hasattr(info, "last_price") and info.last_price is not None:
-            return safe_float(info.last_price)
-    except Exception:
-        pass
-    try:
-        p = ticker.info.get("regularMarketPrice")
-        if p is not None:
-            return safe_float(p)
-    except Exception:
-        pass
-    try:
-        df = ticker.history(period="10d", interval="1d", auto_adjust=True)
-        if df is not None and not df.empty:
-            return safe_float(df["Close"].iloc[-1])
-    except Exception:
-        pass
-    return None
-
-def check_symbol(sym: str) -> bool:
-    ticker = yf.Ticker(sym)
-
-    def dbg(msg):
-        if DEBUG:
-            print(f"    [{sym}] {msg}")
-
-    # 0) Preço mínimo
-    last_price = get_last_price_usd(ticker)
-    if last_price is None or last_price < PRECO_MIN_USD:
-        dbg(f"REPROVADO — preço ({last_price}) abaixo de {PRECO_MIN_USD}")
-        return False
-
-    # 1) Histórico
-    # H1 (sinal) — Yahoo limita dados intraday de 1h a ~730 dias
-    df_h = ticker.history(period="730d", interval="1h", auto_adjust=True)
-    # D1 (viés)
-    df_d = ticker.history(period="600d", interval="1d", auto_adjust=True)
-
-    if df_h is None or df_d is None or df_h.empty or df_d.empty:
-        dbg("REPROVADO — histórico vazio")
-        return False
-
-    # Descarta a barra H1 em formação (ainda não fechada) — essencial agora
-    # que o radar roda de hora em hora, inclusive durante o pregão
-    antes = len(df_h)
-    df_h = descartar_barra_aberta(df_h)
-    if DEBUG and len(df_h) < antes:
-        dbg(f"barra H1 aberta descartada (última barra fechada: {df_h.index[-1]})")
-    if len(df_h) < 205 or len(df_d) < 205:
-        dbg(f"REPROVADO — histórico insuficiente (H1={len(df_h)}, D1={len(df_d)})")
-        return False
-
-    # Médias H1
-    df_h["ema21"]  = df_h["Close"].ewm(span=EMA_FAST, adjust=False).mean()
-    df_h["ema120"] = df_h["Close"].ewm(span=EMA_MID,  adjust=False).mean()
-    df_h["sma200"] = df_h["Close"].rolling(window=SMA_LONG).mean()
-
-    # Médias D1
-    df_d["ema21"]  = df_d["Close"].ewm(span=EMA_FAST, adjust=False).mean()
-    df_d["ema120"] = df_d["Close"].ewm(span=EMA_MID,  adjust=False).mean()
-    df_d["sma200"] = df_d["Close"].rolling(window=SMA_LONG).mean()
-
-    lh = df_h.iloc[-1]
-    ld = df_d.iloc[-1]
-
-    if DEBUG:
-        dbg(f"última barra H1: {df_h.index[-1]}  Close={lh['Close']:.2f}")
-        dbg(f"última barra D1: {df_d.index[-1].date()}  Close={ld['Close']:.2f}")
+# =======================
+# DADOS POR ETAPA
+# =======================
 
-    # Preço acima das 3 médias no H1
-    cond_h_21  = lh["Close"] > lh["ema21"]
-    cond_h_120 = lh["Close"] > lh["ema120"]
-    cond_h_200 = lh["Close"] > lh["sma200"]
-    cond_h = cond_h_21 and cond_h_120 and cond_h_200
+def carregar_curto(simbolos: list[str], historicos: dict | None = None,
+                   armazem: ArmazemBarras | None = None) -> dict:
+    """Janela curta de H1 — só o suficiente para as últimas barras do padrão."""
+    if historicos is not None:
+        brutos = {sym: historico_simbolo(sym, "730d", "1h", historicos) for sym in simbolos}
+    elif armazem is not None:
+        brutos = armazem.recente(simbolos, JANELA_CURTA, "1h")
+    else:
+        brutos = buscar_historico(simbolos, period=JANELA_CURTA, interval="1h")
+
+    curto = {}
+    for sym, df in brutos.items():
+        # Descarta a barra H1 em formação (ainda não fechada) — essencial agora
+        # que o radar roda de hora em hora, inclusive durante o pregão
+        fechado = descartar_barra_aberta(df)
+        if df is not None and len(fechado) < len(df) and len(fechado):
+            debug(sym, lambda: f"barra H1 aberta descartada (última barra fechada: {fechado.index[-1]})")
+        curto[sym] = fechado
+    return curto
+
+def carregar_completo(simbolos: list[str], historicos: dict | None = None,
+                      armazem: ArmazemBarras | None = None) -> dict:
+    """
+    Histórico longo: H1 de 730d (só as barras fechadas) e D1 derivado dele.
+    Com `armazem`, só as barras que ainda não estão gravadas são baixadas.
+    """
+    if historicos is not None:
+        return {
+            "1h": {sym: descartar_barra_aberta(historico_simbolo(sym, "730d", "1h", historicos)) for sym in simbolos},
+            "1d": {sym: historico_simbolo(sym, "600d", "1d", historicos) for sym in simbolos},
+        }
+
+    if armazem is not None:
+        horario = armazem.atualizar(simbolos, period="730d", interval="1h")
+    else:
+        horario = buscar_historico(simbolos, period="730d", interval="1h")
+    # Só o H1 é baixado — o D1 é derivado localmente do mesmo histórico
+    completo = {
+        "1h": {sym: descartar_barra_aberta(df) for sym, df in horario.items()},
+        "1d": {sym: recortar(df, "600d") for sym, df in derivar(horario, para_diario).items()},
+    }
+    if VALIDAR:
+        validar_contra_yahoo(completo["1d"], period="600d", interval="1d")
+    return completo
 
-    # Preço acima das 3 médias no D1
-    cond_d_21  = ld["Close"] > ld["ema21"]
-    cond_d_120 = ld["Close"] > ld["ema120"]
-    cond_d_200 = ld["Close"] > ld["sma200"]
-    cond_d = cond_d_21 and cond_d_120 and cond_d_200
+# =======================
+# ETAPAS (mais barata primeiro)
+# =======================
 
+def etapa_preco(simbolos: list[str], dados: dict) -> list[bool]:
+    """
+    0) Preço mínimo — último close da janela curta, já baixada em lote para o
+    padrão. Nenhuma requisição extra por símbolo (fast_info/info/history).
+    """
+    aprovados = []
+    for sym in simbolos:
+        df = dados["curto"].get(sym)
+        last_price = None if df is None or df.empty else float(df["Close"].iloc[-1])
+        ok = last_price is not None and last_price >= PRECO_MIN_USD
+        if not ok:
+            debug(sym, lambda: f"REPROVADO — preço ({last_price}) abaixo de {PRECO_MIN_USD}")
+        aprovados.append(ok)
+    return aprovados
+
+def etapa_padrao(simbolos: list[str], dados: dict):
+    """1) Padrão das últimas barras FECHADAS no H1 — só precisa da janela curta."""
+    painel = montar_painel(dados["curto"], simbolos, janela=len(PADRAO_BARRAS))
+    direcao = direcao_barras(painel["Open"], painel["Close"], PADRAO_BARRAS)
+    crescente = closes_crescentes(painel["Close"], len(PADRAO_BARRAS))
     if DEBUG:
-        dbg(
-            f"H1 médias -> ema21:{'OK' if cond_h_21 else 'FALHA'} "
-            f"ema120:{'OK' if cond_h_120 else 'FALHA'} "
-            f"sma200:{'OK' if cond_h_200 else 'FALHA'} "
-            f"(close={lh['Close']:.2f} ema21={lh['ema21']:.2f} "
-            f"ema120={lh['ema120']:.2f} sma200={lh['sma200']:.2f})"
-        )
-        dbg(
-            f"D1 médias -> ema21:{'OK' if cond_d_21 else 'FALHA'} "
-            f"ema120:{'OK' if cond_d_120 else 'FALHA'} "
-            f"sma200:{'OK' if cond_d_200 else 'FALHA'} "
-            f"(close={ld['Close']:.2f} ema21={ld['ema21']:.2f} "
-            f"ema120={ld['ema120']:.2f} sma200={ld['sma200']:.2f})"
-        )
-
-    if not (cond_h and cond_d):
-        dbg("REPROVADO — não está acima das 3 médias em H1 e/ou D1")
-        return False
-
-    # --- Padrão das últimas 4 barras FECHADAS no H1 ---
-    if len(df_h) < 4:
-        dbg("REPROVADO — menos de 4 barras H1 disponíveis")
-        return False
-
-    ultimas_4 = df_h.iloc[-4:]  # as 4 barras mais recentes, todas fechadas
+        for j, sym in enumerate(simbolos):
+            if not direcao[j]:
+                debug(sym, "REPROVADO — padrão de direção das barras não corresponde")
+            elif not crescente[j]:
+                debug(sym, "REPROVADO — closes das barras bull não são estritamente crescentes")
+    return direcao & crescente
+
+def _triagem_medias(simbolos: list[str], dados: dict, armazem: ArmazemBarras | None):
+    """Painéis H1/D1 da última barra e triagem_3ws com as médias (incrementais com armazém)."""
+    horario, diario = dados["completo"]["1h"], dados["completo"]["1d"]
+
+    # Médias incrementais (O(1) por barra nova) quando há armazém
+    ind_s = ind_v = janela = None
+    if armazem is not None:
+        ind_s = ultimos_valores(estados_atualizados(armazem, horario, "1h", "730d"), horario, simbolos)
+        # D1 derivado do H1: estado separado do D1 baixado direto (radar diário)
+        ind_v = ultimos_valores(estados_atualizados(armazem, diario, "1d", "600d", fonte="1h"), diario, simbolos)
+        janela = len(PADRAO_BARRAS)
+
+    painel_s = montar_painel(horario, simbolos, janela=janela)
+    painel_v = montar_painel(diario, simbolos, janela=janela)
+    res = triagem_3ws(painel_s, painel_v, PADRAO_BARRAS, ind_sinal=ind_s, ind_vies=ind_v)
+    return res, painel_s, painel_v
+
+def etapa_medias(simbolos: list[str], dados: dict, armazem: ArmazemBarras | None = None):
+    """2) Close acima das 3 médias no H1 e no D1 — precisa do histórico longo."""
+    res, painel_s, painel_v = _triagem_medias(simbolos, dados, armazem)
+    aprovado = res["historico"] & res["medias"]
 
     if DEBUG:
-        for i, (idx, row) in enumerate(ultimas_4.iterrows()):
-            real_bull = row["Close"] > row["Open"]
-            esperado  = "bull" if PADRAO_BARRAS[i] else "bear"
-            real      = "bull" if real_bull else "bear"
-            ok_dir    = "OK" if real_bull == PADRAO_BARRAS[i] else "FALHA"
-            dbg(
-                f"barra[{i}] {idx} O={row['Open']:.2f} C={row['Close']:.2f} "
-                f"-> {real} (esperado {esperado}) [{ok_dir}]"
-            )
+        for j, sym in enumerate(simbolos):
+            if not res["historico"][j]:
+                debug(sym, f"REPROVADO — histórico insuficiente (H1={painel_s['barras'][j]}, D1={painel_v['barras'][j]})")
+                continue
+            debug(sym, f"H1 {resumo_medias(painel_s, res['ind_sinal'], j)}")
+            debug(sym, f"D1 {resumo_medias(painel_v, res['ind_vies'], j)}")
+            if aprovado[j]:
+                debug(sym, "APROVADO — todas as condições atendidas")
+            else:
+                debug(sym, "REPROVADO — não está acima das 3 médias em H1 e/ou D1")
+    return aprovado
 
-    # 1) Verificar direção de cada barra (bear/bull)
-    for i, (_, row) in enumerate(ultimas_4.iterrows()):
-        esperado_bull = PADRAO_BARRAS[i]
-        real_bull     = row["Close"] > row["Open"]
-        if real_bull != esperado_bull:
-            dbg("REPROVADO — padrão de direção das barras não corresponde")
-            return False
-
-    # 2) Verificar fechamentos crescentes APENAS entre as 3 barras bull
-    #    (close[1] < close[2] < close[3]) — ignora o close da barra bear (índice 0),
-    #    pois é comum a 1ª barra bull fechar abaixo do close da barra bear anterior
-    #    (gap down + recuperação parcial) e ainda assim configurar o padrão.
-    closes = ultimas_4["Close"].values
-    closes_bull = closes[1:]  # close[1], close[2], close[3]
+def etapa_watchlist(simbolos: list[str], dados: dict, armazem: ArmazemBarras | None = None):
+    """
+    Varredura completa: histórico suficiente e Close até WATCHLIST_MARGEM
+    abaixo das 3 médias nos timeframes de WATCHLIST_TIMEFRAMES.
+    """
+    res, painel_s, painel_v = _triagem_medias(simbolos, dados, armazem)
+    aprovado = res["historico"].copy()
+    if "1h" in WATCHLIST_TIMEFRAMES:
+        aprovado &= acima_das_medias(painel_s["Close"], res["ind_sinal"], WATCHLIST_MARGEM)
+    if "1d" in WATCHLIST_TIMEFRAMES:
+        aprovado &= acima_das_medias(painel_v["Close"], res["ind_vies"], WATCHLIST_MARGEM)
+    return aprovado
+
+def _fontes(historicos: dict | None, armazem: ArmazemBarras | None) -> dict:
+    return {
+        "curto":    lambda s: carregar_curto(s, historicos, armazem),
+        "completo": lambda s: carregar_completo(s, historicos, armazem),
+    }
+
+def avaliar_universo(simbolos: list[str], historicos: dict | None = None,
+                     armazem: ArmazemBarras | None = None,
+                     dados: dict | None = None) -> tuple[list[str], list[dict]]:
+    """
+    Roda a regra 3WS (H1 sinal + D1 viés) em etapas — preço, padrão das
+    últimas barras (janela curta) e médias (histórico longo) — e devolve os
+    símbolos que deram sinal, na ordem recebida, e o relatório por etapa.
+    O histórico longo só é carregado para quem passou nas etapas baratas.
+    `dados` reaproveita fontes já carregadas (ver executar_etapas).
+    """
+    etapas = [
+        Etapa("preço",  ["curto"],    etapa_preco),
+        Etapa("padrão", ["curto"],    etapa_padrao),
+        Etapa("médias", ["completo"], lambda s, d: etapa_medias(s, d, armazem)),
+    ]
+    return executar_etapas(simbolos, etapas, _fontes(historicos, armazem), dados)
 
-    if DEBUG:
-        seq = " -> ".join(f"{c:.2f}" for c in closes)
-        seq_bull = " -> ".join(f"{c:.2f}" for c in closes_bull)
-        crescente = all(closes_bull[i] > closes_bull[i-1] for i in range(1, len(closes_bull)))
-        dbg(f"closes (4 barras): {seq}")
-        dbg(f"closes bull (1-3): {seq_bull}  (crescente: {'OK' if crescente else 'FALHA'})")
+# =======================
+# CAMADAS (varredura completa x watchlist)
+# =======================
 
-    for i in range(1, len(closes_bull)):
-        if closes_bull[i] <= closes_bull[i - 1]:
-            dbg("REPROVADO — closes das barras bull não são estritamente crescentes")
-            return False
+def _ler_watchlist(nome: str = "h1") -> dict | None:
+    try:
+        with open(ARQUIVO_WATCHLIST.format(nome=nome)) as f:
+            d = json.load(f)
+        return {"gerada_em": pd.Timestamp(d["gerada_em"]), "simbolos": d["simbolos"]}
+    except (OSError, ValueError, KeyError):
+        return None
 
-    dbg("APROVADO — todas as condições atendidas")
-    return True
+def _gravar_watchlist(simbolos: list[str], agora: pd.Timestamp, nome: str = "h1"):
+    arquivo = ARQUIVO_WATCHLIST.format(nome=nome)
+    os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+    with open(arquivo, "w") as f:
+        json.dump({"gerada_em": agora.isoformat(), "simbolos": simbolos}, f)
+
+def precisa_varredura(watchlist: dict | None, agora: pd.Timestamp) -> bool:
+    """Sem watchlist, watchlist vencida ou primeira execução do pregão de hoje."""
+    if watchlist is None:
+        return True
+    gerada = watchlist["gerada_em"]
+    if agora - gerada >= pd.Timedelta(hours=VARREDURA_HORAS):
+        return True
+    sessao = calendario.sessao(agora)
+    return sessao is not None and gerada < sessao[0] <= agora
+
+def avaliar_em_camadas(simbolos: list[str], armazem: ArmazemBarras,
+                       agora: pd.Timestamp | None = None,
+                       prazo: Prazo | None = None,
+                       nome: str = "h1") -> tuple[list[str], list[dict], dict, list[str]]:
+    """
+    Varredura completa quando `precisa_varredura` (gera e grava a watchlist
+    e avalia o 3WS sobre ela, reaproveitando os dados já baixados); senão
+    avalia só a watchlist gravada. Os símbolos vão em ordem de prioridade e,
+    com `prazo`, em blocos até o tempo acabar. Devolve hits, relatório por
+    etapa, um resumo da camada ({"camada", "avaliados", "watchlist"}) e os
+    símbolos que ficaram sem avaliação. `nome` separa watchlist e fila de
+    prioridade de cada worker de fatia.
+    """
+    agora = pd.Timestamp.now(tz="UTC") if agora is None else agora
+    prazo = Prazo() if prazo is None else prazo
+    gravada = _ler_watchlist(nome)
+    fila = carregar_fila(nome)
+
+    if precisa_varredura(gravada, agora):
+        anterior = gravada["simbolos"] if gravada else []
+        etapas = [
+            Etapa("preço",     ["curto"],    etapa_preco),
+            Etapa("watchlist", ["completo"], lambda s, d: etapa_watchlist(s, d, armazem)),
+        ]
+
+        def varrer_bloco(bloco):
+            dados = {}
+            watchlist_bloco, rel_varredura = executar_etapas(bloco, etapas, _fontes(None, armazem), dados)
+            hits_bloco, rel_sinal = avaliar_universo(watchlist_bloco, armazem=armazem, dados=dados)
+            return watchlist_bloco, (hits_bloco, rel_varredura + rel_sinal)
+
+        ordem = ordenar_fila(simbolos, fila, primeiro=anterior)
+        blocos, pendentes = em_blocos(ordem, isolar_falhas(varrer_bloco), prazo)
+        blocos = [r for partes in blocos for r in partes]
+        resultados = [r for _, r in blocos]
+        # Quem ficou sem avaliação continua na watchlist se já estava nela
+        na_lista = {sym for wl, _ in blocos for sym in wl} | (set(anterior) & set(pendentes))
+        watchlist = [sym for sym in simbolos if sym in na_lista]
+        # Varredura interrompida pelo prazo não renova a validade: a próxima execução varre de novo
+        validade = agora if not pendentes else (gravada["gerada_em"] if gravada else pd.Timestamp(0, tz="UTC"))
+        _gravar_watchlist(watchlist, validade, nome)
+        camada = "varredura"
+    else:
+        na_lista = set(gravada["simbolos"])
+        watchlist = [sym for sym in simbolos if sym in na_lista]
+        ordem = ordenar_fila(watchlist, fila)
+        avaliar_bloco = isolar_falhas(lambda bloco: avaliar_universo(bloco, armazem=armazem))
+        resultados, pendentes = em_blocos(ordem, avaliar_bloco, prazo)
+        resultados = [r for partes in resultados for r in partes]
+        camada = "watchlist"
+
+    sinais = {sym for hits_bloco, _ in resultados for sym in hits_bloco}
+    hits = [sym for sym in simbolos if sym in sinais]
+    sem_avaliacao = set(pendentes)
+    avaliados = [sym for sym in ordem if sym not in sem_avaliacao]
+    gravar_fila(nome, fila, avaliados, hits, pendentes)
+    resumo = {"camada": camada, "avaliados": len(avaliados), "watchlist": len(watchlist)}
+    return hits, somar_relatorios([rel for _, rel in resultados]), resumo, pendentes
 
 # =======================
 # EXECUÇÃO DIRETA
 # =======================
 
-def main():
-    tz_brt = zoneinfo.ZoneInfo("America/Sao_Paulo")
-    agora  = datetime.datetime.now(tz_brt)
-    hoje   = agora.strftime("%d/%m/%Y %H:%M")
-
-    print(f"[{hoje}] Iniciando radar H1...")
-
-    hits = []
-    for sym in TICKERS:
-        try:
-            if check_symbol(sym):
-                hits.append(sym)
-                print(f"  ✅ {sym}")
-            else:
-                print(f"  — {sym}")
-        except Exception as e:
-            print(f"  ⚠️  {sym}: {e}")
-
+def montar_mensagem(hoje: str, hits: list[str]) -> str:
     if hits:
-        msg = (
+        return (
             f"*Radar 3WS H1 — {hoje}*\n\n"
             f"*Sinais:* {', '.join(hits)}"
         )
+    return (
+        f"*Radar 3WS H1 — {hoje}*\n\n"
+        f"Nenhum sinal hoje."
+    )
+
+def mensagem(agora: datetime.datetime, sinais: dict[str, list[str]]) -> str:
+    hoje = agora.astimezone(zoneinfo.ZoneInfo("America/Sao_Paulo")).strftime("%d/%m/%Y %H:%M")
+    return montar_mensagem(hoje, sinais["sinais"])
+
+def rodar(simbolos: list[str], armazem: ArmazemBarras, prazo: Prazo, nome: str = "h1") -> dict:
+    """Uma varredura em camadas no formato de radares.Estrategia."""
+    hits, relatorio, camada, pendentes = avaliar_em_camadas(simbolos, armazem, prazo=prazo, nome=nome)
+    print(
+        f"Camada: {camada['camada']} — {camada['avaliados']} avaliado(s) de {len(simbolos)}, "
+        f"watchlist com {camada['watchlist']}"
+    )
+    return {"sinais": {"sinais": hits}, "relatorio": relatorio, "pendentes": pendentes, "extra": camada}
+
+ESTRATEGIA = Estrategia(
+    nome="h1",
+    titulo="radar 3WS H1",
+    modulo=sys.modules[__name__],
+    tickers=TICKERS,
+    categorias=("sinais",),
+    # Janela curta de H1 para o universo; H1 longo só para quem passar,
+    # com o D1 derivado dele
+    requisitos=[
+        Requisito("1h", JANELA_CURTA, universo=True),
+        Requisito("1h", "730d", armazenado=True),
+    ],
+    indicadores=[Indicador("1h", "730d"), Indicador("1d", "600d", fonte="1h")],
+    rodar=rodar,
+    mensagem=mensagem,
+)
+
+def varrer(armazem: ArmazemBarras, fatia: Fatia | None = None):
+    """
+    Uma varredura do universo (ou só da `fatia`): etapas, log e métricas.
+    Sem fatia, envia ao Telegram; com fatia, grava o resultado para --juntar.
+    """
+    executar([ESTRATEGIA], fatia, armazem=armazem)
+
+def _ultima_varredura(nome: str = "h1") -> datetime.datetime | None:
+    try:
+        with open(ESTADO_DAEMON.format(nome=nome)) as f:
+            return datetime.datetime.fromisoformat(json.load(f)["ultima_barra"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _gravar_varredura(barra: datetime.datetime, nome: str = "h1"):
+    arquivo = ESTADO_DAEMON.format(nome=nome)
+    os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+    with open(arquivo, "w") as f:
+        json.dump({"ultima_barra": barra.isoformat()}, f)
+
+def daemon(fatia: Fatia | None = None):
+    """
+    Processo residente: barras, estados das médias e sessões HTTP ficam em
+    memória, e o radar dorme até o próximo fechamento de barra H1 do
+    calendário (+ GRACA_DAEMON). Ao subir, o armazém em disco é carregado
+    aquecido e, se alguma barra fechou desde a última varredura, ela é
+    varrida na hora.
+    """
+    nome = "h1" if fatia is None else f"h1-{fatia.nome}"
+    armazem = ArmazemBarras(memoria=True)
+    ultima = _ultima_varredura(nome)
+    while True:
+        agora = pd.Timestamp.now(tz="UTC")
+        fechada = calendario.ultimo_fechamento(agora - GRACA_DAEMON)
+        if fechada is not None and (ultima is None or fechada > ultima):
+            try:
+                varrer(armazem, fatia)
+                ultima = fechada
+                _gravar_varredura(ultima, nome)
+            except Exception as e:
+                # Uma varredura com erro (rede, Yahoo) não derruba o daemon
+                print(f"  ⚠️  varredura falhou: {type(e).__name__}: {e}")
+
+        agora = pd.Timestamp.now(tz="UTC")
+        alvo = calendario.proximo_fechamento(agora - GRACA_DAEMON) + GRACA_DAEMON
+        print(f"  💤 próxima varredura em {alvo.astimezone(zoneinfo.ZoneInfo('America/Sao_Paulo')):%d/%m %H:%M} (BRT)")
+        # Acorda no máximo a cada 15 min para não depender de um sleep longo
+        # (suspensão da máquina, ajuste de relógio)
+        time.sleep(max(1.0, min((alvo - agora).total_seconds(), 900)))
+
+def avulsa(fatia: Fatia | None = None, forcar: bool = False):
+    """
+    Uma varredura e sai. Sem fatia, só varre se fechou alguma barra H1
+    desde a última varredura (mercado fechado, disparo repetido dentro da
+    mesma hora: sai na hora). Fatias sempre varrem — a junção espera o
+    resultado de todas.
+    """
+    fechada = calendario.ultimo_fechamento(datetime.datetime.now(datetime.timezone.utc) - GRACA_DAEMON)
+    if fatia is None and not (forcar or SEMPRE_VARRER):
+        ultima = _ultima_varredura()
+        if fechada is not None and ultima is not None and fechada <= ultima:
+            print(f"Nenhuma barra H1 fechada desde a última varredura "
+                  f"({ultima.astimezone(zoneinfo.ZoneInfo('America/Sao_Paulo')):%d/%m %H:%M} BRT) — nada a fazer.")
+            return
+    varrer(ArmazemBarras(), fatia)
+    if fatia is None and fechada is not None:
+        _gravar_varredura(fechada)
+
+# =======================
+# FLUXO (barras montadas de negócios)
+# =======================
+
+def _semear_fluxo(simbolos: list[str], armazem: ArmazemBarras, agregador: AgregadorBarras,
+                  ate: datetime.datetime | None = None) -> dict:
+    """
+    Histórico de partida do fluxo: H1 do armazém (só o que falta é baixado)
+    com as barras fechadas e o D1 derivado delas; a barra em formação vai
+    para o agregador, e os negócios seguintes a completam. Com `ate`
+    (primeiro negócio de um replay), o histórico para antes da barra dele:
+    dali em diante as barras vêm do feed.
+    """
+    horario = armazem.atualizar(simbolos, period="730d", interval="1h")
+    if ate is not None:
+        corte = pd.Timestamp(calendario.abertura_barra(ate) or ate)
+        horario = {sym: df[df.index < corte] for sym, df in horario.items()}
+        horario = {sym: df for sym, df in horario.items() if len(df)}
+    historicos = {"1h": {}, "1d": {}}
+    for sym, df in horario.items():
+        fechado = descartar_barra_aberta(df)
+        if len(fechado) < len(df):
+            b = df.iloc[-1]
+            agregador.semear(sym, df.index[-1].to_pydatetime(), float(b["Open"]), float(b["High"]),
+                             float(b["Low"]), float(b["Close"]), float(b["Volume"]))
+        historicos["1h"][sym] = fechado
+    historicos["1d"] = {sym: recortar(df, "600d") for sym, df in derivar(historicos["1h"], para_diario).items()}
+    return historicos
+
+def _anexar_barras(historicos: dict, barras: dict[str, tuple]) -> list[str]:
+    """
+    Barras H1 recém-fechadas entram no H1 e no D1 em memória. Uma barra que
+    não é posterior à última do histórico fica de fora (acrescentá-la
+    reescreveria o passado); devolve os símbolos descartados.
+    """
+    descartados = []
+    for sym, (abertura, *ohlcv) in barras.items():
+        barra = dict(zip(["Open", "High", "Low", "Close", "Volume"], ohlcv))
+        df = historicos["1h"].get(sym)
+        if df is None or df.empty:
+            rotulo = pd.Timestamp(abertura).tz_convert(calendario.FUSO_BOLSA)
+            historicos["1h"][sym] = pd.DataFrame([barra], index=pd.DatetimeIndex([rotulo]))
+        else:
+            rotulo = pd.Timestamp(abertura).tz_convert(df.index.tz)
+            if rotulo <= df.index[-1]:
+                descartados.append(sym)
+                continue
+            df = historicos["1h"][sym] = acrescentar(df, rotulo, barra)
+            # O D1 agrega os valores como ficaram gravados no H1 (float32 do armazém)
+            barra = df.iloc[-1].to_dict()
+        historicos["1d"][sym] = somar_ao_diario(historicos["1d"].get(sym), rotulo, barra)
+    return descartados
+
+def fechamentos_do_fluxo(feed: FeedNegocios, simbolos: list[str], armazem: ArmazemBarras):
+    """
+    Consome `feed` e, a cada fechamento de barra H1, roda a regra 3WS só nos
+    símbolos que negociaram nela. Gera (fechamento, avaliados, hits,
+    segundos entre a barra fechar e o resultado). Um símbolo que quebra na
+    avaliação vai para o SAUDE sem levar os outros junto.
+    """
+    agregador = AgregadorBarras()
+    historicos = _semear_fluxo(simbolos, armazem, agregador, ate=feed.inicio())
+    universo = set(simbolos)
+    avaliar = isolar_falhas(lambda bloco: avaliar_universo(bloco, historicos=historicos, armazem=armazem))
+    for fechamento, barras in agregador.consumir(feed):
+        inicio = time.perf_counter()
+        barras = {sym: b for sym, b in barras.items() if sym in universo}
+        descartados = _anexar_barras(historicos, barras)
+        if descartados:
+            METRICAS.contar("fluxo.descartadas", len(descartados))
+            print(f"  ⚠️  barra até {fechamento:%d/%m %H:%M} UTC: {len(descartados)} barra(s) descartada(s), "
+                  f"não posteriores ao histórico ({', '.join(descartados)})")
+        avaliados = [sym for sym in simbolos if sym in barras and sym not in descartados]
+        hits = [sym for hits_bloco, _ in avaliar(avaliados) for sym in hits_bloco] if avaliados else []
+        segundos = time.perf_counter() - inicio
+        METRICAS.registrar_tempo("fluxo.fechamento", segundos)
+        yield fechamento, avaliados, hits, segundos
+
+def fluxo(feed: FeedNegocios) -> list[str]:
+    """
+    Modo de fluxo: barras H1 montadas dos negócios do `feed` e sinal
+    enviado segundos depois do fechamento de cada barra, em vez de na
+    próxima execução de hora em hora. Grava a última barra avaliada como
+    o daemon, para a execução avulsa não repetir o envio. Símbolos em
+    quarentena ficam de fora, como nas outras execuções.
+
+    Com um feed que não é ao vivo (replay), as mensagens só vão para o log
+    e nem a última barra nem a saúde dos símbolos são gravadas. Os estados
+    das médias nunca são gravados no fluxo. Devolve as mensagens montadas.
+    """
+    METRICAS.reiniciar()
+    SAUDE.reiniciar()
+    saude = carregar_saude("h1")
+    ativos, quarentena = separar(TICKERS, saude)
+    print(resumo_quarentena(quarentena, saude))
+
+    armazem = ArmazemBarras(memoria=True, estados_em_disco=False)
+    mensagens = []
+    try:
+        for fechamento, avaliados, hits, segundos in fechamentos_do_fluxo(feed, ativos, armazem):
+            msg = mensagem(fechamento, {"sinais": hits})
+            mensagens.append(msg)
+            if feed.ao_vivo:
+                ESTRATEGIA.enviar(msg)
+                _gravar_varredura(fechamento)
+            print(
+                f"  ⚡ barra das {fechamento.astimezone(zoneinfo.ZoneInfo('America/Sao_Paulo')):%d/%m %H:%M} (BRT): "
+                f"{len(avaliados)} avaliado(s), {len(hits)} sinal(is) em {segundos * 1000:.0f}ms"
+                + ("" if feed.ao_vivo else f" — {feed.nome}, não enviado: {', '.join(hits) or 'nenhum sinal'}")
+            )
+    finally:
+        novos = []
+        if feed.ao_vivo:
+            saude, novos = gravar_saude("h1", saude, simbolos=TICKERS)
+            if novos:
+                print(resumo_quarentena([], saude, novos))
+        METRICAS.exportar("h1_fluxo", feed=feed.nome, universo=len(TICKERS), fechamentos=len(mensagens),
+                          quarentena=quarentena, quarentena_nova=novos)
+    return mensagens
+
+def main(modo_daemon: bool = False, fatia: Fatia | None = None, juntar_total: int | None = None,
+         forcar: bool = False, feed: str | None = None):
+    if juntar_total:
+        executar([ESTRATEGIA], juntar_total=juntar_total)
+    elif feed:
+        fluxo(feed_padrao(feed))
+    elif modo_daemon:
+        daemon(fatia)
     else:
-        msg = (
-            f"*Radar 3WS H1 — {hoje}*\n\n"
-            f"Nenhum sinal hoje."
-        )
-    send_telegram(msg)
-    print(f"\n[{hoje}] Finalizado. {len(hits)} sinal(is) enviado(s).")
+        avulsa(fatia, forcar)
 
 if __name__ == "__main__":
-    main()
+    parser = argumentos("Radar 3WS H1")
+    parser.add_argument("--daemon", action="store_true",
+                        help="processo residente que varre a cada fechamento de barra H1")
+    parser.add_argument("--forcar", action="store_true",
+                        help="varre mesmo sem barra H1 nova desde a última varredura")
+    parser.add_argument("--fluxo", metavar="FEED",
+                        help="monta as barras H1 dos negócios de FEED (replay:<arquivo>) "
+                             "e avalia no fechamento de cada barra")
+    args = parser.parse_args()
+    if args.fluxo and (args.fatia or args.juntar or args.daemon):
+        parser.error("--fluxo roda o universo inteiro num processo só (sem --fatia, --juntar ou --daemon)")
+    main(args.daemon, args.fatia, args.juntar, args.forcar, args.fluxo)
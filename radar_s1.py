@@ -1,14 +1,29 @@
+from __future__ import annotations
+
 import os
+import sys
 import datetime
-import pandas as pd
-import yfinance as yf
-import requests
-import pandas_market_calendars as mcal
 
-# — Seus Secrets do GitHub
-TELEGRAM_TOKEN        = os.environ["TELEGRAM_TOKEN"]
-TELEGRAM_CHAT_ID_S1   = int(os.environ["TELEGRAM_CHAT_ID_S1"])
-TELEGRAM_THREAD_ID_S1 = os.environ.get("TELEGRAM_THREAD_ID_S1")
+import calendario
+from armazem import ArmazemBarras
+from dados import historico_simbolo, recortar
+from fatias import Fatia, argumentos
+from indicadores import estados_atualizados
+from metricas import METRICAS
+import paralelo
+from prazo import em_blocos
+from prioridade import carregar_fila, gravar_fila, ordenar_fila
+from radares import Estrategia, Indicador, Requisito, executar
+from reamostragem import VALIDAR, derivar, para_mensal, para_semanal, validar_contra_yahoo
+from saude import SAUDE, isolar_falhas
+from tardio import tardio
+from telegram_cliente import destinos_do_ambiente, enviar
+
+pd = tardio("pandas")
+
+# — Secrets do GitHub Actions: TELEGRAM_TOKEN, TELEGRAM_CHAT_ID_S1 e o tópico
+#   opcional TELEGRAM_THREAD_ID_S1 são lidos no envio (send_telegram), não no
+#   import — benchmark, backtest e workers rodam sem eles
 
 # Parâmetros das médias
 EMA_FAST = 21
@@ -52,91 +67,161 @@ BUY_PATTERNS = [
 # Inverte cada padrão para venda
 SELL_PATTERNS = [[not b for b in p] for p in BUY_PATTERNS]
 
+def _bits(padrao) -> int:
+    """Padrão de 6 velas como bitmask (bit i = vela i bull)."""
+    return sum(1 << i for i, bull in enumerate(padrao) if bull)
+
+# Tabela bitmask -> sinal, montada uma vez: casar o padrão vira uma consulta
+# de dicionário em vez de comparar a lista com cada padrão
+SINAIS_S1 = {
+    **{_bits(p): "compra" for p in BUY_PATTERNS},
+    **{_bits(p): "venda"  for p in SELL_PATTERNS},
+}
+_PESOS = [1 << i for i in range(6)]
+
 def is_market_open(now_utc):
-    sched = mcal.get_calendar("NYSE").schedule(start_date=now_utc.date(), end_date=now_utc.date())
-    return not sched.empty
-
-def check_symbol_s1(sym: str, patterns, above: bool):
-    # Histórico semanal (5 anos)
-    df_w = yf.Ticker(sym).history(period="5y", interval="1wk", auto_adjust=True)
-    if len(df_w) < 6:
-        return False
-    df_w["ema_fast_w"] = df_w["Close"].ewm(span=EMA_FAST).mean()
-    df_w["ema_mid_w"]  = df_w["Close"].ewm(span=EMA_MID).mean()
-    df_w["sma_long_w"] = df_w["Close"].rolling(window=SMA_LONG).mean()
+    # Tabela de sessões pré-calculada — sem montar o calendário da NYSE a cada execução
+    return calendario.dia_de_pregao(now_utc)
+
+def mascara_velas(last6: pd.DataFrame) -> int:
+    """
+    Bitmask de direção das últimas 6 velas com gap-check: a vela conta como
+    bull se fechou acima da abertura E acima do fechamento da vela anterior.
+    """
+    opens  = last6["Open"].to_numpy()
+    closes = last6["Close"].to_numpy()
+    bull = closes > opens
+    bull[1:] &= closes[1:] > closes[:-1]
+    return int(bull @ _PESOS)
+
+def _medias_s1(sym: str, df: pd.DataFrame, interval: str, estados: dict | None) -> list[float]:
+    """EMA rápida, EMA média e SMA longa da última barra (ewm com adjust=True, como sempre no S1)."""
+    estado = (estados or {}).get(interval, {}).get(sym)
+    if estado is not None:
+        v = estado.valores(float(df["Close"].iloc[-1]))
+        return [v[f"ema{EMA_FAST}"], v[f"ema{EMA_MID}"], v[f"sma{SMA_LONG}"]]
+    return [
+        df["Close"].ewm(span=EMA_FAST).mean().iloc[-1],
+        df["Close"].ewm(span=EMA_MID).mean().iloc[-1],
+        df["Close"].rolling(window=SMA_LONG).mean().iloc[-1],
+    ]
+
+def avaliar_s1(sym: str, historicos: dict | None = None, estados: dict | None = None):
+    """
+    Avalia compra e venda numa passada só: carrega os históricos e calcula
+    as médias uma vez por símbolo. Retorna "compra", "venda" ou None.
+    Com `estados` ({interval: {sym: EstadoIndicadores}}), as médias vêm do
+    estado incremental em vez de recalculadas sobre o histórico inteiro.
+    """
+    # Histórico semanal (5 anos) — vem do download em lote de main() quando disponível
+    df_w = historico_simbolo(sym, "5y", "1wk", historicos)
+    if df_w is None or len(df_w) < 6:
+        return None
 
     # Histórico mensal (20 anos)
-    df_m = yf.Ticker(sym).history(period="20y", interval="1mo", auto_adjust=True)
-    if len(df_m) < SMA_LONG:
-        return False
-    df_m["ema_fast_m"] = df_m["Close"].ewm(span=EMA_FAST).mean()
-    df_m["ema_mid_m"]  = df_m["Close"].ewm(span=EMA_MID).mean()
-    df_m["sma_long_m"] = df_m["Close"].rolling(window=SMA_LONG).mean()
-
-    # Extrai últimas 6 velas semanais
-    last6 = df_w.tail(6)
-    opens = last6["Open"].values
-    closes = last6["Close"].values
-
-    # Monta lista de bools com gap-check
-    bools = []
-    for i in range(6):
-        if closes[i] > opens[i]:
-            if i == 0 or closes[i] > closes[i-1]:
-                bools.append(True)
-            else:
-                bools.append(False)
-        else:
-            bools.append(False)
-
-    # Verifica padrão
-    if not any(bools == p for p in patterns):
-        return False
-
-    # Condição preço acima/abaixo médias semanais
-    lw = df_w.iloc[-1]
-    if above:
-        if not (lw.Close > lw.ema_fast_w and lw.Close > lw.ema_mid_w and lw.Close > lw.sma_long_w):
-            return False
-    else:
-        if not (lw.Close < lw.ema_fast_w and lw.Close < lw.ema_mid_w and lw.Close < lw.sma_long_w):
-            return False
-
-    # Viés mensal: fechamento semanal vs médias mensais
-    wm_close = lw.Close
-    lm = df_m.iloc[-1]
-    if above:
-        return wm_close > lm.ema_fast_m and wm_close > lm.ema_mid_m and wm_close > lm.sma_long_m
-    else:
-        return wm_close < lm.ema_fast_m and wm_close < lm.ema_mid_m and wm_close < lm.sma_long_m
+    df_m = historico_simbolo(sym, "20y", "1mo", historicos)
+    if df_m is None or len(df_m) < SMA_LONG:
+        return None
+
+    # Padrão das últimas 6 velas semanais — teste mais barato, vem primeiro
+    sinal = SINAIS_S1.get(mascara_velas(df_w.tail(6)))
+    if sinal is None:
+        return None
+
+    # Fechamento semanal vs médias semanais e vs médias mensais (viés)
+    close = df_w["Close"].iloc[-1]
+    medias = _medias_s1(sym, df_w, "1wk", estados) + _medias_s1(sym, df_m, "1mo", estados)
+
+    if sinal == "compra" and all(close > m for m in medias):
+        return "compra"
+    if sinal == "venda" and all(close < m for m in medias):
+        return "venda"
+    return None
 
 def send_telegram(msg: str):
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID_S1,
-        "text": msg,
-        "parse_mode": "Markdown",
-        **({"message_thread_id": int(TELEGRAM_THREAD_ID_S1)} if TELEGRAM_THREAD_ID_S1 else {})
-    }
-    requests.post(url, json=payload)
+    # Pool de conexões, divisão em partes de até 4096 caracteres e retry de 429
+    enviar(msg, destinos_do_ambiente("_S1"), os.environ["TELEGRAM_TOKEN"])
 
-def main():
-    now_utc = datetime.datetime.now(datetime.timezone.utc)
-    if os.environ.get("GITHUB_EVENT_NAME")=="schedule" and not is_market_open(now_utc):
-        return
+def avaliar_diario(simbolos: list[str], diario: dict[str, pd.DataFrame], armazem) -> tuple[list[str], list[str], list]:
+    """
+    Parte de CPU do bloco: reamostragem, médias e regra S1 sobre o D1 já
+    baixado. Devolve compras, vendas e [(símbolo, erro)] dos que falharam.
+    """
+    historicos = {
+        "1wk": {sym: recortar(df, "5y") for sym, df in derivar(diario, para_semanal).items()},
+        "1mo": derivar(diario, para_mensal),
+    }
+    if VALIDAR:
+        validar_contra_yahoo(historicos["1wk"], period="5y", interval="1wk")
+        validar_contra_yahoo(historicos["1mo"], period="20y", interval="1mo")
 
-    ts = now_utc.astimezone(datetime.timezone(datetime.timedelta(hours=-3))).strftime("%d/%m/%Y %H:%M")
+    # Médias incrementais gravadas ao lado das barras (O(1) por barra nova)
+    estados = {
+        "1wk": estados_atualizados(armazem, historicos["1wk"], "1wk", "5y",  adjust=True),
+        "1mo": estados_atualizados(armazem, historicos["1mo"], "1mo", "20y", adjust=True),
+    }
 
-    buys, sells = [], []
-    for sym in TICKERS:
+    buys, sells, erros = [], [], []
+    for sym in simbolos:
         try:
-            if check_symbol_s1(sym, BUY_PATTERNS, above=True):
+            with METRICAS.cronometro("avaliacao", sym=sym):
+                sinal = avaliar_s1(sym, historicos, estados)
+            if sinal == "compra":
                 buys.append(sym)
-            if check_symbol_s1(sym, SELL_PATTERNS, above=False):
+            elif sinal == "venda":
                 sells.append(sym)
-        except Exception:
-            continue
+        except Exception as e:
+            print(f"  ⚠️  {sym}: {type(e).__name__}: {e}")
+            erros.append((sym, e))
+    return buys, sells, erros
+
+def _avaliar_pedaco(simbolos: list[str], diretorio: str) -> tuple[list[str], list[str], list]:
+    """Worker do pool (paralelo.py): relê o D1 do arquivo colunar por memory-map e avalia."""
+    armazem = ArmazemBarras(diretorio)
+    diario = {sym: recortar(armazem.carregar(sym, "1d", "20y"), "20y") for sym in simbolos}
+    return avaliar_diario(simbolos, diario, armazem)
+
+def avaliar_bloco(simbolos: list[str], armazem: ArmazemBarras) -> tuple[list[str], list[str]]:
+    """Compras e vendas de `simbolos` — download, reamostragem, médias e regra S1."""
+    # Histórico do bloco em poucas requisições agrupadas,
+    # baixando só as barras que ainda não estão no armazém local.
+    # Só o D1 é baixado — W1 e MN são derivados localmente do mesmo histórico
+    diario = armazem.atualizar(simbolos, period="20y", interval="1d")
+
+    if paralelo.PROCESSOS > 1 and not VALIDAR:
+        # Os workers recebem só os nomes: as barras vêm do arquivo que o
+        # atualizar acabou de gravar. Quem ficou sem D1 não tem o que avaliar.
+        presentes = [sym for sym in simbolos if sym in diario]
+        partes = paralelo.mapear(_avaliar_pedaco, presentes, armazem.diretorio)
+    else:
+        partes = [avaliar_diario(simbolos, diario, armazem)]
+
+    buys = [sym for c, _, _ in partes for sym in c]
+    sells = [sym for _, v, _ in partes for sym in v]
+    for sym, erro in (e for _, _, erros in partes for e in erros):
+        # Um símbolo com erro não derruba o bloco, mas conta para a quarentena
+        SAUDE.falhou(sym, erro)
+    return buys, sells
+
+def rodar(simbolos: list[str], armazem: ArmazemBarras, prazo, fila_nome: str = "s1") -> dict:
+    """
+    Compras, vendas (na ordem de `simbolos`) e pendentes, em blocos na ordem
+    de prioridade, no formato de radares.Estrategia.
+    """
+    fila = carregar_fila(fila_nome)
+    ordem = ordenar_fila(simbolos, fila)
+    avaliar = isolar_falhas(lambda bloco: avaliar_bloco(bloco, armazem))
+    blocos, pendentes = em_blocos(ordem, avaliar, prazo)
+    blocos = [r for partes in blocos for r in partes]
+    compras = {sym for c, _ in blocos for sym in c}
+    vendas = {sym for _, v in blocos for sym in v}
+    buys = [sym for sym in simbolos if sym in compras]
+    sells = [sym for sym in simbolos if sym in vendas]
+    sem_avaliacao = set(pendentes)
+    gravar_fila(fila_nome, fila, [sym for sym in ordem if sym not in sem_avaliacao], buys + sells, pendentes)
+    return {"sinais": {"compras": buys, "vendas": sells}, "relatorio": [], "pendentes": pendentes, "extra": {}}
 
+def montar_mensagem(ts: str, buys: list[str], sells: list[str]) -> str:
     header = f"*📊 Radar S1 US PDV — {ts}*\n\n"
     body = ""
     if buys:
@@ -147,8 +232,34 @@ def main():
         body += "*Sinais de Venda:* " + ", ".join(sells)
     else:
         body += "Nenhum sinal de venda."
+    return header + body
+
+def mensagem(agora: datetime.datetime, sinais: dict[str, list[str]]) -> str:
+    ts = agora.astimezone(datetime.timezone(datetime.timedelta(hours=-3))).strftime("%d/%m/%Y %H:%M")
+    return montar_mensagem(ts, sinais["compras"], sinais["vendas"])
+
+def ativa(agora: datetime.datetime) -> bool:
+    # No agendamento, só com o mercado aberto
+    return not (os.environ.get("GITHUB_EVENT_NAME") == "schedule" and not is_market_open(agora))
+
+ESTRATEGIA = Estrategia(
+    nome="s1",
+    titulo="radar S1 US PDV",
+    modulo=sys.modules[__name__],
+    tickers=TICKERS,
+    categorias=("compras", "vendas"),
+    # Só o D1 é baixado — W1 e MN são derivados localmente do mesmo histórico
+    requisitos=[Requisito("1d", "20y", universo=True, armazenado=True)],
+    indicadores=[Indicador("1wk", "5y", adjust=True), Indicador("1mo", "20y", adjust=True)],
+    rodar=rodar,
+    mensagem=mensagem,
+    ativa=ativa,
+)
 
-    send_telegram(header + body)
+def main(fatia: Fatia | None = None, juntar_total: int | None = None):
+    # Com prazo, em blocos na ordem de prioridade até o tempo acabar (ver radares.executar)
+    executar([ESTRATEGIA], fatia, juntar_total)
 
 if __name__=="__main__":
-    main()
+    args = argumentos("Radar S1 US PDV").parse_args()
+    main(args.fatia, args.juntar)
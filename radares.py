@@ -0,0 +1,361 @@
+"""
+Ponto de entrada único dos radares: cada radar se registra como uma
+estratégia (universo, timeframes que lê, médias que calcula, regra e
+destino no Telegram) e uma execução com várias estratégias monta um plano
+só de dados e indicadores.
+
+    python radares.py                 # D1, H1 e S1 num processo só
+    python radares.py d1 s1           # só as estratégias pedidas
+    python radares.py d1 --fatia 0/4  # fatias e junção como nos scripts
+
+No plano, cada interval é buscado uma vez, na janela armazenada mais
+longa que alguma estratégia pede, e as janelas menores saem recortadas da
+memória (ex.: o D1 de 7y do radar diário sai do D1 de 20y do S1). Quando
+uma estratégia avalia o universo inteiro num interval armazenado, ele é
+pré-carregado para a união dos universos e as etapas baratas das outras
+(janela curta) também leem dali, sem requisição. Os estados das médias
+ficam em memória durante a execução: a mesma (símbolo, interval, janela,
+fonte) é sincronizada uma vez e só regravada se mudou.
+
+radar.py, radar_h1.py e radar_s1.py continuam funcionando sozinhos: o
+main() de cada um chama `executar` com a própria estratégia, e o plano de
+uma estratégia só é o mesmo caminho de dados de antes.
+"""
+from __future__ import annotations
+
+import datetime
+import importlib
+import zoneinfo
+
+from armazem import ArmazemBarras
+from dados import inicio_period, recortar
+from etapas import resumo_etapas
+from fatias import Fatia, argumentos, dividir, gravar_resultado, juntar, nota_faltando
+from metricas import METRICAS
+from prazo import iniciar_prazo, nota_pendentes
+from saude import SAUDE, carregar_saude, gravar_saude, resumo_quarentena, separar
+from tardio import tardio
+
+pd = tardio("pandas")
+
+# Nome da estratégia → módulo que a registra (importado só quando pedido)
+REGISTRO = {"d1": "radar", "h1": "radar_h1", "s1": "radar_s1"}
+
+FUSO_LOG = zoneinfo.ZoneInfo("America/Sao_Paulo")
+
+# =======================
+# ESTRATÉGIAS
+# =======================
+
+class Requisito:
+    def __init__(self, interval: str, period: str, universo: bool = False, armazenado: bool = False):
+        """
+        Barras que a estratégia lê. `universo`: para todos os símbolos (senão
+        só para os que passam nas etapas baratas); `armazenado`: via armazém
+        (histórico longo incremental) em vez de buscado direto (janela curta).
+        """
+        self.interval = interval
+        self.period = period
+        self.universo = universo
+        self.armazenado = armazenado
+
+class Indicador:
+    def __init__(self, interval: str, period: str, adjust: bool = False, fonte: str | None = None):
+        """Médias (EMA21/EMA120/SMA200) de `interval`; `fonte` = interval de onde ele é derivado."""
+        self.interval = interval
+        self.period = period
+        self.adjust = adjust
+        self.fonte = fonte
+
+    @property
+    def chave(self) -> tuple:
+        return (self.interval, self.period, self.adjust, self.fonte)
+
+    def __repr__(self):
+        return (f"{self.interval}/{self.period}" + ("←" + self.fonte if self.fonte else "")
+                + (" ajustada" if self.adjust else ""))
+
+class Estrategia:
+    def __init__(self, nome: str, titulo: str, modulo, tickers: list[str], categorias: tuple[str, ...],
+                 requisitos: list[Requisito], indicadores: list[Indicador], rodar, mensagem, ativa=None):
+        """
+        `rodar(simbolos, armazem, prazo, nome)` devolve {"sinais": {categoria:
+        [...]}, "relatorio", "pendentes", "extra"}; `mensagem(agora, sinais)`
+        monta o texto do Telegram; `ativa(agora)` diz se a estratégia roda
+        agora (ex.: S1 só com o mercado aberto no agendamento). O envio usa
+        `modulo.send_telegram`, lido na hora de enviar.
+        """
+        self.nome = nome
+        self.titulo = titulo
+        self.modulo = modulo
+        self.tickers = tickers
+        self.categorias = categorias
+        self.requisitos = requisitos
+        self.indicadores = indicadores
+        self.rodar = rodar
+        self.mensagem = mensagem
+        self.ativa = ativa
+
+    def enviar(self, msg: str):
+        self.modulo.send_telegram(msg)
+
+def carregar_estrategia(nome: str) -> Estrategia:
+    if nome not in REGISTRO:
+        raise ValueError(f"estratégia desconhecida: {nome} (registradas: {', '.join(REGISTRO)})")
+    return importlib.import_module(REGISTRO[nome]).ESTRATEGIA
+
+# =======================
+# PLANO
+# =======================
+
+def _duracao(period: str) -> pd.Timedelta:
+    fim = pd.Timestamp("2000-01-01")
+    return fim - inicio_period(period, fim)
+
+class Plano:
+    def __init__(self):
+        # interval → janela armazenada mais longa pedida
+        self.janelas = {}
+        # interval → símbolos pré-carregados (união dos universos que leem o interval armazenado)
+        self.precarga = {}
+        # interval → [(estratégia, janela)] servidos pelo plano
+        self.leitores = {}
+        # chave do indicador → [estratégias]
+        self.indicadores = {}
+
+    def resumo(self) -> list[str]:
+        linhas = []
+        for interval, leitores in self.leitores.items():
+            janela = self.janelas.get(interval)
+            pre = self.precarga.get(interval)
+            origem = (f"{interval} {janela}" if janela else f"{interval} (só janela curta)")
+            carga = f"pré-carga de {len(pre)} símbolo(s)" if pre else "sob demanda"
+            lidos = ", ".join(f"{nome} {period}" for nome, period in leitores)
+            linhas.append(f"  🗺  {origem}: {carga} — {lidos}")
+        for chave, nomes in self.indicadores.items():
+            compartilhado = " (compartilhado)" if len(nomes) > 1 else ""
+            linhas.append(f"  🗺  médias {Indicador(*chave)!r}: {', '.join(nomes)}{compartilhado}")
+        return linhas
+
+def planejar(execucoes: list[tuple[Estrategia, list[str]]]) -> Plano:
+    """Um plano de dados e indicadores para as estratégias com os seus símbolos."""
+    plano = Plano()
+    for estrategia, simbolos in execucoes:
+        for r in estrategia.requisitos:
+            plano.leitores.setdefault(r.interval, []).append((estrategia.nome, r.period))
+            if r.armazenado:
+                atual = plano.janelas.get(r.interval)
+                if atual is None or _duracao(r.period) > _duracao(atual):
+                    plano.janelas[r.interval] = r.period
+        for ind in estrategia.indicadores:
+            plano.indicadores.setdefault(ind.chave, []).append(estrategia.nome)
+
+    # Pré-carga só quando outra estratégia lê o mesmo interval: sozinha, a
+    # estratégia carrega em blocos dentro do prazo, como antes
+    for estrategia, simbolos in execucoes:
+        for r in estrategia.requisitos:
+            leitores = {nome for nome, _ in plano.leitores[r.interval]}
+            if r.universo and r.armazenado and len(leitores) > 1:
+                pre = plano.precarga.setdefault(r.interval, [])
+                vistos = set(pre)
+                pre.extend(sym for sym in simbolos if sym not in vistos)
+    return plano
+
+class DadosCompartilhados:
+    """
+    Armazém visto pelas estratégias numa execução: o mesmo protocolo do
+    ArmazemBarras (atualizar/recente/caminho/memoria/diretorio), servindo cada
+    interval do plano uma vez por símbolo e recortando as janelas menores.
+    """
+
+    def __init__(self, plano: Plano, armazem: ArmazemBarras):
+        self.plano = plano
+        self.armazem = armazem
+        # Os estados das médias usam o caminho e a memória do armazém de baixo
+        self.memoria = armazem.memoria
+        self.caminho = armazem.caminho
+        self.estados_em_disco = armazem.estados_em_disco
+        # Os workers de paralelo.py releem as barras do arquivo do armazém
+        self.diretorio = armazem.diretorio
+        # interval → {símbolo: DataFrame na janela do plano}
+        self.barras = {}
+
+    def precarregar(self):
+        for interval, simbolos in self.plano.precarga.items():
+            with METRICAS.cronometro(f"plano.precarga.{interval}"):
+                self.atualizar(simbolos, self.plano.janelas[interval], interval)
+
+    def atualizar(self, tickers: list[str], period: str, interval: str) -> dict[str, pd.DataFrame]:
+        janela = self.plano.janelas.get(interval)
+        if janela is None or _duracao(period) > _duracao(janela):
+            return self.armazem.atualizar(tickers, period=period, interval=interval)
+        em_memoria = self.barras.setdefault(interval, {})
+        faltando = [sym for sym in tickers if sym not in em_memoria]
+        if faltando:
+            em_memoria.update(self.armazem.atualizar(faltando, period=janela, interval=interval))
+        METRICAS.cache(f"plano.{interval}", len(tickers) - len(faltando), len(faltando))
+        return self._recortes(tickers, period, em_memoria)
+
+    def recente(self, tickers: list[str], period: str, interval: str) -> dict[str, pd.DataFrame]:
+        """Janela curta: recorte do que já está em memória; o resto vai ao provedor."""
+        em_memoria = self.barras.get(interval, {})
+        resultado = self._recortes(tickers, period, em_memoria)
+        faltando = [sym for sym in tickers if sym not in em_memoria]
+        if faltando:
+            resultado.update(self.armazem.recente(faltando, period, interval))
+        METRICAS.cache(f"plano.{interval}.curto", len(tickers) - len(faltando), len(faltando))
+        return resultado
+
+    @staticmethod
+    def _recortes(tickers: list[str], period: str, em_memoria: dict) -> dict[str, pd.DataFrame]:
+        return {sym: recortar(em_memoria[sym], period) for sym in tickers if sym in em_memoria}
+
+# =======================
+# EXECUÇÃO
+# =======================
+
+def _carimbo(agora: datetime.datetime) -> str:
+    return agora.astimezone(FUSO_LOG).strftime("%d/%m/%Y %H:%M")
+
+def _categorias(estrategia: Estrategia, sinais: dict[str, list[str]]) -> dict[str, list[str]]:
+    return {c: sinais.get(c, []) for c in estrategia.categorias}
+
+def _total_sinais(sinais: dict[str, list[str]]) -> int:
+    return sum(len(v) for v in sinais.values())
+
+def juntar_estrategia(estrategia: Estrategia, total: int, agora: datetime.datetime):
+    """Junta os resultados das `total` fatias da estratégia e envia uma mensagem só."""
+    hoje = _carimbo(agora)
+    print(f"[{hoje}] Juntando {total} fatia(s) do {estrategia.titulo}...")
+    r = juntar(estrategia.nome, total, estrategia.tickers)
+    sinais = _categorias(estrategia, r["sinais"])
+    if r["etapas"]:
+        print(resumo_etapas(r["etapas"]))
+    print(resumo_quarentena(r["quarentena"], {}))
+    estrategia.enviar(estrategia.mensagem(agora, sinais) + nota_pendentes(r["pendentes"])
+                      + nota_faltando(r["faltando"]))
+    print(f"\n[{hoje}] Finalizado. {_total_sinais(sinais)} sinal(is) enviado(s), "
+          f"{len(r['pendentes']) + len(r['faltando'])} não avaliado(s).")
+    METRICAS.exportar(estrategia.nome, universo=len(estrategia.tickers), **sinais, etapas=r["etapas"],
+                      pendentes=r["pendentes"], quarentena=r["quarentena"],
+                      faltando=r["faltando"], fatias=r["fatias"])
+
+def _relatar(estrategia: Estrategia, fatia: Fatia | None, nome: str, simbolos: list[str],
+             quarentena: list[str], resultado: dict, saude: dict, novos: list[str],
+             agora: datetime.datetime, varias: bool):
+    """Log, resultado da fatia ou envio ao Telegram e métricas de uma estratégia."""
+    hoje = _carimbo(agora)
+    sinais = _categorias(estrategia, resultado["sinais"])
+    pendentes = resultado["pendentes"]
+    categoria = {sym: c for c, lista in sinais.items() for sym in lista}
+    for sym in simbolos:
+        if sym in categoria:
+            print(f"  ✅ {sym}" + (f" ({categoria[sym]})" if len(sinais) > 1 else ""))
+        else:
+            print(f"  ⏱ {sym}" if sym in pendentes else f"  🚫 {sym}" if sym in quarentena else f"  — {sym}")
+    if resultado["relatorio"]:
+        print(resumo_etapas(resultado["relatorio"]))
+    print(resumo_quarentena(quarentena, saude, novos))
+
+    # Numa execução com várias estratégias as métricas do processo são uma só;
+    # o JSON de cada uma diz com quem ela dividiu a execução
+    extra = dict(resultado["extra"], quarentena=quarentena, quarentena_nova=novos)
+    if varias:
+        extra["estrategias"] = varias
+    if fatia is not None:
+        # Worker: grava o resultado da fatia; o envio fica para --juntar
+        gravar_resultado(estrategia.nome, fatia, simbolos, sinais, pendentes, resultado["relatorio"],
+                         quarentena=quarentena, **resultado["extra"])
+        METRICAS.exportar(nome, universo=len(simbolos), **sinais, etapas=resultado["relatorio"],
+                          pendentes=pendentes, **extra)
+        return
+
+    estrategia.enviar(estrategia.mensagem(agora, sinais) + nota_pendentes(pendentes))
+    print(f"\n[{hoje}] Finalizado. {_total_sinais(sinais)} sinal(is) enviado(s), "
+          f"{len(pendentes)} não avaliado(s), {len(quarentena)} em quarentena.")
+    METRICAS.exportar(estrategia.nome, universo=len(estrategia.tickers), **sinais,
+                      etapas=resultado["relatorio"], pendentes=pendentes, **extra)
+
+def executar(estrategias: list, fatia: Fatia | None = None, juntar_total: int | None = None,
+             armazem: ArmazemBarras | None = None):
+    """
+    Roda as estratégias (nomes do REGISTRO ou objetos Estrategia) com um
+    plano de dados comum e envia o resultado de cada uma ao seu destino.
+    `armazem` permite reaproveitar um armazém residente (daemon do H1).
+    """
+    estrategias = [carregar_estrategia(e) if isinstance(e, str) else e for e in estrategias]
+    agora = datetime.datetime.now(datetime.timezone.utc)
+    # Antes de qualquer import pesado: estratégia fora de hora sai daqui
+    ativas = [e for e in estrategias if e.ativa is None or e.ativa(agora)]
+    for estrategia in estrategias:
+        if estrategia not in ativas:
+            print(f"[{_carimbo(agora)}] {estrategia.titulo}: fora da janela (mercado fechado) — nada a fazer.")
+    estrategias = ativas
+    if not estrategias:
+        return
+
+    if juntar_total:
+        for estrategia in estrategias:
+            juntar_estrategia(estrategia, juntar_total, agora)
+        return
+
+    METRICAS.reiniciar()
+    SAUDE.reiniciar()
+    prazo = iniciar_prazo()
+
+    # Tickers que falham sempre ficam de fora até vencer a quarentena (saude.py).
+    # Cada fatia tem sua própria fila de prioridade e registro de saúde
+    execucoes = []
+    for estrategia in estrategias:
+        simbolos = estrategia.tickers if fatia is None else dividir(estrategia.tickers, fatia)
+        nome = estrategia.nome if fatia is None else f"{estrategia.nome}-{fatia.nome}"
+        saude = carregar_saude(nome)
+        ativos, quarentena = separar(simbolos, saude)
+        execucoes.append({"estrategia": estrategia, "nome": nome, "simbolos": simbolos,
+                          "ativos": ativos, "quarentena": quarentena, "saude": saude})
+
+    plano = planejar([(x["estrategia"], x["ativos"]) for x in execucoes])
+    dados = DadosCompartilhados(plano, armazem if armazem is not None else ArmazemBarras(memoria=True))
+    varias = [e.nome for e in estrategias] if len(estrategias) > 1 else None
+    if varias:
+        print(f"[{_carimbo(agora)}] Plano para {', '.join(varias)}:")
+        for linha in plano.resumo():
+            print(linha)
+    dados.precarregar()
+
+    for x in execucoes:
+        estrategia = x["estrategia"]
+        print(f"[{_carimbo(agora)}] Iniciando {estrategia.titulo}"
+              f"{'' if fatia is None else f' (fatia {fatia})'}...")
+        try:
+            x["resultado"] = estrategia.rodar(x["ativos"], dados, prazo, x["nome"])
+        except Exception as e:
+            # Uma estratégia quebrada não impede o envio das outras: ela
+            # relata tudo como não avaliado
+            print(f"  ⚠️  {estrategia.titulo} falhou: {type(e).__name__}: {e}")
+            x["resultado"] = {"sinais": {c: [] for c in estrategia.categorias}, "relatorio": [],
+                              "pendentes": list(x["ativos"]), "extra": {"erro": type(e).__name__}}
+
+    # A saúde é consolidada depois de todas: um símbolo que veio para uma
+    # estratégia está vivo para as outras
+    for x in execucoes:
+        saude, novos = gravar_saude(x["nome"], x["saude"], simbolos=x["simbolos"])
+        _relatar(x["estrategia"], fatia, x["nome"], x["simbolos"], x["quarentena"], x["resultado"],
+                 saude, novos, agora, varias)
+
+# =======================
+# EXECUÇÃO DIRETA
+# =======================
+
+def main():
+    parser = argumentos("Radares D1, H1 e S1 com um plano de dados comum")
+    parser.add_argument("estrategias", nargs="*", metavar="ESTRATEGIA",
+                        help=f"estratégias a rodar ({', '.join(REGISTRO)}; padrão: todas)")
+    args = parser.parse_args()
+    desconhecidas = [e for e in args.estrategias if e not in REGISTRO]
+    if desconhecidas:
+        parser.error(f"estratégia desconhecida: {', '.join(desconhecidas)} (registradas: {', '.join(REGISTRO)})")
+    executar(args.estrategias or list(REGISTRO), args.fatia, args.juntar)
+
+if __name__ == "__main__":
+    main()
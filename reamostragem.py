@@ -0,0 +1,134 @@
+"""
+Deriva timeframes maiores (D1, W1, MN) a partir da série de menor resolução
+já carregada, em vez de fazer uma requisição separada ao Yahoo para cada um.
+
+As fronteiras de dia/semana/mês são as do pregão da bolsa: as barras são
+agrupadas pela data local de Nova York, então feriados e meios-pregões
+simplesmente não geram barras. Os rótulos seguem a convenção do Yahoo —
+D1 à meia-noite do dia, W1 na segunda-feira da semana, MN no dia 1º do mês.
+"""
+from __future__ import annotations
+
+import os
+
+from dados import FUSO_BOLSA
+from provedores import buscar_historico
+from tardio import tardio
+
+np = tardio("numpy")
+pd = tardio("pandas")
+
+# Liga a comparação das barras derivadas com os agregados do próprio Yahoo
+VALIDAR = os.environ.get("RADAR_VALIDAR_REAMOSTRAGEM") == "1"
+
+# Quantos símbolos e quantas barras do fim entram na validação
+VALIDAR_AMOSTRA = 10
+VALIDAR_BARRAS  = 20
+VALIDAR_RTOL    = 5e-3
+
+AGREGACAO = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+# =======================
+# HELPERS
+# =======================
+
+def _datas_locais(df: pd.DataFrame) -> pd.DatetimeIndex:
+    """
+    Datas do pregão de cada barra, sem fuso (meia-noite local de Nova York).
+    A aritmética de datas é feita sem fuso para não escorregar uma hora
+    quando o período atravessa a troca de horário de verão.
+    """
+    idx = df.index
+    if idx.tz is not None:
+        idx = idx.tz_convert(FUSO_BOLSA).tz_localize(None)
+    return idx.normalize()
+
+def _agregar(df: pd.DataFrame, rotulos: pd.DatetimeIndex) -> pd.DataFrame:
+    colunas = {c: f for c, f in AGREGACAO.items() if c in df.columns}
+    out = df[list(colunas)].groupby(rotulos.rename(None), sort=True).agg(colunas)
+    out.index = out.index.tz_localize(FUSO_BOLSA)
+    return out.dropna(subset=["Close"])
+
+# =======================
+# API
+# =======================
+
+def para_diario(df_h: pd.DataFrame) -> pd.DataFrame:
+    """Barras D1 a partir de barras intraday (H1) do pregão regular."""
+    return _agregar(df_h, _datas_locais(df_h))
+
+def acrescentar(df: pd.DataFrame, rotulo: pd.Timestamp, valores: dict[str, float]) -> pd.DataFrame:
+    """
+    `df` com a barra `rotulo` no fim (no lugar das barras a partir dela, se
+    houver), montado direto do array — sem concat nem reagrupamento.
+    """
+    if len(df) and df.index[-1] >= rotulo:
+        df = df[df.index < rotulo]
+    base = df.to_numpy()
+    linha = np.array([[valores[c] for c in df.columns]], dtype=base.dtype)
+    return pd.DataFrame(np.vstack([base, linha]), index=df.index.append(pd.DatetimeIndex([rotulo])),
+                        columns=df.columns)
+
+def somar_ao_diario(df_d: pd.DataFrame | None, abertura: pd.Timestamp, barra: dict[str, float]) -> pd.DataFrame:
+    """
+    D1 derivado com uma barra H1 nova (`barra`, iniciada em `abertura`)
+    incorporada — o mesmo que para_diario sobre o H1 inteiro: no mesmo dia
+    a última barra diária é reagregada com ela (AGREGACAO), num dia novo
+    ela abre a barra diária.
+    """
+    dia = abertura.tz_convert(FUSO_BOLSA).tz_localize(None).normalize().tz_localize(FUSO_BOLSA)
+    if df_d is None or df_d.empty:
+        return pd.DataFrame([barra], index=pd.DatetimeIndex([dia]))
+    if df_d.index[-1] != dia:
+        return acrescentar(df_d, dia, barra)
+    ultima = df_d.iloc[-1]
+    reagregada = {
+        "Open": ultima["Open"],
+        "High": max(ultima["High"], barra["High"]),
+        "Low": min(ultima["Low"], barra["Low"]),
+        "Close": barra["Close"],
+        "Volume": ultima["Volume"] + barra["Volume"],
+    }
+    return acrescentar(df_d, dia, {c: reagregada[c] for c in df_d.columns})
+
+def para_semanal(df_d: pd.DataFrame) -> pd.DataFrame:
+    """Barras W1 (rotuladas na segunda-feira) a partir de barras D1."""
+    datas = _datas_locais(df_d)
+    segunda = datas - pd.to_timedelta(datas.dayofweek, unit="D")
+    return _agregar(df_d, segunda)
+
+def para_mensal(df_d: pd.DataFrame) -> pd.DataFrame:
+    """Barras MN (rotuladas no dia 1º) a partir de barras D1."""
+    datas = _datas_locais(df_d)
+    primeiro = datas - pd.to_timedelta(datas.day - 1, unit="D")
+    return _agregar(df_d, primeiro)
+
+def derivar(historicos: dict[str, pd.DataFrame], funcao) -> dict[str, pd.DataFrame]:
+    """Aplica `funcao` (para_diario/para_semanal/para_mensal) a cada símbolo."""
+    return {sym: funcao(df) for sym, df in historicos.items()}
+
+def validar_contra_yahoo(derivados: dict[str, pd.DataFrame], period: str, interval: str,
+                         amostra: int = VALIDAR_AMOSTRA) -> dict[str, float]:
+    """
+    Compara o Close das últimas barras derivadas com o agregado do Yahoo
+    para uma amostra de símbolos. Devolve {símbolo: maior desvio relativo}
+    dos que passaram da tolerância — vazio quando tudo bate.
+    """
+    simbolos = sorted(derivados)[:amostra]
+    yahoo = buscar_historico(simbolos, period=period, interval=interval)
+
+    divergentes = {}
+    for sym in simbolos:
+        if sym not in yahoo:
+            continue
+        local = derivados[sym]["Close"].iloc[-VALIDAR_BARRAS:]
+        ref = yahoo[sym]["Close"].copy()
+        ref.index = _datas_locais(ref.to_frame())
+        ref = ref.reindex(_datas_locais(local.to_frame()))
+        desvio = np.nanmax(np.abs(local.to_numpy() / ref.to_numpy() - 1))
+        if not np.isfinite(desvio) or desvio > VALIDAR_RTOL:
+            divergentes[sym] = float(desvio)
+
+    status = "OK" if not divergentes else f"{len(divergentes)} divergente(s): {divergentes}"
+    print(f"  🔎 reamostragem {interval} vs Yahoo ({len(simbolos)} símbolos): {status}")
+    return divergentes
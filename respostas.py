@@ -0,0 +1,161 @@
+"""
+Cache em disco das respostas do Yahoo, com validade por interval.
+
+Cada chamada ao Yahoo (um lote do yf.download, um Ticker.history do
+fallback) é identificada pelos parâmetros da requisição — função,
+símbolos, interval, janela — e a resposta (o DataFrame como veio) fica
+gravada em Parquet até expirar:
+
+- 1h: até o próximo fechamento de barra H1, no máximo VALIDADE_MAXIMA_H1;
+- 1d e 1wk: até o próximo fechamento de pregão;
+- 1mo: VALIDADE_MENSAL.
+
+Assim um `workflow_dispatch` logo depois do agendado (ou o mesmo radar
+rodado de novo na mesma hora) não baixa nada outra vez. Respostas vazias
+nunca são gravadas. A validade vai no nome do arquivo; os vencidos são
+apagados na primeira consulta do processo. Acertos e faltas entram nas
+métricas como `cache.respostas.{interval}`.
+
+O índice (chave → arquivo) é de cada processo e a trava só protege as
+threads dele: quem grava é o processo principal. Os workers do pool de
+paralelo.py abrem o cache só para leitura, e o nome temporário leva o pid
+para que duas execuções no mesmo diretório nunca escrevam no mesmo arquivo.
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+import calendario
+from tardio import tardio
+
+pd = tardio("pandas")
+
+# RADAR_CACHE_RESPOSTAS=0 desliga o cache (toda requisição vai ao Yahoo)
+ATIVO = os.environ.get("RADAR_CACHE_RESPOSTAS", "1") == "1"
+
+# Teto da validade de uma resposta H1 — a barra em formação muda a cada minuto
+VALIDADE_MAXIMA_H1 = datetime.timedelta(minutes=int(os.environ.get("RADAR_CACHE_H1_MINUTOS", "15")))
+
+# Barras mensais só mudam de verdade na virada do mês
+VALIDADE_MENSAL = datetime.timedelta(days=7)
+
+# =======================
+# VALIDADE
+# =======================
+
+def expiracao(interval: str, agora: datetime.datetime) -> datetime.datetime:
+    """Até quando uma resposta de `interval` baixada em `agora` vale."""
+    if interval == "1h":
+        return min(calendario.proximo_fechamento(agora), agora + VALIDADE_MAXIMA_H1)
+    if interval in ("1d", "1wk"):
+        return calendario.proximo_fechamento_sessao(agora)
+    if interval == "1mo":
+        return agora + VALIDADE_MENSAL
+    # Interval sem regra: não guarda
+    return agora
+
+def chave(funcao: str, simbolos, interval: str, **parametros) -> str:
+    """Identificador da requisição: função do yfinance + todos os parâmetros."""
+    texto = json.dumps({"funcao": funcao, "simbolos": list(simbolos), "interval": interval, **parametros},
+                       sort_keys=True)
+    return hashlib.sha1(texto.encode()).hexdigest()
+
+# =======================
+# CACHE
+# =======================
+
+class CacheRespostas:
+    def __init__(self, diretorio: str | None = None, ativo: bool = ATIVO, somente_leitura: bool = False):
+        self._diretorio = diretorio
+        self.ativo = ativo
+        # Sem gravar nem apagar nada (workers do pool de processos)
+        self.somente_leitura = somente_leitura
+        # chave → (expira em, caminho); montado na primeira consulta
+        self._indice = None
+        self._trava = threading.Lock()
+
+    @property
+    def diretorio(self) -> str:
+        if self._diretorio is None:
+            # Import tardio: o armazém depende da camada de dados, que usa este cache
+            from armazem import DIRETORIO_PADRAO
+            self._diretorio = os.path.join(DIRETORIO_PADRAO, "respostas")
+        return self._diretorio
+
+    def _carregar_indice(self, agora: datetime.datetime) -> dict:
+        if self._indice is None:
+            self._indice = {}
+            try:
+                nomes = os.listdir(self.diretorio)
+            except OSError:
+                nomes = []
+            for nome in nomes:
+                # {chave}.{expira em segundos epoch}.parquet
+                partes = nome.split(".")
+                if len(partes) != 3 or partes[2] != "parquet" or not partes[1].isdigit():
+                    continue
+                caminho = os.path.join(self.diretorio, nome)
+                expira = datetime.datetime.fromtimestamp(int(partes[1]), datetime.timezone.utc)
+                if expira <= agora:
+                    if not self.somente_leitura:
+                        _remover(caminho)
+                else:
+                    self._indice[partes[0]] = (expira, caminho)
+        return self._indice
+
+    def ler(self, chave: str, agora: datetime.datetime | None = None) -> pd.DataFrame | None:
+        """Resposta gravada e ainda válida, ou None."""
+        if not self.ativo:
+            return None
+        agora = _agora() if agora is None else agora
+        with self._trava:
+            entrada = self._carregar_indice(agora).get(chave)
+        if entrada is None or entrada[0] <= agora:
+            return None
+        try:
+            return pd.read_parquet(entrada[1])
+        except Exception:
+            # Arquivo truncado ou apagado por fora: vale como falta
+            return None
+
+    def gravar(self, chave: str, interval: str, df: pd.DataFrame | None,
+               agora: datetime.datetime | None = None):
+        """Grava a resposta (se não vazia) até a expiração do seu interval."""
+        if not self.ativo or self.somente_leitura or df is None or df.empty:
+            return
+        agora = _agora() if agora is None else agora
+        expira = expiracao(interval, agora)
+        if expira <= agora:
+            return
+        caminho = os.path.join(self.diretorio, f"{chave}.{int(expira.timestamp())}.parquet")
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            df.to_parquet(tmp)
+            os.replace(tmp, caminho)
+        except Exception as e:
+            # Cache é só economia: falha ao gravar não derruba a busca
+            print(f"  ⚠️  cache de respostas não gravado: {type(e).__name__}: {e}")
+            return
+        with self._trava:
+            indice = self._carregar_indice(agora)
+            anterior = indice.get(chave)
+            indice[chave] = (expira, caminho)
+        if anterior is not None and anterior[1] != caminho:
+            _remover(anterior[1])
+
+def _agora() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def _remover(caminho: str):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+# Uma instância por processo, usada por dados.py
+RESPOSTAS = CacheRespostas()
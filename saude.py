@@ -0,0 +1,208 @@
+"""
+Saúde dos símbolos entre execuções e quarentena automática dos que falham
+sempre (ticker renomeado, deslistado, sem dado no Yahoo).
+
+Durante a execução, a camada de dados anota cada símbolo pedido em
+`buscar_historico`: veio ou não veio (com o tipo da exceção, quando houve;
+senão "vazio"). No fim, o radar consolida em `gravar_saude`: qualquer busca
+com sucesso zera as falhas do símbolo; só falhas somam uma. Execução em
+que nenhum símbolo veio é queda do provedor e não conta contra ninguém.
+
+Com FALHAS_QUARENTENA falhas seguidas o símbolo sai das próximas execuções
+por QUARENTENA_HORAS; cada nova falha depois de liberado dobra o prazo (até
+QUARENTENA_MAXIMA_HORAS). Vencido o prazo, ele volta à fila sozinho — se
+vier, sai da quarentena. O registro fica ao lado do armazém de barras,
+um arquivo por radar (e por fatia), como a fila de prioridade.
+"""
+import datetime
+import json
+import os
+
+# Falhas seguidas até a primeira quarentena
+FALHAS_QUARENTENA = int(os.environ.get("RADAR_FALHAS_QUARENTENA", "3"))
+
+# Depois de um bloco falhar, se os AMOSTRA_ISOLADA primeiros símbolos
+# falham também sozinhos o problema é do bloco (provedor, armazém), não deles
+AMOSTRA_ISOLADA = 3
+
+# Duração da primeira quarentena e teto do backoff exponencial (horas)
+QUARENTENA_HORAS = float(os.environ.get("RADAR_QUARENTENA_HORAS", "24"))
+QUARENTENA_MAXIMA_HORAS = 24 * 30
+
+# =======================
+# OCORRÊNCIAS DA EXECUÇÃO
+# =======================
+
+class Saude:
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Zera as ocorrências — usado pelo daemon do H1 a cada varredura."""
+        self.sucessos = set()
+        self.faltas = set()
+        # Falharam depois de baixados (ex.: exceção ao avaliar) — contam mesmo com sucesso na busca
+        self.quebrados = set()
+        # símbolo → tipo do último erro
+        self.erros = {}
+
+    def observar(self, pedidos: list[str], recebidos):
+        """Resultado de uma busca: quem estava em `pedidos` e não veio em `recebidos` faltou."""
+        for sym in pedidos:
+            if sym in recebidos:
+                self.sucessos.add(sym)
+            else:
+                self.faltas.add(sym)
+
+    def anotar_erro(self, sym: str, erro: BaseException):
+        self.erros[sym] = type(erro).__name__
+
+    def falhou(self, sym: str, erro: BaseException):
+        """Falha fora da busca (ex.: exceção ao avaliar o símbolo)."""
+        self.anotar_erro(sym, erro)
+        self.quebrados.add(sym)
+
+    def para_dict(self) -> dict:
+        return {"sucessos": sorted(self.sucessos), "faltas": sorted(self.faltas),
+                "quebrados": sorted(self.quebrados), "erros": dict(self.erros)}
+
+    def incorporar(self, outro: dict):
+        """Junta as ocorrências de `outro` (para_dict de outro processo, ex.: worker do pool)."""
+        self.sucessos.update(outro["sucessos"])
+        self.faltas.update(outro["faltas"])
+        self.quebrados.update(outro["quebrados"])
+        self.erros.update(outro["erros"])
+
+    def falhas(self) -> dict[str, str]:
+        """
+        {símbolo: tipo do erro} de quem não veio em nenhuma busca da execução
+        ou quebrou depois de baixado.
+        """
+        if not self.sucessos:
+            # Nada veio: o problema é o provedor, não os símbolos
+            return {}
+        return {sym: self.erros.get(sym, "vazio") for sym in (self.faltas - self.sucessos) | self.quebrados}
+
+# Uma instância por processo, alimentada por provedores.buscar_historico
+SAUDE = Saude()
+
+def isolar_falhas(avaliar, saude: Saude = SAUDE):
+    """
+    Envolve `avaliar(bloco)` para prazo.em_blocos: se o bloco levantar,
+    cada símbolo é avaliado sozinho e os que falharem vão para
+    `saude.falhou` sem levar os outros junto. Devolve a lista de resultados
+    — um do bloco inteiro ou um por símbolo que passou. Se os
+    AMOSTRA_ISOLADA primeiros falharem também, a exceção sobe e o bloco
+    inteiro fica pendente.
+    """
+    def avaliar_isolado(bloco):
+        try:
+            return [avaliar(bloco)]
+        except Exception as e:
+            if len(bloco) == 1:
+                print(f"  ⚠️  {bloco[0]}: {type(e).__name__}: {e}")
+                saude.falhou(bloco[0], e)
+                return []
+            print(f"  ⚠️  bloco de {len(bloco)} símbolo(s) falhou ({type(e).__name__}: {e}) — avaliando um a um")
+        resultados, falhas = [], []
+        for sym in bloco:
+            try:
+                resultados.append(avaliar([sym]))
+            except Exception as e:
+                print(f"  ⚠️  {sym}: {type(e).__name__}: {e}")
+                falhas.append((sym, e))
+                if not resultados and len(falhas) == AMOSTRA_ISOLADA < len(bloco):
+                    raise
+        for sym, erro in falhas:
+            saude.falhou(sym, erro)
+        return resultados
+    return avaliar_isolado
+
+# =======================
+# REGISTRO
+# =======================
+
+def _caminho(radar: str) -> str:
+    # Import tardio: o armazém depende da camada de dados, que anota aqui
+    from armazem import DIRETORIO_PADRAO
+    return os.path.join(DIRETORIO_PADRAO, f"saude_{radar}.json")
+
+def _agora() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def carregar_saude(radar: str) -> dict[str, dict]:
+    """
+    {símbolo: {"falhas", "erro", "ultima_falha", "ultimo_sucesso",
+    "quarentena_ate"}} da execução anterior (datas em ISO 8601, UTC).
+    """
+    try:
+        with open(_caminho(radar)) as f:
+            return dict(json.load(f))
+    except (OSError, ValueError, TypeError):
+        return {}
+
+def _em_quarentena(registro: dict, agora: datetime.datetime) -> bool:
+    ate = registro.get("quarentena_ate")
+    return ate is not None and datetime.datetime.fromisoformat(ate) > agora
+
+def separar(simbolos: list[str], registros: dict[str, dict],
+            agora: datetime.datetime | None = None) -> tuple[list[str], list[str]]:
+    """(símbolos a avaliar, símbolos em quarentena), ambos na ordem recebida."""
+    agora = _agora() if agora is None else agora
+    quarentena = {sym for sym in simbolos if sym in registros and _em_quarentena(registros[sym], agora)}
+    return [sym for sym in simbolos if sym not in quarentena], [sym for sym in simbolos if sym in quarentena]
+
+def _horas_quarentena(falhas: int) -> float:
+    return min(QUARENTENA_HORAS * 2 ** (falhas - FALHAS_QUARENTENA), QUARENTENA_MAXIMA_HORAS)
+
+def gravar_saude(radar: str, registros: dict[str, dict], saude: Saude = SAUDE,
+                 agora: datetime.datetime | None = None,
+                 simbolos: list[str] | None = None) -> tuple[dict[str, dict], list[str]]:
+    """
+    Consolida as ocorrências da execução em `registros` e grava. Devolve
+    os registros atualizados e os símbolos que entraram (ou voltaram) em
+    quarentena nesta execução. Com `simbolos`, só eles entram no registro
+    (várias estratégias no mesmo processo dividem o SAUDE).
+    """
+    agora = _agora() if agora is None else agora
+    registros = {sym: dict(r) for sym, r in registros.items()}
+    falhas = saude.falhas()
+    sucessos = saude.sucessos
+    if simbolos is not None:
+        simbolos = set(simbolos)
+        falhas = {sym: erro for sym, erro in falhas.items() if sym in simbolos}
+        sucessos = sucessos & simbolos
+    novos = []
+    for sym in sucessos - falhas.keys():
+        r = registros.setdefault(sym, {})
+        r.update(falhas=0, ultimo_sucesso=agora.isoformat(timespec="seconds"), quarentena_ate=None)
+    for sym, erro in falhas.items():
+        r = registros.setdefault(sym, {})
+        r.update(falhas=r.get("falhas", 0) + 1, erro=erro, ultima_falha=agora.isoformat(timespec="seconds"))
+        if r["falhas"] >= FALHAS_QUARENTENA:
+            ate = agora + datetime.timedelta(hours=_horas_quarentena(r["falhas"]))
+            r["quarentena_ate"] = ate.isoformat(timespec="seconds")
+            novos.append(sym)
+    try:
+        caminho = _caminho(radar)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, "w") as f:
+            json.dump(registros, f)
+    except OSError as e:
+        print(f"  ⚠️  saúde dos símbolos não gravada: {e}")
+    return registros, sorted(novos)
+
+def resumo_quarentena(quarentena: list[str], registros: dict[str, dict], novos: list[str] = ()) -> str:
+    """Linha do log com os símbolos pulados nesta execução e os que entraram agora."""
+    partes = []
+    for sym in list(quarentena) + [sym for sym in novos if sym not in quarentena]:
+        r = registros.get(sym)
+        if not r or not r.get("quarentena_ate"):
+            # Sem registro à mão (ex.: junção das fatias): só o símbolo
+            partes.append(sym)
+            continue
+        quando = datetime.datetime.fromisoformat(r["quarentena_ate"]).strftime("%d/%m %H:%M")
+        partes.append(f"{sym} ({r['falhas']} falha(s), {r.get('erro', '?')}, até {quando} UTC)")
+    if not partes:
+        return "Quarentena: nenhum símbolo"
+    return f"🚫 Quarentena: {len(partes)} símbolo(s) — " + ", ".join(partes)
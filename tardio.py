@@ -0,0 +1,37 @@
+"""
+Import tardio dos módulos pesados (pandas, numpy, yfinance, requests).
+
+    pd = tardio("pandas")
+
+devolve um substituto que só importa o módulo no primeiro acesso a um
+atributo (`pd.DataFrame`, `pd.concat`...). Assim os radares sobem sem
+pagar ~0,5 s de imports quando não há nada a fazer (mercado fechado,
+nenhuma barra nova) e cada etapa carrega só o que usa. Depois do primeiro
+acesso os atributos do módulo ficam no próprio substituto: o custo por
+acesso é o de um atributo comum.
+
+Os módulos que usam `tardio` têm `from __future__ import annotations`
+para que as anotações (`pd.DataFrame | None`) não disparem o import.
+"""
+import importlib
+import threading
+
+class ModuloTardio:
+    def __init__(self, nome: str):
+        self.__dict__["_nome"] = nome
+        self.__dict__["_trava"] = threading.Lock()
+
+    def __getattr__(self, atributo: str):
+        # Só chamado para atributos que ainda não estão no substituto
+        with self._trava:
+            modulo = importlib.import_module(self._nome)
+            if "__name__" not in self.__dict__:
+                self.__dict__.update(vars(modulo))
+        # Atributos criados sob demanda pelo módulo (ex.: __getattr__ do numpy)
+        return getattr(modulo, atributo)
+
+    def __repr__(self):
+        return f"<módulo tardio {self._nome!r}>"
+
+def tardio(nome: str) -> ModuloTardio:
+    return ModuloTardio(nome)
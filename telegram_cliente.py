@@ -0,0 +1,187 @@
+"""
+Cliente de entrega no Telegram compartilhado pelos radares.
+
+- Uma sessão HTTP com pool de conexões para o processo inteiro (em vez de
+  um `requests.post` com conexão nova a cada envio).
+- Mensagens acima do limite do Telegram (4096 caracteres) são divididas em
+  várias, sempre em quebra de linha ou entre dois tickers de uma lista. Um
+  *negrito*/_itálico_/`código` do Markdown cortado ao meio é fechado no
+  fim de uma parte e reaberto no começo da seguinte.
+- 429 respeita o `retry_after` devolvido pelo Telegram; 5xx e erros de rede
+  são repetidos com backoff; tudo com número limitado de tentativas.
+- Vários destinos (chat/tópico) recebem a mesma mensagem em paralelo.
+
+TELEGRAM_API_URL troca o endereço da API (lido a cada envio) — usado com o
+servidor falso de telegram_mock.py.
+"""
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metricas import METRICAS
+from tardio import tardio
+
+requests = tardio("requests")
+
+TELEGRAM_API = "https://api.telegram.org"
+
+# Limite de caracteres por mensagem do Telegram
+LIMITE_MENSAGEM = 4096
+
+# Marcadores de entidade do Markdown do Telegram
+MARCADORES = "*_`"
+
+TIMEOUT = 20
+TENTATIVAS = 4
+BACKOFF_BASE = 1.0
+
+# Espera máxima aceita de um retry_after (s) — acima disso desiste da parte
+RETRY_AFTER_MAX = 60
+
+# =======================
+# SESSÃO
+# =======================
+
+_SESSAO = None
+
+def sessao() -> requests.Session:
+    """Sessão HTTP única do processo, com pool de conexões."""
+    global _SESSAO
+    if _SESSAO is None:
+        s = requests.Session()
+        s.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        s.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _SESSAO = s
+    return _SESSAO
+
+# =======================
+# DESTINOS
+# =======================
+
+class Destino:
+    def __init__(self, chat_id: str, thread_id: str | None = None):
+        self.chat_id = chat_id
+        self.thread_id = thread_id
+
+    def __repr__(self):
+        return f"{self.chat_id}/{self.thread_id}" if self.thread_id else str(self.chat_id)
+
+def destinos_do_ambiente(sufixo: str = "") -> list[Destino]:
+    """
+    Destinos de TELEGRAM_CHAT_ID{sufixo} (um ou vários ids separados por
+    vírgula) e do tópico opcional TELEGRAM_THREAD_ID{sufixo}.
+    """
+    chats = [c.strip() for c in os.environ[f"TELEGRAM_CHAT_ID{sufixo}"].split(",") if c.strip()]
+    thread = os.environ.get(f"TELEGRAM_THREAD_ID{sufixo}") or None
+    return [Destino(chat, thread) for chat in chats]
+
+# =======================
+# DIVISÃO DE MENSAGENS
+# =======================
+
+def _abertas(texto: str) -> str:
+    """Marcadores que fecham as entidades abertas no fim de `texto`, na ordem de fechamento."""
+    abertas = sorted((m for m in MARCADORES if texto.count(m) % 2), key=texto.rindex)
+    return "".join(reversed(abertas))
+
+def _fora_de_entidade(texto: str) -> bool:
+    """True se todo *, _ e ` aberto em `texto` já foi fechado (Markdown do Telegram)."""
+    return not _abertas(texto)
+
+def _corte_seco(texto: str, limite: int) -> list[str]:
+    """Último recurso (um item sozinho maior que o limite): corta em qualquer caractere."""
+    pedacos = []
+    while len(texto) > limite:
+        k = limite
+        while True:
+            pedaco = texto[:k]
+            fecha = _abertas(pedaco)
+            # Sem entidade vazia: o corte não fica logo depois de um marcador de abertura
+            if len(pedaco) + len(fecha) <= limite and not (fecha and pedaco[-1] in fecha):
+                break
+            k -= 1
+        pedacos.append(pedaco + fecha)
+        texto = fecha[::-1] + texto[k:]
+    return pedacos + [texto]
+
+def dividir_mensagem(texto: str, limite: int = LIMITE_MENSAGEM) -> list[str]:
+    """
+    Divide `texto` em partes de até `limite` caracteres. O corte é sempre
+    numa quebra de linha ou na vírgula entre dois itens de uma lista de
+    tickers; se cair dentro de um *negrito*/_itálico_, a entidade é fechada
+    no fim da parte e reaberta no começo da próxima.
+    """
+    if len(texto) <= limite:
+        return [texto]
+    partes, atual = [], ""
+    for linha in texto.split("\n"):
+        for j, item in enumerate(linha.split(", ")):
+            sep = "" if not atual else (", " if j else "\n")
+            candidato = atual + sep + item
+            # `<` e não `<=`: a parte que fecha no meio de uma lista ganha a vírgula final.
+            # Os marcadores abertos contam: eles são fechados no corte
+            if not atual or len(candidato) + len(_abertas(candidato)) < limite:
+                atual = candidato
+            else:
+                fecha = _abertas(atual)
+                partes.append(atual + ("," if j else "") + fecha)
+                atual = fecha[::-1] + item
+    partes.append(atual)
+    return [pedaco for p in partes if p.strip() for pedaco in _corte_seco(p, limite)]
+
+# =======================
+# ENVIO
+# =======================
+
+def _postar(destino: Destino, texto: str, token: str) -> bool:
+    url = f"{os.environ.get('TELEGRAM_API_URL', TELEGRAM_API)}/bot{token}/sendMessage"
+    payload = {"chat_id": destino.chat_id, "text": texto, "parse_mode": "Markdown"}
+    if destino.thread_id:
+        payload["message_thread_id"] = int(destino.thread_id)
+
+    for n in range(1, TENTATIVAS + 1):
+        espera = BACKOFF_BASE * 2 ** (n - 1)
+        try:
+            with METRICAS.cronometro("telegram"):
+                resp = sessao().post(url, json=payload, timeout=TIMEOUT)
+            METRICAS.contar("telegram.requisicoes")
+            METRICAS.contar("telegram.bytes", len(resp.request.body or b"") + len(resp.content))
+        except requests.RequestException as e:
+            print(f"  ⚠️  Telegram {destino}: {e}")
+        else:
+            if resp.ok:
+                return True
+            if resp.status_code == 429:
+                try:
+                    espera = float(resp.json()["parameters"]["retry_after"])
+                except Exception:
+                    pass
+                if espera > RETRY_AFTER_MAX:
+                    print(f"  ⚠️  Telegram {destino}: retry_after={espera:.0f}s acima do máximo, desistindo")
+                    return False
+            elif resp.status_code < 500:
+                # 4xx que não é limite de taxa não melhora repetindo
+                print(f"  ⚠️  Telegram {destino}: HTTP {resp.status_code} {resp.text[:200]}")
+                return False
+        if n < TENTATIVAS:
+            time.sleep(espera)
+    print(f"  ⚠️  Telegram {destino}: sem sucesso após {TENTATIVAS} tentativa(s)")
+    return False
+
+def _enviar_destino(destino: Destino, partes: list[str], token: str) -> bool:
+    # Partes em sequência — a ordem das mensagens no chat importa
+    return all([_postar(destino, parte, token) for parte in partes])
+
+def enviar(texto: str, destinos: list[Destino], token: str) -> dict[str, bool]:
+    """
+    Envia `texto` (dividido se preciso) a todos os destinos em paralelo.
+    Devolve {destino: entregue}. Falhas são logadas, nunca levantadas.
+    """
+    partes = dividir_mensagem(texto)
+    if not destinos:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(destinos)) as pool:
+        entregues = list(pool.map(lambda d: _enviar_destino(d, partes, token), destinos))
+    return {repr(d): ok for d, ok in zip(destinos, entregues)}
@@ -0,0 +1,116 @@
+"""
+Servidor falso da API do Telegram para exercitar telegram_cliente.py sem
+mandar nada de verdade.
+
+Responde a POST /bot<token>/sendMessage como o Telegram: grava as mensagens
+recebidas, rejeita texto acima de 4096 caracteres ou com Markdown
+desbalanceado (HTTP 400) e pode simular limite de taxa devolvendo 429 com
+`retry_after` nas primeiras requisições e latência (`atraso`, em segundos)
+em cada resposta.
+
+    python telegram_mock.py --porta 8081 --falhas-429 2
+    TELEGRAM_API_URL=http://127.0.0.1:8081 python radar.py
+
+Ou, no mesmo processo:
+
+    with ServidorTelegramFalso(falhas_429=1) as srv:
+        os.environ["TELEGRAM_API_URL"] = srv.url
+        ...
+        srv.mensagens  # [{"chat_id": ..., "text": ..., ...}]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telegram_cliente import LIMITE_MENSAGEM, _fora_de_entidade
+
+class ServidorTelegramFalso:
+    def __init__(self, porta: int = 0, falhas_429: int = 0, retry_after: int = 1, atraso: float = 0.0):
+        self.falhas_429 = falhas_429
+        self.retry_after = retry_after
+        self.atraso = atraso
+        self.mensagens = []
+        self.requisicoes = 0
+        self.lock = threading.Lock()
+        self.http = ThreadingHTTPServer(("127.0.0.1", porta), self._handler())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, porta = self.http.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def _responder(self, payload: dict) -> tuple[int, dict]:
+        with self.lock:
+            self.requisicoes += 1
+            if self.requisicoes <= self.falhas_429:
+                return 429, {"ok": False, "error_code": 429,
+                             "description": f"Too Many Requests: retry after {self.retry_after}",
+                             "parameters": {"retry_after": self.retry_after}}
+            texto = payload.get("text", "")
+            if len(texto) > LIMITE_MENSAGEM:
+                return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"}
+            if payload.get("parse_mode") == "Markdown" and not _fora_de_entidade(texto):
+                return 400, {"ok": False, "error_code": 400,
+                             "description": "Bad Request: can't parse entities"}
+            self.mensagens.append(payload)
+            return 200, {"ok": True, "result": {"message_id": len(self.mensagens), "text": texto}}
+
+    def _handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(tamanho) or b"{}")
+                except ValueError:
+                    payload = {}
+                if self.path.endswith("/sendMessage"):
+                    time.sleep(servidor.atraso)
+                    status, corpo = servidor._responder(payload)
+                else:
+                    status, corpo = 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+                dados = json.dumps(corpo).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.http.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.http.shutdown()
+        self.http.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso da API do Telegram")
+    parser.add_argument("--porta", type=int, default=8081)
+    parser.add_argument("--falhas-429", type=int, default=0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--atraso", type=float, default=0.0, help="latência de cada resposta (s)")
+    args = parser.parse_args()
+
+    srv = ServidorTelegramFalso(args.porta, args.falhas_429, args.retry_after, args.atraso)
+    print(f"Telegram falso em {srv.url} (Ctrl+C para sair)")
+    try:
+        srv.http.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    for m in srv.mensagens:
+        print(f"--- {m.get('chat_id')}/{m.get('message_thread_id')} ({len(m.get('text', ''))} chars)")
+        print(m.get("text", ""))
+
+if __name__ == "__main__":
+    main()
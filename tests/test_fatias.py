@@ -0,0 +1,53 @@
+"""Junção das fatias: só resultados da mesma execução entram na mensagem."""
+import json
+
+import pytest
+
+from fatias import Fatia, dividir, gravar_resultado, juntar
+
+UNIVERSO = [f"S{i:02d}" for i in range(30)]
+TOTAL = 3
+
+def _gravar(diretorio):
+    for indice in range(TOTAL):
+        fatia = Fatia(indice, TOTAL)
+        simbolos = dividir(UNIVERSO, fatia)
+        gravar_resultado("d1", fatia, simbolos, {"sinais": simbolos[:1]}, [], diretorio=str(diretorio))
+
+def test_junta_fatias_da_mesma_execucao(tmp_path, monkeypatch):
+    monkeypatch.setenv("GITHUB_RUN_ID", "7")
+    _gravar(tmp_path)
+
+    r = juntar("d1", TOTAL, UNIVERSO, str(tmp_path))
+
+    assert r["faltando"] == []
+    assert len(r["sinais"]["sinais"]) == TOTAL
+    assert {f["execucao"] for f in r["fatias"]} == {"7"}
+
+def test_fatia_de_outra_execucao_fica_de_fora(tmp_path, monkeypatch):
+    monkeypatch.setenv("GITHUB_RUN_ID", "7")
+    _gravar(tmp_path)
+    monkeypatch.setenv("GITHUB_RUN_ID", "8")
+    gravar_resultado("d1", Fatia(0, TOTAL), dividir(UNIVERSO, Fatia(0, TOTAL)), {"sinais": []}, [],
+                     diretorio=str(tmp_path))
+
+    r = juntar("d1", TOTAL, UNIVERSO, str(tmp_path))
+
+    assert r["faltando"] == [sym for sym in UNIVERSO if sym not in dividir(UNIVERSO, Fatia(0, TOTAL))]
+    assert [f["fatia"] for f in r["fatias"]] == [0]
+
+@pytest.mark.parametrize("idade, descartada", [("2020-01-01T00:00:00+00:00", True), (None, False)])
+def test_sem_id_vale_o_horario(tmp_path, monkeypatch, idade, descartada):
+    monkeypatch.delenv("GITHUB_RUN_ID", raising=False)
+    monkeypatch.delenv("RADAR_EXECUCAO_ID", raising=False)
+    _gravar(tmp_path)
+    if idade:
+        caminho = tmp_path / "d1-1de3.json"
+        r = json.loads(caminho.read_text())
+        r["gerado_em"] = idade
+        caminho.write_text(json.dumps(r))
+
+    r = juntar("d1", TOTAL, UNIVERSO, str(tmp_path))
+
+    assert (r["faltando"] == dividir(UNIVERSO, Fatia(1, TOTAL))) is descartada
+    assert (r["faltando"] == []) is not descartada
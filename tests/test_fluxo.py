@@ -0,0 +1,61 @@
+"""Fluxo do H1 em replay: histórico só até o feed, nada enviado nem gravado para as execuções de hora em hora."""
+import os
+
+import pandas as pd
+import pytest
+
+import armazem
+import calendario
+import metricas
+import provedores
+import radar_h1
+from fluxo import FeedReplay, gerar_replay
+
+SIMBOLOS = ["AAPL", "MSFT", "NVDA"]
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    fixture = str(tmp_path / "fixture")
+    provedores.gerar_fixture(fixture, SIMBOLOS)
+    # O provedor serve o histórico inteiro — inclusive as barras do pregão reproduzido
+    monkeypatch.setattr(provedores, "_ATUAL", provedores.ProvedorFixture(fixture))
+    monkeypatch.setattr(armazem, "DIRETORIO_PADRAO", str(tmp_path / "cache"))
+    monkeypatch.setattr(radar_h1, "ESTADO_DAEMON", str(tmp_path / "cache" / "{nome}_daemon.json"))
+    monkeypatch.setattr(radar_h1, "ArmazemBarras",
+                        lambda **kw: armazem.ArmazemBarras(str(tmp_path / "cache"), **kw))
+    monkeypatch.setattr(metricas, "DIRETORIO_METRICAS", str(tmp_path / "metricas"))
+
+    h1 = pd.read_parquet(os.path.join(fixture, "1h", "AAPL.parquet"))
+    pregao = [a for a in h1.index if calendario.abertura_barra(a) == a][-1].normalize()
+    arquivo = str(tmp_path / "negocios.parquet")
+    gerar_replay(fixture, SIMBOLOS, pregao, arquivo)
+    barras = len({calendario.fechamento_barra(a) for a in h1.index[h1.index >= pregao]
+                  if calendario.abertura_barra(a) == a})
+    return FeedReplay(arquivo), barras, tmp_path
+
+def test_replay_nao_envia_nem_grava_estado(replay, monkeypatch, capsys):
+    feed, barras, tmp_path = replay
+    enviadas = []
+    monkeypatch.setattr(radar_h1, "send_telegram", enviadas.append)
+
+    mensagens = radar_h1.fluxo(feed)
+
+    assert len(mensagens) == barras
+    assert enviadas == []
+    assert not (tmp_path / "cache" / "h1_daemon.json").exists()
+    assert not (tmp_path / "cache" / "saude_h1.json").exists()
+    assert not list((tmp_path / "cache").rglob("*.estado.json"))
+    assert (tmp_path / "metricas" / "h1_fluxo.json").exists()
+    saida = capsys.readouterr().out
+    assert "descartada" not in saida
+    assert f"{len(SIMBOLOS)} avaliado(s)" in saida
+
+def test_barra_anterior_ao_historico_descartada():
+    indice = pd.date_range("2025-10-16 09:30", periods=3, freq="h", tz=calendario.FUSO_BOLSA)
+    df = pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Volume": 10.0}, index=indice)
+    historicos = {"1h": {"AAPL": df}, "1d": {}}
+
+    descartados = radar_h1._anexar_barras(historicos, {"AAPL": (indice[1].to_pydatetime(), 9, 9, 9, 9, 9)})
+
+    assert descartados == ["AAPL"]
+    assert historicos["1h"]["AAPL"] is df
@@ -0,0 +1,36 @@
+"""Pool de processos: métricas e saúde registradas nos workers chegam ao processo principal."""
+import pytest
+
+import paralelo
+from metricas import METRICAS
+from saude import SAUDE
+
+def _pedaco(simbolos, quebrado):
+    for sym in simbolos:
+        METRICAS.registrar_tempo("avaliar", 0.5, sym)
+        METRICAS.contar("simbolos")
+        if sym == quebrado:
+            SAUDE.falhou(sym, ValueError("sem barras"))
+    return simbolos
+
+@pytest.fixture
+def limpo():
+    METRICAS.reiniciar()
+    SAUDE.reiniciar()
+    yield
+    paralelo.encerrar()
+    METRICAS.reiniciar()
+    SAUDE.reiniciar()
+
+@pytest.mark.parametrize("processos", [1, 2])
+def test_ocorrencias_dos_workers_somadas(limpo, processos):
+    simbolos = [f"S{i:02d}" for i in range(10)]
+
+    partes = paralelo.mapear(_pedaco, simbolos, "S07", processos=processos, tamanho=3)
+
+    assert [sym for p in partes for sym in p] == simbolos
+    assert METRICAS.tempos["avaliar"] == {"chamadas": 10, "segundos": 5.0}
+    assert METRICAS.contadores["simbolos"] == 10
+    assert set(METRICAS.por_simbolo) == set(simbolos)
+    assert SAUDE.quebrados == {"S07"}
+    assert SAUDE.erros == {"S07": "ValueError"}
@@ -0,0 +1,26 @@
+"""Partida dos radares: importar não traz as dependências pesadas e o H1 sem barra nova sai cedo."""
+import os
+
+import pytest
+
+from benchmark import (CODIGO_H1_SEM_BARRA_NOVA, ENV_FICTICIO, MODULOS_PESADOS, ORCAMENTO_IMPORT_MS, RADARES,
+                       _importtime)
+
+@pytest.fixture
+def env(tmp_path):
+    env = dict(os.environ, **ENV_FICTICIO, RADAR_CACHE_DIR=str(tmp_path))
+    env.pop("RADAR_H1_SEMPRE_VARRER", None)
+    return env
+
+@pytest.mark.parametrize("modulo", RADARES.values())
+def test_import_dentro_do_orcamento(env, modulo):
+    modulos, _, _ = _importtime(f"import {modulo}", env)
+
+    assert modulos[modulo] / 1000 <= ORCAMENTO_IMPORT_MS
+    assert [m for m in MODULOS_PESADOS if m in modulos] == []
+
+def test_h1_sem_barra_nova_nada_a_fazer(env):
+    modulos, _, saida = _importtime(CODIGO_H1_SEM_BARRA_NOVA, env)
+
+    assert "nada a fazer" in saida
+    assert [m for m in MODULOS_PESADOS if m in modulos] == []
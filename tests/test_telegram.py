@@ -0,0 +1,100 @@
+"""telegram_cliente contra o servidor falso de telegram_mock.py."""
+import re
+import time
+import types
+
+import pytest
+
+import telegram_cliente
+from telegram_cliente import LIMITE_MENSAGEM, Destino, _fora_de_entidade, dividir_mensagem, enviar
+from telegram_mock import ServidorTelegramFalso
+
+TICKERS = [f"T{i:04d}" for i in range(2500)]
+
+@pytest.fixture
+def telegram(monkeypatch):
+    """Abre o servidor falso com os parâmetros pedidos e aponta o cliente para ele."""
+    abertos = []
+
+    def abrir(**kwargs):
+        srv = ServidorTelegramFalso(**kwargs).__enter__()
+        abertos.append(srv)
+        monkeypatch.setenv("TELEGRAM_API_URL", srv.url)
+        return srv
+
+    yield abrir
+    for srv in abertos:
+        srv.__exit__(None, None, None)
+
+def _textos(srv: ServidorTelegramFalso, chat_id: str) -> list[str]:
+    return [m["text"] for m in srv.mensagens if m["chat_id"] == chat_id]
+
+def test_mensagem_acima_do_limite_vai_em_partes(telegram):
+    srv = telegram()
+    texto = "*Radar — teste*\n\n*Sinais:* " + ", ".join(TICKERS)
+    assert len(texto) > LIMITE_MENSAGEM
+
+    assert enviar(texto, [Destino("1")], "token") == {"1": True}
+
+    partes = _textos(srv, "1")
+    assert len(partes) > 1
+    assert all(len(p) <= LIMITE_MENSAGEM for p in partes)
+    assert re.findall(r"T\d{4}", "".join(partes)) == TICKERS
+
+def _sem_dormir(monkeypatch, sleep):
+    # Só o cliente: o servidor falso roda no mesmo processo e usa o time de verdade
+    monkeypatch.setattr(telegram_cliente, "time", types.SimpleNamespace(sleep=sleep))
+
+def test_429_espera_o_retry_after(telegram, monkeypatch):
+    esperas = []
+    _sem_dormir(monkeypatch, esperas.append)
+    srv = telegram(falhas_429=2, retry_after=7)
+
+    assert enviar("*oi*", [Destino("1")], "token") == {"1": True}
+
+    assert esperas == [7.0, 7.0]
+    assert srv.requisicoes == 3
+    assert _textos(srv, "1") == ["*oi*"]
+
+def test_429_acima_do_maximo_desiste(telegram, monkeypatch):
+    esperas = []
+    _sem_dormir(monkeypatch, esperas.append)
+    srv = telegram(falhas_429=1, retry_after=telegram_cliente.RETRY_AFTER_MAX + 1)
+
+    assert enviar("oi", [Destino("1")], "token") == {"1": False}
+    assert esperas == []
+    assert srv.mensagens == []
+
+def test_destinos_recebem_em_paralelo_e_em_ordem(telegram):
+    atraso = 0.2
+    srv = telegram(atraso=atraso)
+    destinos = [Destino(str(chat), "9" if chat == 2 else None) for chat in range(1, 5)]
+    texto = "*Sinais:* " + ", ".join(TICKERS[:1500])
+    partes = dividir_mensagem(texto)
+
+    inicio = time.monotonic()
+    entregues = enviar(texto, destinos, "token")
+    duracao = time.monotonic() - inicio
+
+    assert all(entregues.values()) and len(entregues) == len(destinos)
+    for destino in destinos:
+        assert _textos(srv, destino.chat_id) == partes
+    assert all(m.get("message_thread_id") == 9 for m in srv.mensagens if m["chat_id"] == "2")
+    # Em série seriam len(destinos) × len(partes) respostas de `atraso`
+    assert duracao < len(destinos) * len(partes) * atraso * 0.6
+
+@pytest.mark.parametrize("texto", [
+    "*Sinais:* *" + ", ".join(TICKERS) + "*",
+    "_" + ", ".join(TICKERS[:1200]) + "_\n*" + ", ".join(TICKERS[1200:]) + "*",
+    "*" + "X" * (3 * LIMITE_MENSAGEM) + "*",
+], ids=["lista em negrito", "itálico e negrito", "item maior que o limite"])
+def test_entidade_nunca_fica_aberta_entre_partes(telegram, texto):
+    srv = telegram()
+
+    # O servidor falso responde 400 a Markdown desbalanceado, como o Telegram
+    assert enviar(texto, [Destino("1")], "token") == {"1": True}
+
+    partes = _textos(srv, "1")
+    assert len(partes) > 1
+    assert all(_fora_de_entidade(p) and len(p) <= LIMITE_MENSAGEM for p in partes)
+    assert not any("**" in p or "__" in p for p in partes)
@@ -0,0 +1,179 @@
+"""
+Motor de triagem vetorizado sobre um painel (tempo × símbolo).
+
+Em vez de um DataFrame por símbolo com `.ewm()`/`.rolling()` e `iterrows()`
+nas últimas barras, os históricos do universo são empilhados em matrizes
+NumPy alinhadas pela ÚLTIMA barra de cada símbolo (linha -1 = barra mais
+recente de cada coluna; o começo de séries mais curtas é preenchido com NaN).
+Médias, condição "acima das 3 médias" e o padrão de barras viram operações
+booleanas sobre colunas inteiras.
+"""
+from __future__ import annotations
+
+from tardio import tardio
+
+np = tardio("numpy")
+pd = tardio("pandas")
+
+EMA_FAST  = 21
+EMA_MID   = 120
+SMA_LONG  = 200
+
+# Mínimo de barras exigido em cada timeframe (mesmo corte dos check_symbol)
+MINIMO_BARRAS = 205
+
+# =======================
+# PAINEL
+# =======================
+
+def montar_painel(historicos: dict[str, pd.DataFrame], simbolos: list[str],
+                  colunas=("Open", "Close"), janela: int | None = None) -> dict[str, np.ndarray]:
+    """
+    Empilha os históricos em matrizes T×N alinhadas à direita.
+    Símbolos sem histórico viram colunas só de NaN. O dicionário devolvido
+    também traz "barras" (comprimento de cada série) e "simbolos".
+    Com `janela`, só as últimas `janela` barras entram no painel (as médias
+    vêm do estado incremental); "barras" continua com o comprimento total.
+    """
+    series = [historicos.get(sym) for sym in simbolos]
+    comprimentos = np.array([0 if df is None else len(df) for df in series], dtype=int)
+    T = int(comprimentos.max()) if len(series) else 0
+    if janela is not None:
+        T = min(T, janela)
+    # Pelo menos uma linha (de NaN) — as regras sempre leem a linha -1
+    T = max(T, 1)
+
+    painel = {"simbolos": list(simbolos), "barras": comprimentos}
+    for col in colunas:
+        m = np.full((T, len(simbolos)), np.nan)
+        for j, df in enumerate(series):
+            if df is not None and len(df):
+                # Recorta antes de converter: só as T últimas barras saem do armazém
+                v = df[col].to_numpy()[-T:]
+                m[T - len(v):, j] = v
+        painel[col] = m
+    return painel
+
+# =======================
+# INDICADORES
+# =======================
+
+def ema_painel(x: np.ndarray, span: int) -> np.ndarray:
+    """EMA coluna a coluna, equivalente a `ewm(span, adjust=False).mean()`."""
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty_like(x)
+    prev = np.full(x.shape[1:], np.nan)
+    for t in range(x.shape[0]):
+        xt = x[t]
+        novo = np.where(np.isnan(prev), xt, prev + alpha * (xt - prev))
+        prev = np.where(np.isnan(xt), prev, novo)
+        out[t] = prev
+    return out
+
+def sma_painel(x: np.ndarray, janela: int) -> np.ndarray:
+    """SMA coluna a coluna, equivalente a `rolling(janela).mean()` (NaN sem janela cheia)."""
+    validos = ~np.isnan(x)
+    zeros = np.zeros((1,) + x.shape[1:])
+    soma = np.concatenate([zeros, np.cumsum(np.where(validos, x, 0.0), axis=0)])
+    cont = np.concatenate([zeros, np.cumsum(validos, axis=0)])
+    out = np.full_like(x, np.nan)
+    if x.shape[0] >= janela:
+        s = soma[janela:] - soma[:-janela]
+        c = cont[janela:] - cont[:-janela]
+        out[janela - 1:] = np.where(c == janela, s / janela, np.nan)
+    return out
+
+def medias(painel: dict) -> dict[str, np.ndarray]:
+    """EMA21/EMA120/SMA200 sobre o Close de todas as colunas de uma vez."""
+    close = painel["Close"]
+    return {
+        "ema21":  ema_painel(close, EMA_FAST),
+        "ema120": ema_painel(close, EMA_MID),
+        "sma200": sma_painel(close, SMA_LONG),
+    }
+
+# =======================
+# REGRAS
+# =======================
+
+def acima_das_medias(close: np.ndarray, ind: dict[str, np.ndarray], margem: float = 0.0) -> np.ndarray:
+    """
+    Close da última barra acima das 3 médias (NaN conta como reprovado).
+    Com `margem`, aceita o Close até essa fração abaixo de cada média.
+    """
+    c = close[-1]
+    fator = 1.0 - margem
+    return ((c > ind["ema21"][-1] * fator) & (c > ind["ema120"][-1] * fator)
+            & (c > ind["sma200"][-1] * fator))
+
+def direcao_barras(open_: np.ndarray, close: np.ndarray, padrao: list[bool]) -> np.ndarray:
+    """Direção (bull/bear) de cada uma das últimas len(padrao) barras bate com o padrão."""
+    k = len(padrao)
+    if open_.shape[0] < k:
+        return np.zeros(open_.shape[1], dtype=bool)
+    bull = close[-k:] > open_[-k:]
+    # Barras NaN (série curta) nunca batem, nem como bear
+    definida = ~np.isnan(close[-k:]) & ~np.isnan(open_[-k:])
+    return np.all((bull == np.array(padrao)[:, None]) & definida, axis=0)
+
+def closes_crescentes(close: np.ndarray, k: int) -> np.ndarray:
+    """
+    Fechamentos estritamente crescentes entre as barras 1..k-1 das últimas k
+    — ignora o close da 1ª barra (bear), pois é comum a 1ª barra bull fechar
+    abaixo dela (gap down + recuperação parcial) e ainda configurar o padrão.
+    """
+    if close.shape[0] < k:
+        return np.zeros(close.shape[1], dtype=bool)
+    c = close[-k + 1:]
+    return np.all(c[1:] > c[:-1], axis=0)
+
+def triagem_3ws(sinal: dict, vies: dict, padrao: list[bool],
+                minimo_barras: int = MINIMO_BARRAS,
+                ind_sinal: dict | None = None, ind_vies: dict | None = None) -> dict:
+    """
+    Regra 3WS para o universo inteiro: histórico suficiente nos dois
+    timeframes, Close acima das 3 médias no sinal e no viés, e padrão de
+    direção + closes crescentes nas últimas barras do sinal.
+    `ind_sinal`/`ind_vies` permitem passar médias já calculadas (ex.: do
+    estado incremental); sem eles, as médias são calculadas sobre o painel.
+    Devolve as máscaras de cada etapa, as médias e "hits" (máscara final).
+    """
+    if ind_sinal is None:
+        ind_sinal = medias(sinal)
+    if ind_vies is None:
+        ind_vies = medias(vies)
+
+    historico = (sinal["barras"] >= minimo_barras) & (vies["barras"] >= minimo_barras)
+    medias_ok = acima_das_medias(sinal["Close"], ind_sinal) & acima_das_medias(vies["Close"], ind_vies)
+    direcao = direcao_barras(sinal["Open"], sinal["Close"], padrao)
+    crescente = closes_crescentes(sinal["Close"], len(padrao))
+
+    return {
+        "simbolos": sinal["simbolos"],
+        "historico": historico,
+        "medias": medias_ok,
+        "direcao": direcao,
+        "crescente": crescente,
+        "hits": historico & medias_ok & direcao & crescente,
+        "ind_sinal": ind_sinal,
+        "ind_vies": ind_vies,
+    }
+
+def resumo_medias(painel: dict, ind: dict[str, np.ndarray], j: int) -> str:
+    """Close e médias da última barra da coluna j, para o log de debug."""
+    return (
+        f"close={painel['Close'][-1, j]:.2f} ema21={ind['ema21'][-1, j]:.2f} "
+        f"ema120={ind['ema120'][-1, j]:.2f} sma200={ind['sma200'][-1, j]:.2f}"
+    )
+
+def motivo_reprovacao(res: dict, j: int) -> str | None:
+    """Motivo (na ordem dos checks originais) pelo qual a coluna j reprovou; None se aprovada."""
+    if not res["historico"][j]:
+        return "histórico insuficiente"
+    if not res["medias"][j]:
+        return "não está acima das 3 médias nos dois timeframes"
+    if not res["direcao"][j]:
+        return "padrão de direção das barras não corresponde"
+    if not res["crescente"][j]:
+        return "closes das barras bull não são estritamente crescentes"
+    return None